@@ -1,14 +1,30 @@
 # backend/app/__init__.py
 from flask import Flask
 from flask_cors import CORS
-from .api import reviews, spotify, google_places  # Ensure this imports the correct modules
+from .api import reviews, spotify, google_places, upstream  # Ensure this imports the correct modules
 from .api.places import places_bp
 from .models.recommendation import recommendations_bp  # Import the new recommendations blueprint
+from .models.place_store import start_refresh_worker
+from .models.precompute import precompute_bp, start_precompute_worker
+from .models.keyword_model import start_keyword_model_worker
+from .api.reviews import fetch_reviews_concurrently
+from . import metrics, startup
+import logging
 import os
 
+# Origin of the Next.js frontend allowed to call the API with credentials
+CORS_ORIGIN = os.getenv("CORS_ORIGIN", "http://localhost:3000")
+
 def create_app():
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    # httpx logs every request URL at INFO, API key included
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
     app = Flask(__name__)
-    CORS(app, supports_credentials=True, resources={r"/*": {"origins": "http://localhost:3000"}})
+    CORS(app, supports_credentials=True, resources={r"/*": {"origins": CORS_ORIGIN}})
 
     app.secret_key = os.getenv("FLASK_SECRET_KEY", "your_default_secret_key")
     
@@ -18,5 +34,21 @@ def create_app():
     app.register_blueprint(google_places.bp)
     app.register_blueprint(places_bp)
     app.register_blueprint(recommendations_bp)  # Register the recommendations blueprint
+    app.register_blueprint(upstream.bp)
+    app.register_blueprint(precompute_bp)
+    app.register_blueprint(metrics.bp)
+    app.register_blueprint(startup.bp)
+
+    # Request latency and per-stage timings for /metrics
+    metrics.instrument_app(app)
+
+    # Keep cached place vectors fresh in the background
+    start_refresh_worker(fetch_reviews_concurrently)
+    # Warm the caches for configured hot areas (PRECOMPUTE_TILES)
+    start_precompute_worker()
+    # Fold newly fetched reviews into the corpus keyword model in batches
+    start_keyword_model_worker()
+    # Load the lazy heavy dependencies and datasets (STARTUP_WARMUP); /ready reports when done
+    startup.start_warmup()
 
-    return app
\ No newline at end of file
+    return app
@@ -0,0 +1,92 @@
+# async_upstream.py
+import asyncio
+import os
+import random
+import time
+import httpx
+from app.api.upstream import (
+    CIRCUIT_BREAKER, GOOGLE_PLACES_BASE_URL, RATE_LIMITER, RETRY_STATUSES, UPSTREAM_BACKOFF,
+    UPSTREAM_BACKOFF_JITTER, UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT, UPSTREAM_RETRIES,
+    CircuitOpenError, UpstreamError, finish_call, record_refusal
+)
+
+# An event loop can keep far more requests in flight than a thread pool
+ASYNC_UPSTREAM_MAX_CONNECTIONS = int(os.getenv("ASYNC_UPSTREAM_MAX_CONNECTIONS", 200))
+
+_clients = {}  # event loop -> AsyncClient bound to it
+
+
+def get_async_client():
+    """Pooled keep-alive client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(UPSTREAM_READ_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=ASYNC_UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_UPSTREAM_MAX_CONNECTIONS
+            )
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def retry_delay(attempt, response=None):
+    """Jittered exponential backoff, honoring Retry-After like the sync session does."""
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return UPSTREAM_BACKOFF * (2 ** attempt) + random.uniform(0, UPSTREAM_BACKOFF_JITTER)
+
+
+async def async_google_get(endpoint, params):
+    """Non-blocking counterpart of upstream.google_get.
+
+    Shares the circuit breaker, rate limiter and upstream metrics with the
+    sync client and retries 429/5xx and transport errors the same way.
+    """
+    if CIRCUIT_BREAKER.state == 'open':
+        record_refusal(endpoint)
+        raise CircuitOpenError("Google Places API circuit is open")
+    wait = RATE_LIMITER.reserve(timeout=UPSTREAM_READ_TIMEOUT)
+    if wait is None:
+        record_refusal(endpoint)
+        raise UpstreamError("Upstream rate limit exceeded")
+    if wait:
+        await asyncio.sleep(wait)
+    if not CIRCUIT_BREAKER.allow():
+        record_refusal(endpoint)
+        raise CircuitOpenError("Google Places API circuit is open")
+
+    client = get_async_client()
+    url = f"{GOOGLE_PLACES_BASE_URL}/{endpoint}/json"
+    start = time.perf_counter()
+    failed = None   # Stays None if the call is cancelled or fails before an answer
+    try:
+        response, error = None, None
+        for attempt in range(UPSTREAM_RETRIES + 1):
+            try:
+                response, error = await client.get(url, params=params), None
+            except httpx.TransportError as e:
+                response, error = None, e
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                break
+            if attempt < UPSTREAM_RETRIES:
+                await asyncio.sleep(retry_delay(attempt, response))
+
+        failed = response is None or response.status_code in RETRY_STATUSES
+        if error is not None:
+            raise error
+        return response
+    finally:
+        finish_call(endpoint, start, failed)
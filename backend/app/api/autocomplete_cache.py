@@ -0,0 +1,138 @@
+# autocomplete_cache.py
+import asyncio
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from app.api.review_cache import ReviewCache
+
+AUTOCOMPLETE_CACHE_TTL = float(os.getenv("AUTOCOMPLETE_CACHE_TTL", 600))
+AUTOCOMPLETE_CACHE_MAX_ENTRIES = int(os.getenv("AUTOCOMPLETE_CACHE_MAX_ENTRIES", 5000))
+AUTOCOMPLETE_PREFIX_REUSE = os.getenv("AUTOCOMPLETE_PREFIX_REUSE", "1") != "0"
+
+# Google returns at most this many predictions; fewer means the list is complete
+MAX_PREDICTIONS = 5
+CACHEABLE_STATUSES = ('OK', 'ZERO_RESULTS')
+
+_WHITESPACE = re.compile(r'\s+')
+_NON_WORD = re.compile(r'\W+')
+
+
+def normalize_input(text):
+    """Cache key for an autocomplete input: lowercased with whitespace collapsed."""
+    return _WHITESPACE.sub(' ', text.strip().lower())
+
+
+def prediction_matches(prediction, terms):
+    """True when every input term is a prefix of some word of the prediction."""
+    words = _NON_WORD.sub(' ', prediction.get('description', '').lower()).split()
+    return all(any(word.startswith(term) for word in words) for term in terms)
+
+
+class AutocompleteCache(ReviewCache):
+    """TTL + LRU cache of autocomplete responses keyed by normalized input.
+
+    When an input misses, its shorter prefixes are checked: a cached prefix
+    that returned fewer than MAX_PREDICTIONS predictions holds every match
+    Google had for it, so the longer input's answer is that list filtered
+    down to the predictions that still match.
+    """
+
+    def __init__(self, ttl=AUTOCOMPLETE_CACHE_TTL, max_entries=AUTOCOMPLETE_CACHE_MAX_ENTRIES,
+                 prefix_reuse=AUTOCOMPLETE_PREFIX_REUSE):
+        super().__init__(ttl=ttl, max_entries=max_entries)
+        self.prefix_reuse = prefix_reuse
+        self.prefix_hits = 0
+
+    def _peek(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def lookup(self, key):
+        """Cached response for `key`, derived from a complete prefix result if needed."""
+        data = self.get(key)
+        if data is not None or not self.prefix_reuse:
+            return data
+
+        terms = key.split()
+        for end in range(len(key) - 1, 0, -1):
+            prefix = self._peek(key[:end])
+            if prefix is None or len(prefix.get('predictions', [])) >= MAX_PREDICTIONS:
+                continue
+            predictions = [p for p in prefix.get('predictions', []) if prediction_matches(p, terms)]
+            data = {
+                'predictions': predictions,
+                'status': 'OK' if predictions else 'ZERO_RESULTS'
+            }
+            self.set(key, data)
+            with self._lock:
+                self.prefix_hits += 1
+            return data
+        return None
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats['prefix_hits'] = self.prefix_hits
+        return stats
+
+
+class SingleFlight:
+    """Merges concurrent calls with the same key into a single execution."""
+
+    def __init__(self):
+        self._calls = {}   # key -> Future of the call in flight
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines: concurrent awaits of one key share a single call."""
+
+    def __init__(self):
+        self._calls = {}   # key -> Task of the call in flight
+        self.coalesced = 0
+
+    async def do(self, key, coroutine_fn):
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(coroutine_fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shield so a cancelled caller does not cancel the call others are waiting on
+        return await asyncio.shield(task)
+
+
+AUTOCOMPLETE_CACHE = AutocompleteCache()
+AUTOCOMPLETE_FLIGHTS = SingleFlight()
+AUTOCOMPLETE_ASYNC_FLIGHTS = AsyncSingleFlight()
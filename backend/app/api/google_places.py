@@ -1,23 +1,59 @@
 # In backend/app/api/google_places.py
 from flask import Blueprint, request, jsonify
-import requests
 import os
+from app.api.upstream import google_get, UpstreamError
+from app.api.autocomplete_cache import (
+    AUTOCOMPLETE_ASYNC_FLIGHTS, AUTOCOMPLETE_CACHE, AUTOCOMPLETE_FLIGHTS, CACHEABLE_STATUSES, normalize_input
+)
+from app.metrics import register_stats
 
 bp = Blueprint('google_places', __name__, url_prefix='/api/google_places')
 
+def autocomplete_stats():
+    coalesced = AUTOCOMPLETE_FLIGHTS.coalesced + AUTOCOMPLETE_ASYNC_FLIGHTS.coalesced
+    return {**AUTOCOMPLETE_CACHE.stats(), 'coalesced': coalesced}
+
+register_stats('autocomplete_cache', autocomplete_stats,
+               counters=('hits', 'prefix_hits', 'misses', 'evictions', 'expirations', 'coalesced'),
+               gauges=('entries', 'bytes'))
+
+def autocomplete_params(text):
+    google_api_key = os.getenv("GOOGLE_API_KEY")
+    return {
+        "input": text,
+        "key": google_api_key
+    }
+
+def cache_autocomplete(text, data):
+    """Cache answers that are not errors and pass the response through"""
+    if data.get('status') in CACHEABLE_STATUSES:
+        AUTOCOMPLETE_CACHE.set(text, data)
+    return data
+
+def fetch_autocomplete(text):
+    """Ask Google for predictions"""
+    return cache_autocomplete(text, google_get('autocomplete', autocomplete_params(text)).json())
+
 @bp.route('/autocomplete', methods=['GET'])
 def autocomplete():
     input_text = request.args.get('input')
-    google_api_key = os.getenv("GOOGLE_API_KEY")
-    
+
     if not input_text:
         return jsonify({"error": "Input text is required"}), 400
 
-    url = f"https://maps.googleapis.com/maps/api/place/autocomplete/json"
-    params = {
-        "input": input_text,
-        "key": google_api_key
-    }
-    
-    response = requests.get(url, params=params)
-    return jsonify(response.json())
+    key = normalize_input(input_text)
+    data = AUTOCOMPLETE_CACHE.lookup(key)
+    if data is not None:
+        return jsonify(data)
+
+    # Users typing the same text at the same time share one upstream call
+    try:
+        data = AUTOCOMPLETE_FLIGHTS.do(key, lambda: fetch_autocomplete(key))
+    except UpstreamError as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify(data)
+
+@bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Endpoint exposing autocomplete cache counters"""
+    return jsonify(autocomplete_stats())
@@ -0,0 +1,222 @@
+# nearby_index.py
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+EARTH_RADIUS_M = 6371000.0
+
+# Grid cell size in degrees of latitude (~550 m); longitude cells use the same angle
+NEARBY_CELL_DEGREES = float(os.getenv("NEARBY_CELL_DEGREES", 0.005))
+# How long a fetched area counts as covered
+NEARBY_INDEX_TTL = float(os.getenv("NEARBY_INDEX_TTL", 6 * 3600))
+NEARBY_MAX_RESULTS = int(os.getenv("NEARBY_MAX_RESULTS", 60))
+# Larger searches always go upstream: Google caps a search at 20 results,
+# so one response says little about what a very large circle contains
+NEARBY_INDEX_MAX_RADIUS = float(os.getenv("NEARBY_INDEX_MAX_RADIUS", 10000))
+# Places kept in the index; the least recently seen go first
+NEARBY_INDEX_MAX_PLACES = int(os.getenv("NEARBY_INDEX_MAX_PLACES", 50000))
+# Results per Nearby Search page; a full page may have more behind a next_page_token
+NEARBY_PAGE_SIZE = 20
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """Great-circle distance in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def place_location(place):
+    location = place.get('geometry', {}).get('location', {})
+    return location.get('lat'), location.get('lng')
+
+
+class NearbyIndex:
+    """Grid index of places seen in earlier Nearby Search responses.
+
+    The map is split into fixed lat/lng cells (a geohash-style grid). Each
+    cell remembers when it was last fully covered by an upstream search, so
+    a new query can be answered locally for its covered cells and only the
+    uncovered part has to go to Google.
+
+    Places and coverage expire after `ttl` seconds, and past `max_places`
+    the least recently seen places are dropped along with the coverage of
+    their cells.
+    """
+
+    def __init__(self, cell_degrees=NEARBY_CELL_DEGREES, ttl=NEARBY_INDEX_TTL, max_places=NEARBY_INDEX_MAX_PLACES):
+        self.cell_degrees = cell_degrees
+        self.ttl = ttl
+        self.max_places = max_places
+        self._places = OrderedDict()   # place_id -> (place dict, cell, time last seen), oldest first
+        self._cells = {}               # cell -> set of place_ids
+        self._covered = OrderedDict()  # cell -> upstream search circles (lat, lng, radius, time), oldest first
+        self._lock = threading.Lock()
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def _cell_corners(self, cell):
+        lat0, lng0 = cell[0] * self.cell_degrees, cell[1] * self.cell_degrees
+        lat1, lng1 = lat0 + self.cell_degrees, lng0 + self.cell_degrees
+        return [(lat0, lng0), (lat0, lng1), (lat1, lng0), (lat1, lng1)]
+
+    def _cell_center(self, cell):
+        return ((cell[0] + 0.5) * self.cell_degrees, (cell[1] + 0.5) * self.cell_degrees)
+
+    def _cells_in_circle(self, lat, lng, radius):
+        """Cells that intersect the circle, i.e. whose closest point is within the radius."""
+        dlat = math.degrees(radius / EARTH_RADIUS_M)
+        dlng = math.degrees(radius / (EARTH_RADIUS_M * max(math.cos(math.radians(lat)), 1e-6)))
+        lo = self._cell(lat - dlat, lng - dlng)
+        hi = self._cell(lat + dlat, lng + dlng)
+        cells = []
+        for i in range(lo[0], hi[0] + 1):
+            for j in range(lo[1], hi[1] + 1):
+                lat0, lng0 = i * self.cell_degrees, j * self.cell_degrees
+                near_lat = min(max(lat, lat0), lat0 + self.cell_degrees)
+                near_lng = min(max(lng, lng0), lng0 + self.cell_degrees)
+                if haversine(lat, lng, near_lat, near_lng) <= radius:
+                    cells.append((i, j))
+        return cells
+
+    def _sample_points(self, cell, lat, lng, radius):
+        """Corners and center of a cell, pulled inside the query circle."""
+        points = []
+        for p_lat, p_lng in self._cell_corners(cell) + [self._cell_center(cell)]:
+            distance = haversine(lat, lng, p_lat, p_lng)
+            if distance > radius:
+                # Move the point onto the circle boundary toward the center
+                scale = radius * 0.999 / distance
+                p_lat, p_lng = lat + (p_lat - lat) * scale, lng + (p_lng - lng) * scale
+            points.append((p_lat, p_lng))
+        return points
+
+    def add_search(self, lat, lng, radius, places, exhaustive=None):
+        """Index places from an upstream search and remember the area it covered.
+
+        The area only counts as covered when the search returned every place
+        in it: `exhaustive`, by default when the results fit on one page.
+        """
+        if exhaustive is None:
+            exhaustive = len(places) < NEARBY_PAGE_SIZE
+        now = time.time()
+        cutoff = now - self.ttl
+        with self._lock:
+            for place in places:
+                place_lat, place_lng = place_location(place)
+                place_id = place.get('place_id')
+                if place_id is None or place_lat is None or place_lng is None:
+                    continue
+                self._remove_place(place_id)
+                cell = self._cell(place_lat, place_lng)
+                self._places[place_id] = (place, cell, now)
+                self._cells.setdefault(cell, set()).add(place_id)
+
+            if exhaustive and radius <= NEARBY_INDEX_MAX_RADIUS:
+                circle = (lat, lng, radius, now)
+                for cell in self._cells_in_circle(lat, lng, radius):
+                    circles = [c for c in self._covered.pop(cell, []) if c[3] >= cutoff]
+                    circles.append(circle)
+                    self._covered[cell] = circles
+            self._expire(cutoff)
+
+    def _remove_place(self, place_id):
+        entry = self._places.pop(place_id, None)
+        if entry is not None:
+            cell_places = self._cells[entry[1]]
+            cell_places.discard(place_id)
+            if not cell_places:
+                del self._cells[entry[1]]
+        return entry
+
+    def _expire(self, cutoff):
+        while self._places:
+            place_id, (_, cell, seen_at) = next(iter(self._places.items()))
+            if seen_at >= cutoff and len(self._places) <= self.max_places:
+                break
+            self._remove_place(place_id)
+            if seen_at >= cutoff:
+                # Dropped for space while still fresh: the cell is no longer complete
+                self._covered.pop(cell, None)
+        while self._covered:
+            cell, circles = next(iter(self._covered.items()))
+            if circles[-1][3] >= cutoff:
+                break
+            del self._covered[cell]
+
+    def _is_covered(self, cell, lat, lng, radius, cutoff):
+        circles = [c for c in self._covered.get(cell, []) if c[3] >= cutoff]
+        return bool(circles) and all(
+            any(haversine(c_lat, c_lng, p_lat, p_lng) <= c_radius for c_lat, c_lng, c_radius, _ in circles)
+            for p_lat, p_lng in self._sample_points(cell, lat, lng, radius)
+        )
+
+    def plan(self, lat, lng, radius):
+        """Split a query into covered cells and the circle still to fetch upstream.
+
+        A cell counts as covered when the part of it inside the query circle
+        lies within recent upstream searches. Returns (covered_cells,
+        fetch_circle) where fetch_circle is None when the whole query can be
+        served from the index, otherwise (lat, lng, radius) of a circle around
+        the uncovered cells, never larger than the query itself.
+        """
+        if radius > NEARBY_INDEX_MAX_RADIUS:
+            return [], (lat, lng, radius)
+
+        cutoff = time.time() - self.ttl
+        covered, uncovered = [], []
+        with self._lock:
+            for cell in self._cells_in_circle(lat, lng, radius):
+                if self._is_covered(cell, lat, lng, radius, cutoff):
+                    covered.append(cell)
+                else:
+                    uncovered.append(cell)
+        if not uncovered:
+            return covered, None
+        if not covered:
+            return covered, (lat, lng, radius)
+
+        points = [point for cell in uncovered for point in self._sample_points(cell, lat, lng, radius)]
+        c_lat = sum(p[0] for p in points) / len(points)
+        c_lng = sum(p[1] for p in points) / len(points)
+        c_radius = max(haversine(c_lat, c_lng, p_lat, p_lng) for p_lat, p_lng in points)
+        if c_radius >= radius:
+            return covered, (lat, lng, radius)
+        return covered, (c_lat, c_lng, c_radius)
+
+    def get(self, place_id):
+        """The place as Google last returned it, or None if it is not indexed (or expired)."""
+        with self._lock:
+            entry = self._places.get(place_id)
+        if entry is None or entry[2] < time.time() - self.ttl:
+            return None
+        return entry[0]
+
+    def query(self, lat, lng, radius, cells=None):
+        """Indexed places within `radius` meters, restricted to `cells` when given."""
+        cells = self._cells_in_circle(lat, lng, radius) if cells is None else cells
+        results = []
+        with self._lock:
+            for cell in cells:
+                for place_id in self._cells.get(cell, ()):
+                    place = self._places[place_id][0]
+                    place_lat, place_lng = place_location(place)
+                    if haversine(lat, lng, place_lat, place_lng) <= radius:
+                        results.append(place)
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                'places': len(self._places),
+                'cells': len(self._cells),
+                'covered_cells': len(self._covered)
+            }
+
+
+NEARBY_INDEX = NearbyIndex()
@@ -1,151 +1,240 @@
 from flask import Blueprint, request, jsonify
-import requests
+import logging
 import os
 from flask_cors import CORS  # Make sure to import CORS
+from app.api.upstream import GOOGLE_PLACES_BASE_URL, google_get, UpstreamError
+from app.api.nearby_index import NEARBY_INDEX, NEARBY_MAX_RESULTS
+from app.metrics import Counter, register_stats
 
 places_bp = Blueprint('places', __name__, url_prefix='/api/places')
 CORS(places_bp)  # Enable CORS for this blueprint
+logger = logging.getLogger(__name__)
+
+NEARBY_REQUESTS = Counter('nearby_requests_total', 'Nearby searches by where the places came from', ('source',))
+register_stats('nearby_index', NEARBY_INDEX.stats, gauges=('places', 'cells', 'covered_cells'))
 
 GOOGLE_PLACES_API_KEY = os.getenv('GOOGLE_API_KEY')
 
-@places_bp.route('/nearby', methods=['GET'])
-def nearby_places():
+# Nearby Search `status` values that carry a complete answer
+NEARBY_SUCCESS_STATUSES = ('OK', 'ZERO_RESULTS')
+
+def nearby_search_params(lat, lng, radius):
+    """Query parameters of one upstream Nearby Search"""
+    url = f'{GOOGLE_PLACES_BASE_URL}/nearbysearch/json'
+    params = {
+        'location': f'{lat},{lng}',
+        'radius': radius,
+        'type': 'establishment',
+        'key': GOOGLE_PLACES_API_KEY
+    }
+
+    logger.debug("Making request to Google Places API: %s", {
+        "url": url,
+        "params": {**params, "key": "REDACTED"}  # Log params without API key
+    })
+    return params
+
+def upstream_unavailable(e):
+    """Error for a call refused by the circuit breaker or the local rate limiter"""
+    logger.warning("Google Places API unavailable: %s", e)
+    return [], {
+        "status_code": 503,
+        "message": str(e)
+    }
+
+def parse_nearby_response(response):
+    """Turn a Nearby Search response into (places, error) where error is None on success.
+
+    Google reports quota and key problems with HTTP 200 and a non-OK `status`;
+    only OK and ZERO_RESULTS count as an answer, so errors are never indexed
+    as an empty area.
+    """
+    # Check response status
+    if response.status_code != 200:
+        logger.warning("Google Places API error: %s", response.text)
+        return [], {
+            "status_code": response.status_code,
+            "google_response": response.json()
+        }
+
+    body = response.json()
+    status = body.get('status')
+    if status not in NEARBY_SUCCESS_STATUSES:
+        logger.warning("Google Places API error status %s: %s", status, body.get('error_message'))
+        return [], {
+            "status_code": 503 if status == 'OVER_QUERY_LIMIT' else 502,
+            "google_response": body
+        }
+    return body.get('results', []), None
+
+def search_google_nearby(lat, lng, radius):
+    """Run one Nearby Search upstream; returns (places, error) where error is None on success"""
+    params = nearby_search_params(lat, lng, radius)
     try:
-        # Log raw request data
-        print("Raw request args:", request.args)
-        
-        # Get parameters with detailed logging
-        lat = request.args.get('lat')
-        lng = request.args.get('lng')
-        radius = request.args.get('radius')
-        
-        print("Received parameters:", {
-            'lat': lat,
-            'lng': lng,
-            'radius': radius,
-            'lat_type': type(lat).__name__,
-            'lng_type': type(lng).__name__,
-            'radius_type': type(radius).__name__
-        })
-
-        # Convert strings to float with error handling
-        try:
-            lat = float(lat) if lat is not None else None
-            lng = float(lng) if lng is not None else None
-            radius = float(radius) if radius is not None else None
-        except ValueError as e:
-            print(f"Parameter conversion error: {str(e)}")
-            return jsonify({
-                "error": "Invalid parameter format",
-                "details": {
-                    "message": str(e),
-                    "received_values": {
-                        "lat": lat,
-                        "lng": lng,
-                        "radius": radius
-                    }
-                }
-            }), 400
-
-        # Validate parameters
-        if any(param is None for param in [lat, lng, radius]):
-            missing_params = []
-            if lat is None: missing_params.append("lat")
-            if lng is None: missing_params.append("lng")
-            if radius is None: missing_params.append("radius")
-            return jsonify({
-                "error": "Missing parameters",
-                "details": {
-                    "missing": missing_params,
-                    "received": request.args
-                }
-            }), 400
-
-        # Validate coordinate ranges
-        if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
-            return jsonify({
-                "error": "Invalid coordinates",
-                "details": {
-                    "latitude": lat,
-                    "longitude": lng,
-                    "valid_ranges": {
-                        "latitude": "[-90, 90]",
-                        "longitude": "[-180, 180]"
-                    }
-                }
-            }), 400
-
-        # Validate radius (max 50km/50000m per Google Places API limits)
-        if not (0 < radius <= 50000):
-            return jsonify({
-                "error": "Invalid radius",
-                "details": {
-                    "received": radius,
-                    "valid_range": "(0, 50000]",
-                    "unit": "meters"
+        response = google_get('nearbysearch', params)
+    except UpstreamError as e:
+        # Circuit open or over the local rate limit: fail fast without calling Google
+        return upstream_unavailable(e)
+    return parse_nearby_response(response)
+
+def parse_nearby_args(args):
+    """Validate the query string of /nearby.
+
+    Returns ((lat, lng, radius), None), or (None, (error_body, status)) when
+    the parameters are missing or out of range.
+    """
+    # Log raw request data
+    logger.debug("Raw request args: %s", args)
+    
+    # Get parameters with detailed logging
+    lat = args.get('lat')
+    lng = args.get('lng')
+    radius = args.get('radius')
+    
+    logger.debug("Received parameters: %s", {
+        'lat': lat,
+        'lng': lng,
+        'radius': radius,
+        'lat_type': type(lat).__name__,
+        'lng_type': type(lng).__name__,
+        'radius_type': type(radius).__name__
+    })
+
+    # Convert strings to float with error handling
+    try:
+        lat = float(lat) if lat is not None else None
+        lng = float(lng) if lng is not None else None
+        radius = float(radius) if radius is not None else None
+    except ValueError as e:
+        logger.info("Parameter conversion error: %s", e)
+        return None, ({
+            "error": "Invalid parameter format",
+            "details": {
+                "message": str(e),
+                "received_values": {
+                    "lat": lat,
+                    "lng": lng,
+                    "radius": radius
                 }
-            }), 400
-
-        # Get nearby places
-        url = 'https://maps.googleapis.com/maps/api/place/nearbysearch/json'
-        params = {
-            'location': f'{lat},{lng}',
-            'radius': radius,
-            'type': 'establishment',
-            'key': GOOGLE_PLACES_API_KEY
-        }
+            }
+        }, 400)
 
-        print("Making request to Google Places API:", {
-            "url": url,
-            "params": {**params, "key": "REDACTED"}  # Log params without API key
-        })
-
-        response = requests.get(url, params=params)
-        
-        # Check response status
-        if response.status_code != 200:
-            print(f"Google Places API error: {response.text}")
-            return jsonify({
-                "error": "Failed to fetch places",
-                "details": {
-                    "status_code": response.status_code,
-                    "google_response": response.json()
+    # Validate parameters
+    if any(param is None for param in [lat, lng, radius]):
+        missing_params = []
+        if lat is None: missing_params.append("lat")
+        if lng is None: missing_params.append("lng")
+        if radius is None: missing_params.append("radius")
+        return None, ({
+            "error": "Missing parameters",
+            "details": {
+                "missing": missing_params,
+                "received": args
+            }
+        }, 400)
+
+    # Validate coordinate ranges
+    if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+        return None, ({
+            "error": "Invalid coordinates",
+            "details": {
+                "latitude": lat,
+                "longitude": lng,
+                "valid_ranges": {
+                    "latitude": "[-90, 90]",
+                    "longitude": "[-180, 180]"
                 }
-            }), response.status_code
+            }
+        }, 400)
 
-        places = response.json().get('results', [])
-        
-        print(f"Found {len(places)} places within {radius}m of {lat},{lng}")
+    # Validate radius (max 50km/50000m per Google Places API limits)
+    if not (0 < radius <= 50000):
+        return None, ({
+            "error": "Invalid radius",
+            "details": {
+                "received": radius,
+                "valid_range": "(0, 50000]",
+                "unit": "meters"
+            }
+        }, 400)
 
-        # Filter out places without proper location data
-        valid_places = [
-            place for place in places
-            if place.get('geometry', {}).get('location', {}).get('lat') and 
-               place.get('geometry', {}).get('location', {}).get('lng')
-        ]
+    return (lat, lng, radius), None
 
-        for place in valid_places:
-            if 'types' in place:
-                place['types'] = ", ".join([t.replace('_', ' ') for t in place['types']])
+def nearby_fetch_error(error):
+    return {
+        "error": "Failed to fetch places",
+        "details": error
+    }
 
-        return jsonify({
-            "status": "success",
-            "places": valid_places,
-            "metadata": {
-                "total_found": len(places),
-                "valid_places": len(valid_places),
-                "search_params": {
-                    "latitude": lat,
-                    "longitude": lng,
-                    "radius_meters": radius
-                }
+def build_nearby_response(lat, lng, radius, covered_cells, fetch_circle, fetched):
+    """Index freshly fetched places and merge them with the indexed ones into the /nearby body"""
+    if fetch_circle is not None:
+        NEARBY_INDEX.add_search(*fetch_circle, fetched)
+
+    fetched_ids = {place.get('place_id') for place in fetched}
+    indexed = [
+        place for place in NEARBY_INDEX.query(lat, lng, radius, covered_cells)
+        if place.get('place_id') not in fetched_ids
+    ]
+    places = (fetched + indexed)[:max(NEARBY_MAX_RESULTS, len(fetched))]
+    
+    logger.debug("Found %d places within %sm of %s,%s (%d from Google, %d from the local index)",
+                 len(places), radius, lat, lng, len(fetched), len(indexed))
+
+    # Filter out places without proper location data
+    valid_places = [
+        place for place in places
+        if place.get('geometry', {}).get('location', {}).get('lat') and 
+           place.get('geometry', {}).get('location', {}).get('lng')
+    ]
+
+    # Copy before formatting so indexed places keep their raw type lists
+    valid_places = [
+        {**place, 'types': ", ".join([t.replace('_', ' ') for t in place['types']])} if 'types' in place else dict(place)
+        for place in valid_places
+    ]
+
+    source = "index" if fetch_circle is None else ("google" if not indexed else "index+google")
+    NEARBY_REQUESTS.inc(source=source)
+
+    return {
+        "status": "success",
+        "places": valid_places,
+        "metadata": {
+            "total_found": len(places),
+            "valid_places": len(valid_places),
+            "source": source,
+            "upstream_radius_meters": fetch_circle[2] if fetch_circle else 0,
+            "search_params": {
+                "latitude": lat,
+                "longitude": lng,
+                "radius_meters": radius
             }
-        })
+        }
+    }
+
+@places_bp.route('/nearby', methods=['GET'])
+def nearby_places():
+    try:
+        coordinates, error = parse_nearby_args(request.args)
+        if error is not None:
+            return jsonify(error[0]), error[1]
+        lat, lng, radius = coordinates
+
+        # Serve the parts of the circle we already hold from the local index
+        # and only send the uncovered area to Google
+        covered_cells, fetch_circle = NEARBY_INDEX.plan(lat, lng, radius)
+
+        fetched = []
+        if fetch_circle is not None:
+            fetched, error = search_google_nearby(*fetch_circle)
+            if error is not None:
+                return jsonify(nearby_fetch_error(error)), error["status_code"]
+
+        return jsonify(build_nearby_response(lat, lng, radius, covered_cells, fetch_circle, fetched))
 
     except Exception as e:
-        import traceback
-        print(f"Error in nearby_places: {str(e)}")
-        print("Traceback:", traceback.format_exc())
+        logger.exception("Error in nearby_places: %s", e)
         return jsonify({
             "error": "Server error",
             "details": {
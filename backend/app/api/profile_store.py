@@ -0,0 +1,182 @@
+# profile_store.py
+"""Server-side music profiles referenced by a short id in the session cookie.
+
+A profile is the track store rows of the selected tracks plus the sums of
+their preference columns (PREFERENCE_NAMES), so the cookie only carries
+the id, adding or removing a track only touches that track's row, and
+recommendation requests can use the preference vector by profile id.
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from app.metrics import register_stats
+
+PROFILE_TTL = float(os.getenv("PROFILE_TTL", 30 * 24 * 3600))   # seconds since last use
+PROFILE_MAX_ENTRIES = int(os.getenv("PROFILE_MAX_ENTRIES", 100000))
+
+# The user_preferences /content-based scores against, in this order
+PREFERENCE_NAMES = ('valence', 'energy', 'loudness', 'ambiance', 'liveness')
+
+
+def new_profile_id():
+    return secrets.token_urlsafe(12)
+
+
+def track_preference_matrix(valence, energy, acousticness):
+    """One PREFERENCE_NAMES row per track.
+
+    Loudness, ambiance and liveness are 0.7 for tracks whose valence, energy
+    and acousticness respectively are above 0.5 and 0.3 otherwise, as the
+    frontend has always derived them.
+    """
+    return np.column_stack([
+        valence,
+        energy,
+        np.where(valence > 0.5, 0.7, 0.3),
+        np.where(energy > 0.5, 0.7, 0.3),
+        np.where(acousticness > 0.5, 0.7, 0.3),
+    ]).astype(np.float64)
+
+
+def preference_vector(rows, sums):
+    """user_preferences dict of a profile: the mean of its tracks' preference rows."""
+    if not len(rows):
+        return {}
+    return {name: float(value) for name, value in zip(PREFERENCE_NAMES, np.asarray(sums) / len(rows))}
+
+
+def profile_preferences(profile_id):
+    """user_preferences of a stored profile, or None if the id is unknown or expired."""
+    profile = PROFILE_STORE.get(profile_id) if isinstance(profile_id, str) else None
+    return preference_vector(*profile) if profile is not None else None
+
+
+class ProfileStore:
+    """In-memory profiles keyed by id; unused profiles expire after `ttl`
+    seconds and the least recently used are evicted past `max_entries`."""
+
+    def __init__(self, ttl=PROFILE_TTL, max_entries=PROFILE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # profile_id -> (expires_at, rows, preference sums)
+        self._lock = threading.Lock()
+
+    def get(self, profile_id):
+        """(rows, preference sums) of a profile, or None if it is unknown or expired."""
+        with self._lock:
+            entry = self._entries.get(profile_id)
+            if entry is None:
+                return None
+            expires_at, rows, sums = entry
+            if expires_at < time.time():
+                del self._entries[profile_id]
+                return None
+            self._entries[profile_id] = (time.time() + self.ttl, rows, sums)
+            self._entries.move_to_end(profile_id)
+            return rows, sums
+
+    def put(self, profile_id, rows, sums):
+        rows = np.asarray(rows, dtype=np.int32)
+        sums = np.asarray(sums, dtype=np.float64)
+        with self._lock:
+            self._entries[profile_id] = (time.time() + self.ttl, rows, sums)
+            self._entries.move_to_end(profile_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, profile_id):
+        with self._lock:
+            self._entries.pop(profile_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'entries': len(self._entries)}
+
+
+class SQLiteProfileStore:
+    """Profiles in a SQLite file, shared by every worker that opens it.
+
+    Rows and preference sums are stored as little-endian int32 / float64 blobs.
+    """
+
+    def __init__(self, path, ttl=PROFILE_TTL, max_entries=PROFILE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS profiles (
+                profile_id TEXT PRIMARY KEY,
+                rows BLOB NOT NULL,
+                sums BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS profiles_expires_at ON profiles (expires_at)")
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def get(self, profile_id):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT rows, sums, expires_at FROM profiles WHERE profile_id = ?", (profile_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[2] < now:
+            conn.execute("DELETE FROM profiles WHERE profile_id = ?", (profile_id,))
+            conn.commit()
+            return None
+        conn.execute("UPDATE profiles SET expires_at = ? WHERE profile_id = ?", (now + self.ttl, profile_id))
+        conn.commit()
+        return np.frombuffer(row[0], dtype='<i4').astype(np.int32), np.frombuffer(row[1], dtype='<f8').copy()
+
+    def put(self, profile_id, rows, sums):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO profiles (profile_id, rows, sums, expires_at) VALUES (?, ?, ?, ?)",
+            (profile_id, np.asarray(rows, dtype='<i4').tobytes(), np.asarray(sums, dtype='<f8').tobytes(),
+             now + self.ttl)
+        )
+        conn.execute("DELETE FROM profiles WHERE expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM profiles WHERE profile_id IN ("
+            "SELECT profile_id FROM profiles ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        conn.commit()
+
+    def delete(self, profile_id):
+        conn = self._connect()
+        conn.execute("DELETE FROM profiles WHERE profile_id = ?", (profile_id,))
+        conn.commit()
+
+    def stats(self):
+        entries, = self._connect().execute("SELECT COUNT(*) FROM profiles").fetchone()
+        return {'backend': 'sqlite', 'path': self.path, 'entries': entries}
+
+
+def create_profile_store():
+    """Build the profile store configured through environment variables."""
+    if os.getenv("PROFILE_STORE_BACKEND", "memory").lower() == "sqlite":
+        return SQLiteProfileStore(os.getenv("PROFILE_STORE_PATH", "profiles.sqlite3"))
+    return ProfileStore()
+
+
+PROFILE_STORE = create_profile_store()
+register_stats('profiles', PROFILE_STORE.stats, gauges=('entries',))
@@ -0,0 +1,225 @@
+# review_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReviewCache:
+    """In-memory cache of analyzed reviews keyed by place_id.
+
+    Entries expire after `ttl` seconds and the least recently used entries
+    are evicted once either `max_entries` or `max_bytes` is exceeded.
+    """
+
+    def __init__(self, ttl=3600, max_entries=2000, max_bytes=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # place_id -> (expires_at, size, reviews)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, place_id):
+        with self._lock:
+            entry = self._entries.get(place_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.time():
+                self._remove(place_id)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(place_id)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, place_id, reviews):
+        size = len(json.dumps(reviews))
+        with self._lock:
+            if place_id in self._entries:
+                self._remove(place_id)
+            self._entries[place_id] = (time.time() + self.ttl, size, reviews)
+            self._bytes += size
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / (self.hits + self.misses) if self.hits + self.misses else 0
+            }
+
+    def _remove(self, place_id):
+        _, size, _ = self._entries.pop(place_id)
+        self._bytes -= size
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+
+class SQLiteReviewCache:
+    """On-disk review cache shared by every worker that opens the same file.
+
+    Same TTL and LRU semantics as ReviewCache; recency is tracked with an
+    `accessed_at` column. A hit only writes it back once it is more than
+    `touch_interval` seconds old, so hot entries do not cost a write per
+    read and LRU order is kept to that resolution. Hit/miss counters are
+    per process.
+    """
+
+    def __init__(self, path, ttl=3600, max_entries=20000, max_bytes=None, touch_interval=60):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                place_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS reviews_accessed_at ON reviews (accessed_at)")
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, place_id):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT payload, expires_at, accessed_at FROM reviews WHERE place_id = ?", (place_id,)
+        ).fetchone()
+        now = time.time()
+        if row is None:
+            self._count('misses')
+            return None
+        if row[1] < now:
+            conn.execute("DELETE FROM reviews WHERE place_id = ?", (place_id,))
+            conn.commit()
+            self._count('expirations')
+            self._count('misses')
+            return None
+        if now - row[2] > self.touch_interval:
+            conn.execute("UPDATE reviews SET accessed_at = ? WHERE place_id = ?", (now, place_id))
+            conn.commit()
+        self._count('hits')
+        return json.loads(row[0])
+
+    def set(self, place_id, reviews):
+        payload = json.dumps(reviews)
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO reviews (place_id, payload, size, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (place_id, payload, len(payload), now + self.ttl, now)
+        )
+        self._evict(conn, now)
+        conn.commit()
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM reviews")
+        conn.commit()
+
+    def stats(self):
+        entries, total_bytes = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM reviews"
+        ).fetchone()
+        with self._lock:
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'entries': entries,
+                'bytes': total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / (self.hits + self.misses) if self.hits + self.misses else 0
+            }
+
+    def _evict(self, conn, now):
+        expired = conn.execute("DELETE FROM reviews WHERE expires_at < ?", (now,)).rowcount
+        with self._lock:
+            self.expirations += max(expired, 0)
+
+        evicted = conn.execute(
+            "DELETE FROM reviews WHERE place_id IN ("
+            "SELECT place_id FROM reviews ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        ).rowcount
+        if self.max_bytes is not None:
+            # Keep the most recently used entries whose running size fits
+            evicted += conn.execute(
+                "DELETE FROM reviews WHERE place_id IN (SELECT place_id FROM ("
+                "SELECT place_id, SUM(size) OVER (ORDER BY accessed_at DESC, place_id) AS kept FROM reviews"
+                ") WHERE kept > ?)",
+                (self.max_bytes,)
+            ).rowcount
+        with self._lock:
+            self.evictions += max(evicted, 0)
+
+
+def create_review_cache():
+    """Build the review cache configured through environment variables."""
+    ttl = float(os.getenv("REVIEW_CACHE_TTL", 3600))
+    max_entries = int(os.getenv("REVIEW_CACHE_MAX_ENTRIES", 2000))
+    max_bytes = os.getenv("REVIEW_CACHE_MAX_BYTES")
+    max_bytes = int(max_bytes) if max_bytes else None
+    touch_interval = float(os.getenv("REVIEW_CACHE_TOUCH_INTERVAL", 60))
+
+    if os.getenv("REVIEW_CACHE_BACKEND", "memory").lower() == "sqlite":
+        path = os.getenv("REVIEW_CACHE_PATH", "review_cache.sqlite3")
+        return SQLiteReviewCache(path, ttl=ttl, max_entries=max_entries, max_bytes=max_bytes,
+                                 touch_interval=touch_interval)
+    return ReviewCache(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+
+
+REVIEW_CACHE = create_review_cache()
@@ -1,30 +1,186 @@
 # reviews.py
 from flask import Blueprint, request, jsonify
-import requests
+import logging
 import os
-from textblob import TextBlob
-from sklearn.feature_extraction.text import CountVectorizer
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import numpy as np
+from app.api.review_cache import REVIEW_CACHE
+from app.api.upstream import google_get
+from app.metrics import register_stats, span
+from app.models.keyword_model import observe_reviews
+from app.models.review_analysis import analyze_review_batches
 
 bp = Blueprint('reviews', __name__, url_prefix='/api/reviews')
+logger = logging.getLogger(__name__)
+
+# Fan-out settings for fetching reviews of many places at once
+REVIEW_FETCH_CONCURRENCY = int(os.getenv("REVIEW_FETCH_CONCURRENCY", 8))
+REVIEW_FETCH_DEADLINE = float(os.getenv("REVIEW_FETCH_DEADLINE", 8.0))
+
+register_stats('review_cache', REVIEW_CACHE.stats,
+               counters=('hits', 'misses', 'evictions', 'expirations'), gauges=('entries', 'bytes'))
+
+def fetch_raw_reviews(place_id):
+    """Fetch the raw Place Details reviews for a place.
+
+    Returns a (possibly empty) list of reviews, or None when Google answered
+    with an error status that should not be cached.
+    """
+    response = google_get('details', review_details_params(place_id))
+    return parse_review_details(response.json())
+
+def review_details_params(place_id):
+    return {
+        'place_id': place_id,
+        'fields': 'reviews',
+        'key': os.getenv("GOOGLE_API_KEY")
+    }
+
+def parse_review_details(data):
+    """Reviews from a Place Details response, or None for an error status"""
+    # Only real answers are cacheable, not quota or auth errors
+    if data.get('status', 'OK') != 'OK':
+        return None
+    if data.get('result') and isinstance(data['result'].get('reviews'), list):
+        return data['result']['reviews']
+    return []
 
 def get_google_reviews(place_id):
     """Function to fetch and analyze reviews for a specific place"""
-    google_api_key = os.getenv("GOOGLE_API_KEY")
-    url = f"https://maps.googleapis.com/maps/api/place/details/json?place_id={place_id}&fields=reviews&key={google_api_key}"
-    
+    cached = REVIEW_CACHE.get(place_id)
+    if cached is not None:
+        return cached
+
     try:
-        response = requests.get(url)
-        data = response.json()
-        
-        if data.get('result') and isinstance(data['result'].get('reviews'), list):
-            reviews = data['result']['reviews']
-            return analyze_reviews(reviews)
-        return []
+        return store_fetched_reviews({place_id: fetch_raw_reviews(place_id)})[place_id]
     except Exception as e:
-        print(f"Error fetching reviews: {str(e)}")
+        logger.warning("Error fetching reviews: %s", e)
         return []
 
+def fetch_reviews_concurrently(place_ids, max_workers=None, deadline=None):
+    """Fetch reviews for many places in parallel with a bounded thread pool.
+
+    Returns a dict of place_id -> analyzed reviews for every place that
+    finished before the deadline (in seconds). Places that are still in
+    flight when the deadline passes are left out, so callers get partial
+    results instead of waiting on the slowest place. Cached places skip the
+    fetch, and everything fetched is analyzed together in one batch.
+    """
+    place_ids = list(dict.fromkeys(pid for pid in place_ids if pid))
+    if not place_ids:
+        return {}
+
+    results, missing = split_cached_reviews(place_ids)
+    if not missing:
+        return results
+
+    fetched = dict(iter_raw_reviews(missing, max_workers, deadline))
+    results.update(store_fetched_reviews(fetched))
+    return results
+
+def iter_raw_reviews(place_ids, max_workers=None, deadline=None):
+    """Fetch raw reviews on a bounded thread pool, yielding (place_id, reviews) as each place completes.
+
+    Stops at the deadline; places still in flight then are skipped.
+    """
+    max_workers, deadline = fan_out_limits(max_workers, deadline, len(place_ids))
+    expires_at = time.monotonic() + deadline
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reviews')
+    try:
+        pending = {executor.submit(fetch_raw_reviews, pid): pid for pid in place_ids}
+        while pending:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                place_id = pending.pop(future)
+                try:
+                    reviews = future.result()
+                except Exception as e:
+                    logger.warning("Error fetching reviews for %s: %s", place_id, e)
+                    continue
+                yield place_id, reviews
+
+        if pending:
+            logger.info("Review fetch deadline of %ss hit, skipping %d places", deadline, len(pending))
+    finally:
+        # Don't block the request on stragglers; queued fetches are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def iter_reviews_concurrently(place_ids, max_workers=None, deadline=None):
+    """Streaming fetch_reviews_concurrently: yields (place_id, analyzed reviews) as soon as each is ready.
+
+    Cached places come first; each fetched place is analyzed on its own so
+    it can be handed out without waiting for the rest.
+    """
+    place_ids = list(dict.fromkeys(pid for pid in place_ids if pid))
+    cached, missing = split_cached_reviews(place_ids)
+    yield from cached.items()
+    if missing:
+        for place_id, reviews in iter_raw_reviews(missing, max_workers, deadline):
+            yield place_id, store_fetched_reviews({place_id: reviews})[place_id]
+
+def split_cached_reviews(place_ids):
+    """Split place_ids into ({place_id: cached reviews}, [place_ids to fetch])"""
+    results = {}
+    missing = []
+    for place_id in place_ids:
+        cached = REVIEW_CACHE.get(place_id)
+        if cached is not None:
+            results[place_id] = cached
+        else:
+            missing.append(place_id)
+    return results, missing
+
+def fan_out_limits(max_workers, deadline, pending):
+    """Effective (concurrency, deadline) of a review fan-out for `pending` places"""
+    # Callers may lower the concurrency limit and deadline but never raise them above the configured caps
+    max_workers = int(max_workers) if max_workers else REVIEW_FETCH_CONCURRENCY
+    max_workers = max(1, min(max_workers, REVIEW_FETCH_CONCURRENCY, pending))
+    deadline = REVIEW_FETCH_DEADLINE if deadline is None else min(float(deadline), REVIEW_FETCH_DEADLINE)
+    return max_workers, deadline
+
+def parse_fan_out_options(data):
+    """Validated `max_concurrency` and `deadline` of a request, clamped to the configured caps.
+
+    Returns ({'max_concurrency': ..., 'deadline': ...}, None), with None for
+    options the request leaves out, or (None, (error_body, status)).
+    """
+    max_workers, deadline = data.get('max_concurrency'), data.get('deadline')
+    try:
+        if max_workers is not None:
+            if isinstance(max_workers, bool) or float(max_workers) != int(max_workers):
+                raise ValueError("max_concurrency must be an integer")
+            max_workers = int(max_workers)
+            if max_workers < 1:
+                raise ValueError("max_concurrency must be at least 1")
+            max_workers = min(max_workers, REVIEW_FETCH_CONCURRENCY)
+        if deadline is not None:
+            if isinstance(deadline, bool):
+                raise ValueError("deadline must be a number of seconds")
+            deadline = float(deadline)
+            if not deadline > 0:
+                raise ValueError("deadline must be a positive number of seconds")
+            deadline = min(deadline, REVIEW_FETCH_DEADLINE)
+    except (TypeError, ValueError, OverflowError) as e:
+        return None, ({"status": "error", "error": f"Invalid parameter format: {e}"}, 400)
+    return {'max_concurrency': max_workers, 'deadline': deadline}, None
+
+def store_fetched_reviews(fetched):
+    """Analyze raw reviews of many places in one batch and cache the real answers"""
+    results = {}
+    with span('review_analysis'):
+        analyzed = analyze_review_batches([reviews or [] for reviews in fetched.values()])
+    for (place_id, reviews), place_reviews in zip(fetched.items(), analyzed):
+        results[place_id] = place_reviews
+        if reviews is not None:
+            REVIEW_CACHE.set(place_id, place_reviews)
+            observe_reviews(reviews)
+    return results
+
 @bp.route('/get-reviews', methods=['GET'])
 def get_reviews_endpoint():
     """Endpoint to get reviews for a place"""
@@ -35,56 +191,14 @@ def get_reviews_endpoint():
     reviews = get_google_reviews(place_id)
     return jsonify(reviews)
 
+@bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Endpoint exposing review cache hit/miss counters"""
+    return jsonify(REVIEW_CACHE.stats())
+
 def analyze_reviews(reviews):
     """Analyze reviews for keywords and sentiment"""
-    analyzed_reviews = []
-    for review in reviews:
-        try:
-            text = str(review.get('text', ''))
-            if not text:
-                continue
-
-            # Sentiment Analysis
-            blob = TextBlob(text)
-            sentiment = blob.sentiment.polarity
-
-            # Keyword Extraction
-            vectorizer = CountVectorizer(
-                stop_words='english',
-                max_features=5,
-                min_df=1,
-                binary=True
-            )
-            
-            text_for_vectorizer = [text.lower()]  # Pass as a list of one string
-            try:
-                keyword_matrix = vectorizer.fit_transform(text_for_vectorizer)
-                feature_names = vectorizer.get_feature_names_out()
-                keyword_scores = np.asarray(keyword_matrix.sum(axis=0)).ravel()
-                keywords = [feature_names[i] for i in range(len(feature_names)) 
-                          if keyword_scores[i] > 0]
-            except Exception as e:
-                print(f"Error in keyword extraction: {str(e)}")
-                keywords = []
-
-            # Format keywords as a comma-separated string
-            keywords_string = ", ".join(keywords)
-
-            analyzed_review = {
-                'text': text,
-                'rating': float(review.get('rating', 0)) if review.get('rating') is not None else 0,
-                'sentiment': float(sentiment),
-                'keywords': keywords_string,  # Updated to comma-separated string
-                'time': review.get('time'),
-                'author_name': review.get('author_name', 'Anonymous')
-            }
-            analyzed_reviews.append(analyzed_review)
-            
-        except Exception as e:
-            print(f"Error analyzing review: {str(e)}")
-            continue
-
-    return analyzed_reviews if analyzed_reviews else []
+    return analyze_review_batches([reviews])[0]
 
 
 def calculate_review_metrics(reviews):
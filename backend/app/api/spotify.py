@@ -1,59 +1,158 @@
-from flask import Blueprint, jsonify, request, session
-import pandas as pd
-import os
-import random
+from flask import Blueprint, Response, jsonify, request, session, stream_with_context
+from functools import lru_cache
+import hashlib
+import json
+import logging
+from types import SimpleNamespace
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
+from app.api.profile_store import PROFILE_STORE, new_profile_id, preference_vector, track_preference_matrix
+from app.api.track_store import load_track_store, SPOTIFY_CSV_PATH, TRACK_FIELDS
+from app.api.track_search import load_search_index
+from app.startup import LazyResource
 
 bp = Blueprint('spotify', __name__, url_prefix='/api/spotify')
+logger = logging.getLogger(__name__)
 
-# Load the Spotify dataset with a different encoding
-SPOTIFY_DATA = pd.read_csv('C:/Users/laima/fall2024/cs506/finalproject/vibescout/spotify-2023.csv', encoding='latin1')
 
-# Initialize scaler for feature normalization
-scaler = MinMaxScaler()
+def load_tracks():
+    """Columnar track store and its search index (memory-mapped from their binary
+    cache when fresh), and the preference row of every track, from the
+    two-decimal values the API serves."""
+    store = load_track_store(SPOTIFY_CSV_PATH)
+    return SimpleNamespace(
+        store=store,
+        search=load_search_index(store, SPOTIFY_CSV_PATH),
+        preferences=track_preference_matrix(
+            *(np.round(store.feature(name).astype(np.float64), 2) for name in ('valence', 'energy', 'acousticness'))
+        )
+    )
+
+
+# Loaded on first use, or by the startup warm-up
+TRACKS = LazyResource('tracks', load_tracks)
+
+# Default and maximum number of tracks returned by /available-tracks
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 500
+
+# Rows encoded per chunk of the NDJSON stream and of uncached /data pages
+STREAM_CHUNK_SIZE = 1000
+# Page sizes of /data that are cached pre-encoded (with every field)
+DATA_CACHED_LIMITS = (50, 100, 500, 1000)
+
+# Largest profile /profile/tracks can grow, the size of a random profile
+PROFILE_MAX_TRACKS = 20
+
+def parse_data_params(args):
+    """Validate offset/limit/fields query parameters; raises ValueError on bad input."""
+    offset = int(args.get('offset', 0))
+    limit = args.get('limit')
+    limit = int(limit) if limit not in (None, '') else None
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset and limit must be non-negative")
+
+    fields = args.get('fields')
+    if fields:
+        fields = tuple(field.strip() for field in fields.split(',') if field.strip())
+        unknown = [field for field in fields if field not in TRACK_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    else:
+        fields = tuple(TRACK_FIELDS)
+    return offset, limit, fields
+
+def encode_data_chunks(offset, limit, fields):
+    """JSON body of one page of /data, encoded STREAM_CHUNK_SIZE rows at a time."""
+    store = TRACKS.get().store
+    end = len(store) if limit is None else min(len(store), offset + limit)
+    yield b'{"status":"success","tracks":['
+    for start in range(offset, end, STREAM_CHUNK_SIZE):
+        rows = store.ids[start:min(start + STREAM_CHUNK_SIZE, end)]
+        chunk = ','.join(json.dumps(track, separators=(',', ':')) for track in store.records(rows, fields))
+        yield (chunk if start == offset else ',' + chunk).encode('utf-8')
+    yield f'],"total":{len(store)},"offset":{offset},"limit":{json.dumps(limit)}}}'.encode('utf-8')
+
+def is_cached_page(limit, fields):
+    """Only pages of a standard size with every field are cached, so the cache holds
+    at most 256 pages of DATA_CACHED_LIMITS rows whatever clients ask for."""
+    return limit in DATA_CACHED_LIMITS and fields == tuple(TRACK_FIELDS)
+
+def parse_search_limit(args):
+    """`limit` of /available-tracks, at most SEARCH_MAX_LIMIT; raises ValueError on bad input."""
+    limit = args.get('limit')
+    if limit in (None, ''):
+        return SEARCH_DEFAULT_LIMIT
+    limit = int(limit)
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, SEARCH_MAX_LIMIT)
+
+@lru_cache(maxsize=256)
+def encode_data_page(offset, limit, fields):
+    """Pre-encoded JSON body and ETag for one standard page of /data; the dataset never changes at runtime."""
+    body = b''.join(encode_data_chunks(offset, limit, fields))
+    return body, hashlib.blake2b(body, digest_size=16).hexdigest()
 
 @bp.route('/data', methods=['GET'])
 def get_spotify_data():
     try:
-        # Convert DataFrame to list of dictionaries with proper data types
-        tracks = []
-        for _, row in SPOTIFY_DATA.iterrows():
-            track = {
-                'track_name': str(row['track_name']),
-                'artist': str(row['artist(s)_name']),
-                'valence': float(row['valence_%']) / 100,
-                'energy': float(row['energy_%']) / 100,
-                'danceability': float(row['danceability_%']) / 100,
-                'acousticness': float(row['acousticness_%']) / 100,
-                'instrumentalness': float(row['instrumentalness_%']) / 100,
-                'liveness': float(row['liveness_%']) / 100,
-                'speechiness': float(row['speechiness_%']) / 100,
-                'streams': int(row['streams']) if pd.notnull(row['streams']) else 0,
-                'popularity': int(row['in_spotify_playlists']) if pd.notnull(row['in_spotify_playlists']) else 0
-            }
-            tracks.append(track)
-        
+        offset, limit, fields = parse_data_params(request.args)
+    except ValueError as e:
         return jsonify({
-            'status': 'success',
-            'tracks': tracks
-        })
+            'status': 'error',
+            'message': 'Invalid query parameters',
+            'error': str(e)
+        }), 400
+
+    try:
+        if not is_cached_page(limit, fields):
+            # Other pages may be anything up to the whole catalog: encode as they are sent
+            TRACKS.get()
+            return Response(stream_with_context(encode_data_chunks(offset, limit, fields)),
+                            mimetype='application/json')
+        body, etag = encode_data_page(offset, limit, fields)
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True  # clients revalidate and get a 304
+        return response.make_conditional(request)
     except Exception as e:
-        print(f"Error reading Spotify data: {str(e)}")
+        logger.exception("Error reading Spotify data: %s", e)
         return jsonify({
             'status': 'error',
             'message': 'Failed to load Spotify data',
             'error': str(e)
         }), 500
 
+@bp.route('/data/stream', methods=['GET'])
+def stream_spotify_data():
+    """Full dump as NDJSON, one track per line, encoded chunk by chunk"""
+    try:
+        offset, limit, fields = parse_data_params(request.args)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': 'Invalid query parameters',
+            'error': str(e)
+        }), 400
+
+    store = TRACKS.get().store
+    end = len(store) if limit is None else min(len(store), offset + limit)
+
+    def generate():
+        for start in range(offset, end, STREAM_CHUNK_SIZE):
+            rows = store.ids[start:min(start + STREAM_CHUNK_SIZE, end)]
+            lines = [json.dumps(track, separators=(',', ':')) for track in store.records(rows, fields)]
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @bp.route('/random-profile', methods=['GET'])
 def get_random_profile():
     try:
         # Randomly select 20 tracks from the dataset
-        random_tracks = SPOTIFY_DATA.sample(n=20)
-        track_data = create_track_data(random_tracks)
-        session['user_profile'] = track_data
-        return jsonify(track_data)
+        random_tracks = TRACKS.get().store.sample(20)
+        save_profile(random_tracks)
+        return jsonify(create_track_data(random_tracks))
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -71,10 +170,9 @@ def create_custom_profile():
                 'message': 'Please select between 1 and 10 tracks'
             }), 400
         
-        selected_data = SPOTIFY_DATA[SPOTIFY_DATA['track_name'].isin(selected_tracks)]
-        track_data = create_track_data(selected_data)
-        session['user_profile'] = track_data
-        return jsonify(track_data)
+        selected_rows = TRACKS.get().store.lookup(selected_tracks)
+        save_profile(selected_rows)
+        return jsonify(create_track_data(selected_rows))
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -85,17 +183,25 @@ def create_custom_profile():
 @bp.route('/available-tracks', methods=['GET'])
 def get_available_tracks():
     try:
-        search_query = request.args.get('query', '').lower()
-        
-        if search_query:
-            filtered_data = SPOTIFY_DATA[
-                SPOTIFY_DATA['track_name'].str.lower().str.contains(search_query) |
-                SPOTIFY_DATA['artist(s)_name'].str.lower().str.contains(search_query)
-            ]
-        else:
-            filtered_data = SPOTIFY_DATA
+        limit = parse_search_limit(request.args)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': 'Invalid query parameters',
+            'error': str(e)
+        }), 400
+
+    try:
+        search_query = request.args.get('query', '')
+
+        # Top matches by match quality, then popularity; an empty query returns the most popular tracks
+        catalog = TRACKS.get()
+        rows = catalog.search.search(search_query, k=limit)
         
-        tracks = filtered_data[['track_name', 'artist(s)_name']].to_dict('records')
+        tracks = [
+            {'track_name': name, 'artist(s)_name': artist}
+            for name, artist in zip(catalog.store.track_names[rows].tolist(), catalog.store.artists[rows].tolist())
+        ]
         return jsonify({
             'status': 'success',
             'tracks': tracks
@@ -110,15 +216,25 @@ def get_available_tracks():
 @bp.route('/profile', methods=['GET'])
 def get_profile():
     try:
-        profile = session.get('user_profile')
-        if not profile:
+        rows = load_profile_rows()
+        profile_id = session.get('profile_id')
+        if rows is None and profile_id and PROFILE_STORE.get(profile_id) is None:
+            # Expired, or kept by another worker's in-memory store: never overwrite it with
+            # a random profile; the next request starts a new one under a new id
+            session.pop('profile_id', None)
+            return jsonify({
+                'status': 'error',
+                'message': 'Profile not found or expired, request it again to start a new one'
+            }), 404
+        if rows is None:
             # Generate random profile if none exists
-            random_tracks = SPOTIFY_DATA.sample(n=20)
-            profile = create_track_data(random_tracks)
-            session['user_profile'] = profile
+            rows = TRACKS.get().store.sample(20)
+            save_profile(rows)
         return jsonify({
             'status': 'success',
-            'profile': profile
+            'profile': create_track_data(rows),
+            'profile_id': session['profile_id'],
+            'preferences': preference_vector(rows, TRACKS.get().preferences[rows].sum(axis=0))
         })
     except Exception as e:
         return jsonify({
@@ -127,24 +243,105 @@ def get_profile():
             'error': str(e)
         }), 500
 
-def create_track_data(tracks_df):
-    track_data = []
-    for _, track in tracks_df.iterrows():
-        try:
-            track_data.append({
-                'track_name': str(track['track_name']),
-                'artist': str(track['artist(s)_name']),
-                'genre': 'Unknown',
-                'valence': float(track['valence_%']) / 100,
-                'energy': float(track['energy_%']) / 100,
-                'acousticness': float(track['acousticness_%']) / 100,
-                'danceability': float(track['danceability_%']) / 100,
-                'instrumentalness': float(track['instrumentalness_%']) / 100,
-                'liveness': float(track['liveness_%']) / 100,
-                'speechiness': float(track['speechiness_%']) / 100
-            })
-        except Exception as e:
-            print(f"Error processing track {track['track_name']}: {str(e)}")
-            continue
-            
-    return track_data
\ No newline at end of file
+@bp.route('/preferences', methods=['GET'])
+def get_preferences():
+    """The session profile's preference vector, ready to send as user_preferences"""
+    profile_id = session.get('profile_id')
+    profile = PROFILE_STORE.get(profile_id) if profile_id else None
+    if profile is None:
+        return jsonify({'status': 'error', 'message': 'No profile in this session'}), 404
+    return jsonify({
+        'status': 'success',
+        'profile_id': profile_id,
+        'preferences': preference_vector(*profile)
+    })
+
+@bp.route('/profile/tracks', methods=['POST'])
+def update_profile_tracks():
+    """Add and/or remove tracks (by name) from the session profile, updating its preferences incrementally"""
+    try:
+        data = request.get_json()
+        add, remove = data.get('add', []), data.get('remove', [])
+        if not isinstance(add, list) or not isinstance(remove, list):
+            raise ValueError("add and remove must be lists of track names")
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': 'Invalid request body', 'error': str(e)}), 400
+
+    profile_id = session.get('profile_id')
+    profile = PROFILE_STORE.get(profile_id) if profile_id else None
+    if profile is None:
+        return jsonify({'status': 'error', 'message': 'No profile in this session'}), 404
+
+    rows, sums = update_profile(*profile, add, remove)
+    if len(rows) > PROFILE_MAX_TRACKS:
+        return jsonify({
+            'status': 'error',
+            'message': f'A profile can hold at most {PROFILE_MAX_TRACKS} tracks'
+        }), 400
+    PROFILE_STORE.put(profile_id, rows, sums)
+    return jsonify({
+        'status': 'success',
+        'profile': create_track_data(rows),
+        'profile_id': profile_id,
+        'preferences': preference_vector(rows, sums)
+    })
+
+def update_profile(rows, sums, add, remove):
+    """Profile rows and preference sums after adding and removing tracks by name.
+
+    Only the rows that change are touched: their preference rows are added
+    to or subtracted from the running sums.
+    """
+    tracks = TRACKS.get()
+    removed = np.isin(rows, tracks.store.lookup(remove))
+    added = np.setdiff1d(tracks.store.lookup(add), rows[~removed])
+    sums = sums - tracks.preferences[rows[removed]].sum(axis=0) + tracks.preferences[added].sum(axis=0)
+    rows = np.concatenate([rows[~removed], added])
+    if not len(rows):
+        sums = np.zeros(tracks.preferences.shape[1])
+    return rows, sums
+
+def save_profile(rows):
+    """Store the profile server-side; the session cookie only keeps its id"""
+    profile_id = session.get('profile_id') or new_profile_id()
+    PROFILE_STORE.put(profile_id, rows, TRACKS.get().preferences[rows].sum(axis=0))
+    session['profile_id'] = profile_id
+    # Sessions from before profiles moved server-side carried the whole track list
+    session.pop('user_profile', None)
+
+def load_profile_rows():
+    """Track store rows of the session's profile, or None if it has none"""
+    legacy = session.get('user_profile')
+    if legacy:
+        rows = TRACKS.get().store.lookup([track.get('track_name') for track in legacy])
+        save_profile(rows)
+        return rows
+
+    profile_id = session.get('profile_id')
+    profile = PROFILE_STORE.get(profile_id) if profile_id else None
+    if profile is None:
+        return None
+    rows = profile[0]
+    # Rows of a profile built against an older copy of the dataset
+    if len(rows) and rows.max() >= len(TRACKS.get().store):
+        return None
+    return rows
+
+def create_track_data(rows):
+    """Build profile track dicts for the given track store rows"""
+    columns = TRACKS.get().store.columns(rows)
+    return [
+        {
+            'track_name': columns['track_name'][i],
+            'artist': columns['artist'][i],
+            'genre': 'Unknown',
+            'valence': columns['valence'][i],
+            'energy': columns['energy'][i],
+            'acousticness': columns['acousticness'][i],
+            'danceability': columns['danceability'][i],
+            'instrumentalness': columns['instrumentalness'][i],
+            'liveness': columns['liveness'][i],
+            'speechiness': columns['speechiness'][i]
+        }
+        for i in range(len(rows))
+    ]
@@ -0,0 +1,216 @@
+# track_search.py
+import json
+import logging
+import os
+import re
+import unicodedata
+import numpy as np
+from app.api.track_store import SPOTIFY_CSV_PATH, TRACK_STORE_MMAP, default_cache_dir, replace_file
+
+logger = logging.getLogger(__name__)
+
+# Prefix ranges with more postings than this are served from a precomputed
+# popularity-ordered candidate list instead of being scanned per query
+MAX_SCAN = 5000
+HEAVY_CANDIDATES = 2000
+
+# Match quality per posting: exact token beats prefix, track name beats artist
+QUALITY_PREFIX_ARTIST = 1
+QUALITY_PREFIX_TRACK = 2
+QUALITY_EXACT_BONUS = 2
+
+# Arrays an index is made of, as saved next to the track store cache
+INDEX_ARRAYS = ['rows', 'vocabulary', 'postings', 'offsets', 'forward_tokens', 'forward_fields', 'forward_offsets']
+SEARCH_CACHE_VERSION = 1
+
+_NON_WORD = re.compile(r'[\W_]+')
+_MAX_CHAR = chr(0x10FFFF)
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse everything but letters/digits to spaces."""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(' ', text).strip()
+
+
+class TrackSearchIndex:
+    """Prefix index over track and artist name tokens.
+
+    Tracks are renumbered by popularity (streams, then playlist count) so a
+    smaller internal id always means a more popular track. Postings are
+    stored grouped by token in sorted vocabulary order, which turns every
+    prefix lookup into one contiguous slice of the postings arrays.
+    """
+
+    def __init__(self, track_names, artists, streams, popularity):
+        # Internal id -> original row, most popular first
+        self.rows = np.lexsort((-np.asarray(popularity), -np.asarray(streams)))
+
+        tokens, ids, fields = [], [], []
+        for internal_id, row in enumerate(self.rows.tolist()):
+            for field, text in ((0, track_names[row]), (1, artists[row])):
+                for token in set(normalize(text).split()):
+                    tokens.append(token)
+                    ids.append(internal_id)
+                    fields.append(field)
+
+        self.vocabulary, inverse = np.unique(np.array(tokens, dtype=str), return_inverse=True)
+        inverse = inverse.astype(np.int32)
+        ids = np.asarray(ids, dtype=np.int32)
+        fields = np.asarray(fields, dtype=np.int8)
+
+        # Inverted index: token -> ids, grouped by token and sorted by id
+        order = np.lexsort((ids, inverse))
+        self.postings = ids[order]
+        counts = np.bincount(inverse, minlength=len(self.vocabulary))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        # Forward index: id -> token ids and fields, used to check extra query terms
+        order = np.lexsort((inverse, ids))
+        self.forward_tokens = inverse[order]
+        self.forward_fields = fields[order]
+        counts = np.bincount(ids, minlength=len(self.rows))
+        self.forward_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._warm()
+
+    def _warm(self):
+        self._heavy = {}
+        # Warm the short prefixes every user types first
+        for prefix in {token[:n] for token in self.vocabulary.tolist() for n in (1, 2)}:
+            lo, hi = self._range(prefix)
+            if self.offsets[hi] - self.offsets[lo] > MAX_SCAN:
+                self._heavy_candidates(lo, hi)
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store.track_names, store.artists, store.streams, store.popularity)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Index over prebuilt INDEX_ARRAYS, e.g. memory-mapped from the cache."""
+        index = cls.__new__(cls)
+        for name in INDEX_ARRAYS:
+            setattr(index, name, arrays[name])
+        index._warm()
+        return index
+
+    def _range(self, term):
+        """Vocabulary range [lo, hi) of tokens starting with `term`."""
+        lo = int(np.searchsorted(self.vocabulary, term, 'left'))
+        hi = int(np.searchsorted(self.vocabulary, term + _MAX_CHAR, 'left'))
+        return lo, hi
+
+    def _has_exact(self, term, lo):
+        return lo < len(self.vocabulary) and self.vocabulary[lo] == term
+
+    def _heavy_candidates(self, lo, hi):
+        """Most popular ids in a prefix range too large to scan per query,
+        plus the most popular ids holding the range's first token (the exact
+        match, if the query term is a whole token)."""
+        candidates = self._heavy.get((lo, hi))
+        if candidates is None:
+            ids = self.postings[self.offsets[lo]:self.offsets[hi]]
+            # Ids may repeat across tokens, so keep some slack before deduplicating
+            kth = min(len(ids) - 1, 4 * HEAVY_CANDIDATES)
+            popular = np.unique(np.partition(ids, kth)[:kth + 1])[:HEAVY_CANDIDATES]
+            # Exact-token postings are id-sorted, so their most popular ids are a plain slice
+            exact = self.postings[self.offsets[lo]:self.offsets[lo + 1]][:HEAVY_CANDIDATES]
+            candidates = np.union1d(popular, exact)
+            self._heavy[(lo, hi)] = candidates
+        return candidates
+
+    def _match_quality(self, term, lo, hi, candidates):
+        """Best match quality of `term` for each candidate (0 = no match), via the forward index."""
+        starts = self.forward_offsets[candidates]
+        lengths = self.forward_offsets[candidates + 1] - starts
+        flat = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - starts, lengths)
+
+        tokens = self.forward_tokens[flat]
+        quality = np.where(self.forward_fields[flat] == 0, QUALITY_PREFIX_TRACK, QUALITY_PREFIX_ARTIST)
+        if self._has_exact(term, lo):
+            quality = quality + np.where(tokens == lo, QUALITY_EXACT_BONUS, 0)
+        quality = np.where((tokens >= lo) & (tokens < hi), quality, 0).astype(np.int32)
+
+        if not len(quality):
+            return np.zeros(len(candidates), dtype=np.int32)
+        # Rows of the forward index are contiguous per candidate, so reduce by segment
+        segment_starts = np.minimum(np.cumsum(lengths) - lengths, len(quality) - 1)
+        best = np.maximum.reduceat(quality, segment_starts)
+        best[lengths == 0] = 0
+        return best
+
+    def _term_matches(self, term, lo, hi):
+        """Candidate ids (sorted) and their match quality for one query term."""
+        start, end = self.offsets[lo], self.offsets[hi]
+        if end - start > MAX_SCAN:
+            ids = self._heavy_candidates(lo, hi)
+        else:
+            ids = np.unique(self.postings[start:end])
+        return ids, self._match_quality(term, lo, hi, ids)
+
+    def search(self, query, k=50):
+        """Original row ids of the top-k tracks matching every term of `query` as a prefix."""
+        terms = list(dict.fromkeys(normalize(query).split()))
+        if not terms:
+            return self.rows[:k]
+
+        # Drive from the most selective term, then filter by the others
+        ranges = sorted(
+            ((term,) + self._range(term) for term in terms),
+            key=lambda r: self.offsets[r[2]] - self.offsets[r[1]]
+        )
+        candidates, score = self._term_matches(*ranges[0])
+        for term, lo, hi in ranges[1:]:
+            if not len(candidates):
+                break
+            quality = self._match_quality(term, lo, hi, candidates)
+            keep = quality > 0
+            candidates, score = candidates[keep], score[keep] + quality[keep]
+
+        if not len(candidates):
+            return self.rows[:0]
+
+        # Best quality first, ties broken by popularity (smaller internal id)
+        key = -score.astype(np.int64) * (len(self.rows) + 1) + candidates
+        if len(key) > k:
+            top = np.argpartition(key, k - 1)[:k]
+            top = top[np.argsort(key[top])]
+        else:
+            top = np.argsort(key)
+        return self.rows[candidates[top]]
+
+
+def read_search_index(search_dir, meta, mmap=TRACK_STORE_MMAP):
+    """Load a cached index, or return None if it is missing or was built from another dataset."""
+    try:
+        with open(os.path.join(search_dir, 'meta.json')) as f:
+            if json.load(f) != meta:
+                return None
+        return TrackSearchIndex.from_arrays({
+            name: np.load(os.path.join(search_dir, f'{name}.npy'), mmap_mode='r' if mmap else None, allow_pickle=False)
+            for name in INDEX_ARRAYS
+        })
+    except (OSError, ValueError):
+        return None
+
+
+def load_search_index(store, csv_path=SPOTIFY_CSV_PATH, cache_dir=None, mmap=TRACK_STORE_MMAP):
+    """Search index of the track store, cached next to it like the store itself."""
+    search_dir = os.path.join(cache_dir or default_cache_dir(csv_path), 'search')
+    meta = {'version': SEARCH_CACHE_VERSION, 'source_mtime': os.path.getmtime(csv_path), 'tracks': len(store)}
+
+    index = read_search_index(search_dir, meta, mmap)
+    if index is None:
+        index = TrackSearchIndex.from_store(store)
+        try:
+            os.makedirs(search_dir, exist_ok=True)
+            for name in INDEX_ARRAYS:
+                replace_file(os.path.join(search_dir, f'{name}.npy'),
+                             lambda f: np.save(f, np.asarray(getattr(index, name)), allow_pickle=False))
+            replace_file(os.path.join(search_dir, 'meta.json'), lambda f: f.write(json.dumps(meta).encode('utf-8')))
+        except OSError as e:
+            logger.warning("Could not write track search cache: %s", e)
+            return index
+        index = read_search_index(search_dir, meta, mmap) or index
+    return index
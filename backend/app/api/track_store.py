@@ -0,0 +1,166 @@
+# track_store.py
+import json
+import logging
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'spotify-2023.csv'))
+SPOTIFY_CSV_PATH = os.getenv("SPOTIFY_CSV_PATH", DEFAULT_CSV_PATH)
+# Memory-map the cached arrays read-only instead of copying them into every
+# worker; all processes then share one copy in the OS page cache
+TRACK_STORE_MMAP = os.getenv("TRACK_STORE_MMAP", "1") == "1"
+
+# Audio features exposed by the API, in the column order of the feature matrix
+FEATURE_NAMES = ['valence', 'energy', 'danceability', 'acousticness', 'instrumentalness', 'liveness', 'speechiness']
+FEATURE_COLUMNS = [f'{name}_%' for name in FEATURE_NAMES]
+
+# Fields of a track as returned by /api/spotify/data
+TRACK_FIELDS = ['track_name', 'artist'] + FEATURE_NAMES + ['streams', 'popularity']
+
+ARRAY_NAMES = ['features', 'track_names', 'artists', 'streams', 'popularity', 'name_order']
+CACHE_VERSION = 2
+
+
+class TrackStore:
+    """Columnar, precomputed view of the Spotify dataset.
+
+    Audio features are stored normalized to [0, 1] as a float32 matrix with
+    one row per track; row numbers double as track ids. `name_order` sorts
+    the rows by track name (stable), so name lookups are binary searches
+    over the name table itself rather than a per-process dict.
+    """
+
+    def __init__(self, features, track_names, artists, streams, popularity, name_order=None):
+        self.features = features
+        self.track_names = track_names
+        self.artists = artists
+        self.streams = streams
+        self.popularity = popularity
+        self.name_order = np.argsort(track_names, kind='stable') if name_order is None else name_order
+        self.ids = np.arange(len(track_names))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def feature(self, name):
+        return self.features[:, FEATURE_NAMES.index(name)]
+
+    def lookup(self, track_names):
+        """Row ids of every track whose name is in `track_names`, in dataset order."""
+        names = [name for name in set(track_names) if isinstance(name, str)]
+        if not names:
+            return np.zeros(0, dtype=np.int64)
+        lo = np.searchsorted(self.track_names, names, side='left', sorter=self.name_order)
+        hi = np.searchsorted(self.track_names, names, side='right', sorter=self.name_order)
+        rows = [self.name_order[start:end] for start, end in zip(lo.tolist(), hi.tolist())]
+        return np.sort(np.concatenate(rows).astype(np.int64))
+
+    def sample(self, n, rng=None):
+        rng = rng or np.random.default_rng()
+        return rng.choice(len(self), size=min(n, len(self)), replace=False)
+
+    def columns(self, rows=None, fields=None):
+        """Plain-Python columns for the given rows, ready to zip into dicts."""
+        rows = self.ids if rows is None else rows
+        fields = TRACK_FIELDS if fields is None else fields
+        columns = {}
+        wanted = [i for i, name in enumerate(FEATURE_NAMES) if name in fields]
+        if wanted:
+            # Round back to two decimals so values serialize exactly like `percent / 100`
+            features = np.round(self.features[rows][:, wanted].astype(np.float64), 2)
+            for j, i in enumerate(wanted):
+                columns[FEATURE_NAMES[i]] = features[:, j].tolist()
+        if 'track_name' in fields:
+            columns['track_name'] = self.track_names[rows].tolist()
+        if 'artist' in fields:
+            columns['artist'] = self.artists[rows].tolist()
+        if 'streams' in fields:
+            columns['streams'] = self.streams[rows].tolist()
+        if 'popularity' in fields:
+            columns['popularity'] = self.popularity[rows].tolist()
+        return columns
+
+    def records(self, rows=None, fields=None):
+        """Track dicts with the given fields, in field order."""
+        fields = TRACK_FIELDS if fields is None else fields
+        columns = self.columns(rows, fields)
+        return [dict(zip(fields, values)) for values in zip(*(columns[field] for field in fields))]
+
+
+def build_track_store(csv_path):
+    """Parse the CSV and normalize every `_%` column in one vectorized pass."""
+    # Only needed when the binary cache is missing or stale
+    import pandas as pd
+    data = pd.read_csv(csv_path, encoding='latin1')
+    features = (data[FEATURE_COLUMNS].to_numpy(dtype=np.float32) / np.float32(100))
+    return TrackStore(
+        features=np.ascontiguousarray(features),
+        track_names=data['track_name'].astype(str).to_numpy(dtype=str),
+        artists=data['artist(s)_name'].astype(str).to_numpy(dtype=str),
+        # A few rows carry corrupted stream counts; treat them as 0 like missing values
+        streams=pd.to_numeric(data['streams'], errors='coerce').fillna(0).to_numpy(dtype=np.int64),
+        popularity=pd.to_numeric(data['in_spotify_playlists'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+    )
+
+
+def default_cache_dir(csv_path):
+    return os.getenv("TRACK_STORE_CACHE_DIR", os.path.splitext(csv_path)[0] + '.trackstore')
+
+
+def replace_file(path, write):
+    """Write a file next to `path` and rename it into place. Processes that
+    memory-mapped the old file keep a valid mapping of the old contents."""
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as f:
+        write(f)
+    os.replace(temp_path, path)
+
+
+def save_track_store(store, cache_dir, source_mtime):
+    os.makedirs(cache_dir, exist_ok=True)
+    for name in ARRAY_NAMES:
+        replace_file(os.path.join(cache_dir, f'{name}.npy'),
+                     lambda f: np.save(f, np.asarray(getattr(store, name)), allow_pickle=False))
+    # Written last so a half-written cache is never mistaken for a valid one
+    meta = {'version': CACHE_VERSION, 'source_mtime': source_mtime, 'tracks': len(store)}
+    replace_file(os.path.join(cache_dir, 'meta.json'), lambda f: f.write(json.dumps(meta).encode('utf-8')))
+
+
+def read_track_store(cache_dir, source_mtime, mmap=TRACK_STORE_MMAP):
+    """Load a cached store, or return None if it is missing or stale."""
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != CACHE_VERSION or meta.get('source_mtime') != source_mtime:
+            return None
+        arrays = {
+            name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r' if mmap else None, allow_pickle=False)
+            for name in ARRAY_NAMES
+        }
+        return TrackStore(**arrays)
+    except (OSError, ValueError):
+        return None
+
+
+def load_track_store(csv_path=SPOTIFY_CSV_PATH, cache_dir=None, mmap=TRACK_STORE_MMAP):
+    """Load the track store from its binary cache, rebuilding it when the CSV changed.
+
+    With `mmap` the arrays are read-only views of the cache files, so
+    workers that load the same cache share its memory.
+    """
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    source_mtime = os.path.getmtime(csv_path)
+
+    store = read_track_store(cache_dir, source_mtime, mmap)
+    if store is None:
+        store = build_track_store(csv_path)
+        try:
+            save_track_store(store, cache_dir, source_mtime)
+        except OSError as e:
+            logger.warning("Could not write track store cache: %s", e)
+            return store
+        # Reopen the files so even the process that built the cache shares them
+        store = read_track_store(cache_dir, source_mtime, mmap) or store
+    return store
@@ -0,0 +1,242 @@
+# upstream.py
+import os
+import threading
+import time
+import requests
+from flask import Blueprint, jsonify
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.metrics import STAGE_SECONDS, Counter, Histogram, register_stats
+
+bp = Blueprint('upstream', __name__, url_prefix='/api/upstream')
+
+# Base URL for the Places API (overridable so benchmarks can point at a local stub)
+GOOGLE_PLACES_BASE_URL = os.getenv("GOOGLE_PLACES_BASE_URL", "https://maps.googleapis.com/maps/api/place")
+
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", 32))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", 3.05))
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", 10))
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", 3))
+UPSTREAM_BACKOFF = float(os.getenv("UPSTREAM_BACKOFF", 0.2))
+UPSTREAM_BACKOFF_JITTER = float(os.getenv("UPSTREAM_BACKOFF_JITTER", 0.2))
+UPSTREAM_RATE_LIMIT = float(os.getenv("UPSTREAM_RATE_LIMIT", 50))   # requests/second, 0 disables
+UPSTREAM_RATE_BURST = int(os.getenv("UPSTREAM_RATE_BURST", 100))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream call is refused before it is sent."""
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds, then lets a single trial call through."""
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def release(self):
+        """End a call that never got an answer (refused, cancelled, bad request)
+        without counting it, so a half-open breaker can run another trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """Token bucket shared by every upstream call in the process."""
+
+    def __init__(self, rate=UPSTREAM_RATE_LIMIT, burst=UPSTREAM_RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, timeout=None):
+        """Take a token and return how long to wait before using it.
+
+        Tokens may be borrowed ahead of the refill, which queues callers in
+        arrival order. Returns None (and takes nothing) if the wait would
+        exceed `timeout`.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def acquire(self, timeout=None):
+        """Block until a token is available; returns False if that would exceed `timeout`."""
+        wait = self.reserve(timeout)
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+
+def create_session():
+    """Keep-alive session with a connection pool and jittered retries on 429/5xx."""
+    retry = Retry(
+        total=UPSTREAM_RETRIES,
+        connect=UPSTREAM_RETRIES,
+        read=UPSTREAM_RETRIES,
+        status=UPSTREAM_RETRIES,
+        backoff_factor=UPSTREAM_BACKOFF,
+        backoff_jitter=UPSTREAM_BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=UPSTREAM_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+SESSION = create_session()
+CIRCUIT_BREAKER = CircuitBreaker()
+RATE_LIMITER = RateLimiter()
+UPSTREAM_SECONDS = Histogram(
+    'upstream_request_duration_seconds', 'Latency of Google Places API calls, retries included',
+    ('endpoint',), buckets=LATENCY_BUCKETS
+)
+UPSTREAM_CALLS = Counter(
+    'upstream_requests_total', 'Google Places API calls by outcome (ok, error, refused)', ('endpoint', 'outcome')
+)
+
+register_stats('upstream_circuit', lambda: {
+    'open': int(CIRCUIT_BREAKER.state != 'closed'),
+    'consecutive_failures': CIRCUIT_BREAKER.failures
+}, gauges=('open', 'consecutive_failures'))
+
+
+def record_outcome(endpoint, seconds, failed):
+    """Feed one finished upstream call into the metrics and the breaker."""
+    UPSTREAM_SECONDS.observe(seconds, endpoint=endpoint)
+    STAGE_SECONDS.observe(seconds, stage='upstream_fetch')
+    UPSTREAM_CALLS.inc(endpoint=endpoint, outcome='error' if failed else 'ok')
+    if failed:
+        CIRCUIT_BREAKER.record_failure()
+    else:
+        CIRCUIT_BREAKER.record_success()
+
+
+def finish_call(endpoint, start, failed):
+    """Record a call admitted by the breaker; `failed` None releases it uncounted."""
+    if failed is None:
+        CIRCUIT_BREAKER.release()
+    else:
+        record_outcome(endpoint, time.perf_counter() - start, failed)
+
+
+def record_refusal(endpoint):
+    UPSTREAM_CALLS.inc(endpoint=endpoint, outcome='refused')
+
+
+def google_get(endpoint, params):
+    """GET a Places API endpoint (e.g. 'details', 'nearbysearch', 'autocomplete').
+
+    Goes through the shared session, the global rate limiter and the circuit
+    breaker. Raises CircuitOpenError / UpstreamError when the call is refused
+    and lets requests exceptions propagate once retries are exhausted.
+    """
+    # Checked before taking a rate-limit token, so an open circuit costs no waiting
+    if CIRCUIT_BREAKER.state == 'open':
+        record_refusal(endpoint)
+        raise CircuitOpenError("Google Places API circuit is open")
+    if not RATE_LIMITER.acquire(timeout=UPSTREAM_READ_TIMEOUT):
+        record_refusal(endpoint)
+        raise UpstreamError("Upstream rate limit exceeded")
+    if not CIRCUIT_BREAKER.allow():
+        record_refusal(endpoint)
+        raise CircuitOpenError("Google Places API circuit is open")
+
+    url = f"{GOOGLE_PLACES_BASE_URL}/{endpoint}/json"
+    start = time.perf_counter()
+    failed = None   # Stays None if the call ends without an upstream answer or error
+    try:
+        response = SESSION.get(url, params=params, timeout=(UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT))
+        failed = response.status_code in RETRY_STATUSES
+        return response
+    except requests.RequestException:
+        failed = True
+        raise
+    finally:
+        finish_call(endpoint, start, failed)
+
+
+def upstream_stats():
+    latency = {}
+    for (endpoint,), series in UPSTREAM_SECONDS.series().items():
+        latency[endpoint] = {
+            'count': series['count'],
+            'errors': UPSTREAM_CALLS.value(endpoint=endpoint, outcome='error'),
+            'sum_seconds': series['sum'],
+            'buckets': series['buckets']
+        }
+    return {
+        'circuit': CIRCUIT_BREAKER.state,
+        'consecutive_failures': CIRCUIT_BREAKER.failures,
+        'latency': latency
+    }
+
+
+@bp.route('/stats', methods=['GET'])
+def get_upstream_stats():
+    """Endpoint exposing per-endpoint upstream latency histograms and breaker state"""
+    return jsonify(upstream_stats())
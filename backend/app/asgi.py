@@ -0,0 +1,289 @@
+# backend/app/asgi.py
+"""Async serving mode.
+
+The upstream-bound routes (/api/places/nearby, /api/reviews/get-reviews,
+/api/google_places/autocomplete and /api/recommendations/content-based) are
+served by coroutines that call Google through a non-blocking client, so a
+worker is not tied up while Google responds. Every other request, and CORS
+preflights, go to the regular Flask app. Run with:
+    uvicorn app.asgi:app --port 5000
+"""
+import asyncio
+import json
+import logging
+import time
+from urllib.parse import parse_qsl
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+from app import CORS_ORIGIN, create_app
+from app.api.async_upstream import async_google_get, close_async_client
+from app.api.autocomplete_cache import AUTOCOMPLETE_ASYNC_FLIGHTS, AUTOCOMPLETE_CACHE, normalize_input
+from app.api.google_places import autocomplete_params, cache_autocomplete
+from app.api.nearby_index import NEARBY_INDEX
+from app.api.places import (
+    build_nearby_response, nearby_fetch_error, nearby_search_params, parse_nearby_args,
+    parse_nearby_response, upstream_unavailable
+)
+from app.api.reviews import (
+    REVIEW_CACHE, fan_out_limits, parse_review_details, review_details_params,
+    split_cached_reviews, store_fetched_reviews
+)
+from app.api.upstream import UpstreamError
+from app.metrics import HTTP_REQUEST_SECONDS
+from app.models.recommendation import rank_candidates, request_place_filter, resolve_preferences, select_candidates
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRequest:
+    """The parts of an HTTP request the async views need."""
+
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        # Like request.args.get, the first value of a repeated parameter wins
+        self.args = {}
+        for key, value in parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True):
+            self.args.setdefault(key, value)
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        self.body = body
+
+    def get_json(self):
+        """Parse the body as JSON, failing the same way Flask's request.get_json does."""
+        mimetype = self.headers.get('content-type', '').split(';')[0].strip().lower()
+        if not (mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json'))):
+            raise UnsupportedMediaType(
+                "Did not attempt to load JSON data because the request Content-Type was not 'application/json'."
+            )
+        try:
+            return json.loads(self.body)
+        except ValueError as e:
+            raise BadRequest(f"Failed to decode JSON object: {e}")
+
+
+async def fetch_raw_reviews_async(place_id):
+    response = await async_google_get('details', review_details_params(place_id))
+    return parse_review_details(response.json())
+
+
+async def get_google_reviews_async(place_id):
+    cached = REVIEW_CACHE.get(place_id)
+    if cached is not None:
+        return cached
+
+    try:
+        raw = await fetch_raw_reviews_async(place_id)
+        # Sentiment analysis is CPU-bound, keep it off the event loop
+        analyzed = await asyncio.to_thread(store_fetched_reviews, {place_id: raw})
+        return analyzed[place_id]
+    except Exception as e:
+        logger.warning("Error fetching reviews: %s", e)
+        return []
+
+
+async def fetch_reviews_concurrently_async(place_ids, max_workers=None, deadline=None):
+    """Coroutine version of reviews.fetch_reviews_concurrently with the same limits and deadline."""
+    place_ids = list(dict.fromkeys(pid for pid in place_ids if pid))
+    if not place_ids:
+        return {}
+
+    results, missing = split_cached_reviews(place_ids)
+    if not missing:
+        return results
+
+    max_workers, deadline = fan_out_limits(max_workers, deadline, len(missing))
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def fetch(place_id):
+        async with semaphore:
+            return await fetch_raw_reviews_async(place_id)
+
+    tasks = {asyncio.ensure_future(fetch(pid)): pid for pid in missing}
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.info("Review fetch deadline of %ss hit, skipping %d places", deadline, len(pending))
+
+    fetched = {}
+    for task in done:
+        try:
+            fetched[tasks[task]] = task.result()
+        except Exception as e:
+            logger.warning("Error fetching reviews for %s: %s", tasks[task], e)
+
+    results.update(await asyncio.to_thread(store_fetched_reviews, fetched))
+    return results
+
+
+async def nearby_places(request):
+    try:
+        coordinates, error = parse_nearby_args(request.args)
+        if error is not None:
+            return error
+        lat, lng, radius = coordinates
+
+        covered_cells, fetch_circle = NEARBY_INDEX.plan(lat, lng, radius)
+
+        fetched = []
+        if fetch_circle is not None:
+            try:
+                response = await async_google_get('nearbysearch', nearby_search_params(*fetch_circle))
+                fetched, error = parse_nearby_response(response)
+            except UpstreamError as e:
+                fetched, error = upstream_unavailable(e)
+            if error is not None:
+                return nearby_fetch_error(error), error["status_code"]
+
+        return build_nearby_response(lat, lng, radius, covered_cells, fetch_circle, fetched), 200
+
+    except Exception as e:
+        logger.exception("Error in nearby_places: %s", e)
+        return {
+            "error": "Server error",
+            "details": {
+                "message": str(e),
+                "type": type(e).__name__
+            }
+        }, 500
+
+
+async def get_reviews(request):
+    place_id = request.args.get('place_id')
+    if not place_id:
+        return {"error": "No place_id provided"}, 400
+    return await get_google_reviews_async(place_id), 200
+
+
+async def fetch_autocomplete_async(text):
+    response = await async_google_get('autocomplete', autocomplete_params(text))
+    return cache_autocomplete(text, response.json())
+
+
+async def autocomplete(request):
+    input_text = request.args.get('input')
+    if not input_text:
+        return {"error": "Input text is required"}, 400
+
+    key = normalize_input(input_text)
+    data = AUTOCOMPLETE_CACHE.lookup(key)
+    if data is not None:
+        return data, 200
+
+    try:
+        return await AUTOCOMPLETE_ASYNC_FLIGHTS.do(key, lambda: fetch_autocomplete_async(key)), 200
+    except UpstreamError as e:
+        return {"error": str(e)}, 503
+
+
+async def content_based_recommendation(request):
+    try:
+        data = request.get_json()
+        logger.debug("Request data: %s", data)
+
+        data, error = resolve_preferences(data)
+        if error is not None:
+            return error
+
+        places = data.get('places', [])
+        logger.debug("Processing recommendations with radius: %sm", data.get('radius', 5000))
+        logger.debug("Number of places before filtering: %d", len(places))
+
+        try:
+            type_filter = request_place_filter(data)
+        except ValueError as e:
+            return {"status": "error", "error": str(e)}, 400
+        candidates = select_candidates(places, type_filter)
+        reviews_by_place = await fetch_reviews_concurrently_async(
+            [place.get('place_id') for place in candidates],
+            max_workers=data.get('max_concurrency'),
+            deadline=data.get('deadline')
+        )
+
+        return await asyncio.to_thread(rank_candidates, data, candidates, reviews_by_place), 200
+
+    except Exception as e:
+        logger.exception("Unhandled error in recommendation: %s", e)
+        return {"status": "error", "error": str(e)}, 500
+
+
+# (method, path) -> (view, CORS policy, Flask endpoint name). The policies
+# mirror what flask_cors sends for these routes: the places blueprint allows
+# any origin, the rest only the frontend origin, with credentials. The
+# endpoint names label request metrics the same way the Flask views do.
+ROUTES = {
+    ('GET', '/api/places/nearby'): (nearby_places, 'any', 'places.nearby_places'),
+    ('GET', '/api/reviews/get-reviews'): (get_reviews, 'credentials', 'reviews.get_reviews_endpoint'),
+    ('GET', '/api/google_places/autocomplete'): (autocomplete, 'credentials', 'google_places.autocomplete'),
+    ('POST', '/api/recommendations/content-based'):
+        (content_based_recommendation, 'credentials', 'recommendations.content_based_recommendation'),
+}
+
+
+def cors_headers(policy, origin):
+    if not origin:
+        return []
+    if policy == 'any':
+        return [(b'access-control-allow-origin', origin.encode('latin-1')), (b'vary', b'Origin')]
+    if origin == CORS_ORIGIN:
+        return [(b'access-control-allow-origin', origin.encode('latin-1')),
+                (b'access-control-allow-credentials', b'true')]
+    return []
+
+
+class AsyncApp:
+    """ASGI app serving the upstream-bound routes natively and the rest through Flask."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        route = ROUTES.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+        if route is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        view, policy, endpoint = route
+        started = time.perf_counter()
+        request = AsyncRequest(scope, await self.read_body(receive))
+        body, status = await view(request)
+
+        # Serialize exactly like jsonify so responses are byte-for-byte the same
+        payload = self.flask_app.json.response(body).get_data()
+        headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode('latin-1')),
+        ] + cors_headers(policy, request.headers.get('origin'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': payload})
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method, status=status)
+
+    async def read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await close_async_client()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app():
+    return AsyncApp(create_app())
+
+
+app = create_asgi_app()
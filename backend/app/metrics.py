@@ -0,0 +1,194 @@
+# backend/app/metrics.py
+"""Process-local counters, histograms and timing spans, exposed in the
+Prometheus text format on /metrics."""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from flask import Blueprint, Response, g, request
+from flask.json.provider import DefaultJSONProvider
+
+bp = Blueprint('metrics', __name__)
+
+PREFIX = 'vibescout_'
+# Upper bounds (seconds) of the default latency buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = []      # Counter / Histogram instances, in registration order
+_collectors = []   # callables returning metric families computed at scrape time
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for key, value in values:
+            lines.append(f'{self.name}{_format_labels(zip(self.labels, key))} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def series(self):
+        """{label values: {'buckets': {le: cumulative count}, 'sum': s, 'count': n}}"""
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        result = {}
+        for key, counts, total, count in sorted(items):
+            cumulative, buckets = 0, {}
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                buckets[_format_value(bound)] = cumulative
+            result[key] = {'buckets': buckets, 'sum': total, 'count': count}
+        return result
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for key, series in self.series().items():
+            labels = list(zip(self.labels, key))
+            for bound, count in series['buckets'].items():
+                lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", bound)])} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(series["sum"])}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {series["count"]}')
+        return lines
+
+
+def register_stats(name, stats_fn, counters=(), gauges=()):
+    """Expose numbers from an existing stats() dict, read only when /metrics is scraped.
+
+    Keys in `counters` become `<name>_<key>_total` counters and keys in
+    `gauges` become `<name>_<key>` gauges.
+    """
+    def collect():
+        stats = stats_fn()
+        lines = []
+        for key in counters:
+            metric = f'{PREFIX}{name}_{key}_total'
+            lines += [f'# TYPE {metric} counter', f'{metric} {_format_value(stats.get(key, 0))}']
+        for key in gauges:
+            metric = f'{PREFIX}{name}_{key}'
+            lines += [f'# TYPE {metric} gauge', f'{metric} {_format_value(stats.get(key, 0))}']
+        return lines
+
+    _collectors.append(collect)
+
+
+def render():
+    lines = []
+    for metric in _metrics:
+        lines += metric.render()
+    for collect in _collectors:
+        try:
+            lines += collect()
+        except Exception:
+            continue
+    return '\n'.join(lines) + '\n'
+
+
+STAGE_SECONDS = Histogram(
+    'stage_duration_seconds', 'Time spent in each stage of request handling', ('stage',)
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by endpoint', ('endpoint', 'method', 'status')
+)
+
+
+def span(stage):
+    """Context manager timing one stage (upstream_fetch, review_analysis, feature_vector,
+    similarity, diversification, serialization, ...)."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, timing the serialization of every JSON response."""
+
+    def response(self, *args, **kwargs):
+        with span('serialization'):
+            return super().response(*args, **kwargs)
+
+
+def instrument_app(app):
+    """Time every request of `app` and serialize its JSON through TimedJSONProvider."""
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                endpoint=request.endpoint or 'unmatched', method=request.method, status=response.status_code
+            )
+        return response
+
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render(), mimetype='text/plain; version=0.0.4')
@@ -1,6 +1,19 @@
+import logging
+from types import SimpleNamespace
 import numpy as np
-from textblob import TextBlob
-from sklearn.feature_extraction.text import TfidfVectorizer
+from app.models.keyword_model import KEYWORD_MODEL
+from app.startup import LazyResource
+
+logger = logging.getLogger(__name__)
+
+
+def load_text_models():
+    from textblob import TextBlob
+    return SimpleNamespace(TextBlob=TextBlob)
+
+
+# Loaded on first use, or by the startup warm-up
+TEXT_MODELS = LazyResource('content_based', load_text_models)
 
 def default_metadata():
     """Return default metadata structure when no data is available."""
@@ -41,10 +54,8 @@ def build_metadata(data):
     }
 
 def extract_keywords(texts):
-    """Extract top keywords from review texts using TF-IDF."""
-    vectorizer = TfidfVectorizer(max_features=10, stop_words='english')
-    X = vectorizer.fit_transform(texts)
-    return vectorizer.get_feature_names_out()
+    """Top keywords of review texts, weighted by IDF over every cached review."""
+    return KEYWORD_MODEL.get().keywords(texts)
 
 def build_place_feature_vector(reviews):
     if not reviews:
@@ -71,7 +82,7 @@ def build_place_feature_vector(reviews):
         activity_level = 0
         if texts:
             combined_text = ' '.join(texts)
-            blob = TextBlob(combined_text)
+            blob = TEXT_MODELS.get().TextBlob(combined_text)
             emotional_score = blob.sentiment.polarity
             
             # Activity level based on action words
@@ -102,5 +113,5 @@ def build_place_feature_vector(reviews):
         })
 
     except Exception as e:
-        print(f"Error building feature vector: {str(e)}")
+        logger.warning("Error building feature vector: %s", e)
         return np.zeros(8), default_metadata()
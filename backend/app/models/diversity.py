@@ -0,0 +1,198 @@
+# diversity.py
+"""Maximal marginal relevance (MMR) re-ranking of scored places.
+
+Places are picked greedily: each step takes the place with the best
+    (1 - diversity) * relevance - diversity * (max similarity to the places picked so far)
+Similarity mixes the cosine of the standardized feature vectors with the
+cosine overlap of the Google place types. The running maximum is updated
+with one matrix-vector product (and a few type posting lists) per picked
+place, so picking k of n places costs at most O(k * n) and never builds the
+n x n similarity matrix.
+"""
+import threading
+from itertools import chain
+import numpy as np
+from app.models.place_filter import type_names
+
+# On (nearly) every place, so they say nothing about how similar two places are
+GENERIC_PLACE_TYPES = {"point_of_interest", "establishment"}
+TYPE_WEIGHT = 0.5   # Share of the type overlap in the similarity, the rest is the feature vectors
+# Google has a few hundred place types; past this, each TypeOverlap codes new types itself
+MAX_TYPE_VOCABULARY = 4096
+
+# place type -> code shared by every request; generic types map to -1 and are skipped
+_type_codes = dict.fromkeys(GENERIC_PLACE_TYPES, -1)
+_type_codes_lock = threading.Lock()
+
+
+def unit_rows(matrix):
+    """Rows scaled to unit length; zero rows stay zero (similarity 0)."""
+    matrix = np.asarray(matrix, dtype=float)
+    norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix))[:, None]
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def feature_scaling(place_vectors):
+    """(mean, spread) standardizing the feature vectors of all places."""
+    vectors = np.asarray(place_vectors, dtype=float)
+    mean = vectors.mean(axis=0)
+    centered = vectors - mean
+    spread = np.sqrt(np.einsum('ij,ij->j', centered, centered) / len(vectors))
+    return mean, np.where(spread > 1e-9, spread, 1)
+
+
+def feature_rows(place_vectors, rows=None, scaling=None):
+    """Standardized feature vectors (of `rows`, default all) at unit length.
+
+    Raw vectors are all positive and dominated by a few large dimensions,
+    so their cosines sit close to 1 for every pair.
+    """
+    mean, spread = scaling or feature_scaling(place_vectors)
+    vectors = np.asarray(place_vectors, dtype=float)
+    return unit_rows(((vectors if rows is None else vectors[rows]) - mean) / spread)
+
+
+def type_codes(place_types, overflow=None):
+    """(row, type code) of every non-generic place type, rows ascending.
+
+    Each place's types may be a list or the comma-separated string /nearby
+    sends; names are normalized as place_filter does. Once the shared
+    vocabulary is full, new types get codes from MAX_TYPE_VOCABULARY up in
+    `overflow`, a dict the caller keeps across calls so codes stay distinct.
+    """
+    place_types = [type_names(types) for types in place_types]
+    flat = list(chain.from_iterable(place_types))
+    codes = _type_codes
+    overflow = {} if overflow is None else overflow
+
+    def lookup(place_type):
+        code = codes.get(place_type)
+        return overflow[place_type] if code is None else code
+
+    try:
+        columns = np.fromiter(map(lookup if overflow else codes.__getitem__, flat), dtype=np.intp, count=len(flat))
+    except KeyError:
+        with _type_codes_lock:
+            new_types = [place_type for place_type in dict.fromkeys(flat)
+                         if place_type not in codes and place_type not in overflow]
+            if len(codes) + len(new_types) <= MAX_TYPE_VOCABULARY:
+                for place_type in new_types:
+                    codes[place_type] = len(codes)
+                new_types = []
+        for place_type in new_types:
+            overflow[place_type] = MAX_TYPE_VOCABULARY + len(overflow)
+        columns = np.fromiter(map(lookup, flat), dtype=np.intp, count=len(flat))
+    counts = np.fromiter(map(len, place_types), dtype=np.intp, count=len(place_types))
+    rows = np.repeat(np.arange(len(place_types)), counts)
+    keep = columns >= 0
+    return rows[keep], columns[keep]
+
+
+class TypeOverlap:
+    """Cosine overlap of place type sets, |A & B| / sqrt(|A| |B|), of one place against all.
+
+    Places can be added later with extend().
+    """
+
+    def __init__(self, place_types=()):
+        self.overflow = {}   # Codes of types past the shared vocabulary, see type_codes
+        self.size = 0
+        self.rows = np.zeros(0, dtype=np.intp)
+        self.codes = np.zeros(0, dtype=np.intp)
+        self.extend(place_types)
+
+    def extend(self, place_types):
+        rows, codes = type_codes(place_types, self.overflow)
+        self.rows = np.concatenate((self.rows, rows + self.size))
+        self.codes = np.concatenate((self.codes, codes))
+        self.size += len(place_types)
+        counts = np.bincount(self.rows, minlength=self.size)
+        self.inverse_norms = np.divide(1, np.sqrt(counts), out=np.zeros(self.size), where=counts > 0)
+        self.row_offsets = np.concatenate(([0], np.cumsum(counts)))
+        # Posting lists: the rows having each type, grouped by code
+        order = np.argsort(self.codes, kind='stable')
+        self.posting_rows = self.rows[order]
+        self.posting_bounds = np.searchsorted(self.codes[order], np.arange(self.codes.max(initial=0) + 2)).tolist()
+
+    def to(self, row):
+        overlap = np.zeros(self.size)
+        for code in self.codes[self.row_offsets[row]:self.row_offsets[row + 1]].tolist():
+            overlap[self.posting_rows[self.posting_bounds[code]:self.posting_bounds[code + 1]]] += 1
+        return overlap * (self.inverse_norms * self.inverse_norms[row])
+
+
+def top_order(values, size):
+    """The first `size` of np.argsort(-values, kind='stable'), without sorting all values."""
+    if size >= len(values):
+        return np.argsort(-values, kind='stable')
+    kth = -np.partition(-values, size - 1)[size - 1]
+    above = np.flatnonzero(values > kth)
+    rows = np.concatenate((above, np.flatnonzero(values == kth)[:size - len(above)]))
+    return rows[np.lexsort((rows, -values[rows]))]
+
+
+def mmr_select(relevance, place_vectors=None, place_types=None, k=10, diversity=0.3, type_weight=TYPE_WEIGHT):
+    """Indices of k places picked by MMR, in pick order.
+
+    `relevance` holds the score of each place; `place_vectors` (one row per
+    place) and `place_types` (one list or comma-separated string per place) are optional, and without
+    either the result is simply the k most relevant places. A diversity of 0
+    keeps the relevance order.
+
+    A place's marginal score is at most (1 - diversity) * relevance, so only
+    the most relevant places are looked at: the prefix is doubled whenever
+    the next place could still beat the best one in it.
+    """
+    relevance = np.asarray(relevance, dtype=float)
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=int)
+    if diversity <= 0 or (place_vectors is None and place_types is None):
+        return top_order(relevance, k)
+
+    if place_vectors is None or place_types is None:
+        type_weight = 1.0 if place_vectors is None else 0.0
+    # Standardized over every place, so the prefix size does not change similarities
+    scaling = feature_scaling(place_vectors) if place_vectors is not None else None
+    features = np.zeros((0, np.shape(place_vectors)[1])) if place_vectors is not None else None
+    types = TypeOverlap() if place_types is not None else None
+
+    def similarity_to(row):
+        similarity = np.zeros(size)
+        if features is not None:
+            similarity += (1 - type_weight) * (features @ features[row])
+        if types is not None:
+            similarity += type_weight * types.to(row)
+        return similarity
+
+    available = np.ones(n, dtype=bool)
+    selected = []
+    size = 0
+    order = marginal = max_similarity = None
+    best, next_gain = 0, -np.inf
+    while len(selected) < k:
+        if size == 0 or (size < n and marginal[best] < next_gain):
+            # The next place could still do better: look at (twice as) many more
+            grown = min(n, max(2 * size, 16 * k, 256))
+            # One place past the prefix, to bound what the rest could score
+            order = top_order(relevance, grown + 1)
+            added = order[size:grown]
+            size = grown
+            gain = (1 - diversity) * relevance[order[:size]]
+            next_gain = (1 - diversity) * relevance[order[size]] if size < n else -np.inf
+            if features is not None:
+                features = np.vstack((features, feature_rows(place_vectors, added, scaling)))
+            if types is not None:
+                types.extend([place_types[i] for i in added])
+            # Similarity to the closest picked place; dissimilar places are not rewarded below 0
+            max_similarity = np.zeros(size)
+            for row in selected:
+                np.maximum(max_similarity, similarity_to(row), out=max_similarity)
+        else:
+            selected.append(best)
+            available[best] = False
+            np.maximum(max_similarity, similarity_to(best), out=max_similarity)
+        marginal = np.where(available[:size], gain - diversity * max_similarity, -np.inf)
+        best = int(np.argmax(marginal))
+    return order[selected]
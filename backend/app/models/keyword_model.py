@@ -0,0 +1,284 @@
+# keyword_model.py
+"""Corpus-level keyword model for place reviews.
+
+Every review fetched from Google is queued, and a background worker folds
+the queue into a running document-frequency table in batches. Tokens are
+hashed into a fixed number of buckets (like sklearn's HashingVectorizer), so
+the table has a fixed size however large the vocabulary grows. A place's
+keywords are then its review terms ranked by term count times the corpus
+IDF: a dictionary lookup and a top-k, with no per-place vectorizer fit.
+
+The table is saved to KEYWORD_MODEL_PATH after each batch. Workers sharing
+the file merge their batches into it under a file lock. Reviews are
+fingerprinted into a fixed-size table indexed by the fingerprint's low
+bits, so a re-fetched review is not counted twice; a review whose slot was
+since taken by another may be counted again, in exchange for constant
+memory and O(batch) deduplication.
+
+Reviews are only queued while the background worker runs, and at most
+KEYWORD_MODEL_MAX_PENDING of them.
+"""
+import hashlib
+import logging
+import os
+import threading
+import zlib
+from collections import Counter
+import numpy as np
+from app.api.track_store import replace_file
+from app.metrics import register_stats
+from app.models.review_analysis import tokenize
+from app.startup import LazyResource
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process per model file
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_MODEL_PATH = os.getenv("KEYWORD_MODEL_PATH", "keyword_model.npz")
+KEYWORD_MODEL_INTERVAL = float(os.getenv("KEYWORD_MODEL_INTERVAL", 60))
+# Reviews queued before the worker folds them in early
+KEYWORD_MODEL_BATCH = int(os.getenv("KEYWORD_MODEL_BATCH", 500))
+# Reviews queued at most; more are dropped until the worker catches up
+KEYWORD_MODEL_MAX_PENDING = int(os.getenv("KEYWORD_MODEL_MAX_PENDING", 20 * KEYWORD_MODEL_BATCH))
+KEYWORD_HASH_BITS = 18
+KEYWORD_DIGEST_BITS = 20   # Review fingerprint slots (8 MiB)
+MAX_PLACE_KEYWORDS = 10
+
+
+def token_bucket(token, mask=(1 << KEYWORD_HASH_BITS) - 1):
+    """Hash bucket of a token; crc32 is stable across processes, unlike hash()."""
+    return zlib.crc32(token.encode('utf-8')) & mask
+
+
+def review_digest(review):
+    """64-bit fingerprint of a review, to count each review only once."""
+    key = '\x1f'.join(str(review.get(field, '')) for field in ('author_name', 'time', 'rating', 'text'))
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class KeywordModel:
+    """Document frequencies of hashed review tokens.
+
+    `documents` is the number of distinct reviews counted, `df[b]` how many
+    of them contain a token of bucket b, and `digests[s]` the fingerprint of
+    the last counted review whose low bits are s (0 for an empty slot).
+    """
+
+    def __init__(self, path=None, hash_bits=KEYWORD_HASH_BITS, digest_bits=KEYWORD_DIGEST_BITS,
+                 max_pending=KEYWORD_MODEL_MAX_PENDING):
+        self.path = path
+        self.n_features = 1 << hash_bits
+        self.df = np.zeros(self.n_features, dtype=np.int64)
+        self.documents = 0
+        self.digests = np.zeros(1 << digest_bits, dtype=np.uint64)
+        self.max_pending = max_pending
+        self._pending = []   # (digest, review text)
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._loaded_mtime = None
+        self.batches = 0
+        self.dropped = 0
+
+    def idf(self, buckets):
+        """Smoothed IDF, as TfidfVectorizer computes it."""
+        return np.log((1 + self.documents) / (1 + self.df[buckets])) + 1
+
+    def keywords(self, texts, k=MAX_PLACE_KEYWORDS):
+        """Top-k terms of a place's review texts by count x corpus IDF, best first."""
+        counts = Counter(token for text in texts for token in tokenize(text))
+        if not counts:
+            return []
+        terms = sorted(counts)
+        tf = np.fromiter((counts[term] for term in terms), dtype=np.float64, count=len(terms))
+        buckets = np.fromiter((token_bucket(term) for term in terms), dtype=np.int64, count=len(terms))
+        scores = tf * self.idf(buckets)
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [terms[i] for i in top]
+
+    def observe(self, reviews):
+        """Queue reviews for the next batch update, dropping those past `max_pending`."""
+        entries = [(review_digest(review), str(review['text'])) for review in reviews if review.get('text')]
+        with self._lock:
+            room = max(self.max_pending - len(self._pending), 0)
+            self._pending.extend(entries[:room])
+            self.dropped += len(entries) - len(entries[:room])
+            return len(self._pending)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def update(self):
+        """Fold the queued reviews into the table (merged with the file when there is one).
+
+        With nothing queued, picks up batches other workers saved instead.
+        """
+        if not self.pending():
+            self.reload_if_changed()
+            return 0
+        with self._update_lock, self._file_lock():
+            with self._lock:
+                batch, self._pending = self._pending, []
+            base = self._read() or self
+            df, documents, digests = base.df.copy(), base.documents, base.digests.copy()
+
+            unique = {}
+            for digest, text in batch:
+                unique.setdefault(digest, text)
+            batch_digests = np.fromiter(unique, dtype=np.uint64, count=len(unique))
+            slots = (batch_digests & np.uint64(len(digests) - 1)).astype(np.intp)
+            new = digests[slots] != batch_digests
+            texts = [text for text, keep in zip(unique.values(), new) if keep]
+            buckets = [np.unique([token_bucket(token) for token in tokenize(text)]) for text in texts]
+            if buckets:
+                df += np.bincount(np.concatenate(buckets).astype(np.int64), minlength=self.n_features)
+            documents += len(texts)
+            digests[slots[new]] = batch_digests[new]
+
+            if self.path:
+                self._write(df, documents, digests)
+                self._loaded_mtime = self._mtime()
+            with self._lock:
+                self.df, self.documents, self.digests = df, documents, digests
+                self.batches += 1
+        logger.debug("Keyword model: %d new reviews, %d total", len(texts), documents)
+        return len(texts)
+
+    def load(self):
+        self._loaded_mtime = self._mtime()
+        model = self._read()
+        if model is not None:
+            with self._lock:
+                self.df, self.documents, self.digests = model.df, model.documents, model.digests
+        return self
+
+    def reload_if_changed(self):
+        mtime = self._mtime()
+        if mtime is not None and mtime != self._loaded_mtime:
+            self.load()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns if self.path else None
+        except OSError:
+            return None
+
+    def _read(self):
+        if not self.path:
+            return None
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if len(data['df']) != self.n_features:
+                    logger.warning("Ignoring keyword model %s built with another hash size", self.path)
+                    return None
+                model = KeywordModel(hash_bits=self.n_features.bit_length() - 1,
+                                     digest_bits=len(self.digests).bit_length() - 1)
+                model.df, model.documents = data['df'], int(data['documents'])
+                digests = data['digests']
+                if len(digests) == len(model.digests):
+                    model.digests = digests
+                else:
+                    # Sorted fingerprints of an older file, or another table size
+                    model.digests[digests & np.uint64(len(model.digests) - 1)] = digests
+                return model
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, df, documents, digests):
+        try:
+            replace_file(self.path, lambda f: np.savez(f, df=df, documents=documents, digests=digests))
+        except OSError as e:
+            logger.warning("Could not save keyword model: %s", e)
+
+    def _file_lock(self):
+        return _FileLock(self.path + '.lock' if self.path and fcntl else None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'documents': self.documents,
+                'pending': len(self._pending),
+                'dropped': self.dropped,
+                'batches': self.batches,
+                'path': self.path
+            }
+
+
+class _FileLock:
+    """Exclusive flock on `path` for the duration of a with block; no-op without a path."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if self.path:
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class KeywordModelWorker(threading.Thread):
+    """Daemon thread folding queued reviews into the model every `interval`
+    seconds, or as soon as `batch_size` reviews are waiting.
+
+    Takes the model's LazyResource and only loads it from its own thread,
+    so starting the worker does not slow down create_app.
+    """
+
+    def __init__(self, resource, interval=KEYWORD_MODEL_INTERVAL, batch_size=KEYWORD_MODEL_BATCH):
+        super().__init__(name='keyword-model', daemon=True)
+        self.resource = resource
+        self.interval = interval
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+    def notify(self, pending):
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.resource.get().update()
+            except Exception as e:
+                logger.exception("Error updating keyword model: %s", e)
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+
+# Loaded from KEYWORD_MODEL_PATH on first use, or by the startup warm-up
+KEYWORD_MODEL = LazyResource('keyword_model', lambda: KeywordModel(KEYWORD_MODEL_PATH or None).load())
+register_stats('keyword_model', lambda: KEYWORD_MODEL.get().stats() if KEYWORD_MODEL.loaded else {},
+               counters=('batches', 'dropped'), gauges=('documents', 'pending'))
+_keyword_worker = None
+
+
+def observe_reviews(reviews):
+    """Queue freshly fetched reviews for the keyword model (only while its worker runs)."""
+    if _keyword_worker is None:
+        return
+    _keyword_worker.notify(KEYWORD_MODEL.get().observe(reviews))
+
+
+def start_keyword_model_worker():
+    """Start the batch updater once per process (disabled when the interval is 0)."""
+    global _keyword_worker
+    if _keyword_worker is None and KEYWORD_MODEL_INTERVAL > 0:
+        _keyword_worker = KeywordModelWorker(KEYWORD_MODEL)
+        _keyword_worker.start()
+    return _keyword_worker
@@ -0,0 +1,150 @@
+# place_filter.py
+"""Place type filtering compiled to bitsets.
+
+Every type named by a filter gets a bit, so a place's types become one int
+(types no filter mentions are left out) and an exclusion check is a
+single AND. Filters are
+compiled once per (exclude, include) profile and parse each distinct
+`types` value (Google's list, or the comma-separated string /nearby sends
+to the frontend) only once.
+"""
+import threading
+from functools import lru_cache
+
+# Named groups users can put in an include/exclude profile instead of single types
+PLACE_CATEGORIES = {
+    'food': ('restaurant', 'cafe', 'bakery', 'meal_takeaway', 'meal_delivery', 'food'),
+    'nightlife': ('bar', 'night_club', 'casino'),
+    'culture': ('museum', 'art_gallery', 'library', 'tourist_attraction', 'movie_theater'),
+    'outdoors': ('park', 'campground', 'zoo', 'aquarium', 'amusement_park', 'natural_feature'),
+    'shopping': ('shopping_mall', 'book_store', 'clothing_store', 'store', 'department_store'),
+    'sports': ('gym', 'stadium', 'bowling_alley'),
+}
+
+# Parsed `types` values kept per filter; places from one area share a handful of them
+MASK_CACHE_SIZE = 4096
+# Bound on distinct type names filters may use, since profiles come from requests
+MAX_TYPE_BITS = 4096
+
+_type_bits = {}
+_type_bits_lock = threading.Lock()
+
+
+def normalize_type(name):
+    """'Night Club', 'night club' and 'night_club' are the same type."""
+    return '_'.join(str(name).strip().lower().replace('_', ' ').split())
+
+
+def type_bit(name, assign=False):
+    """The bit of a normalized type name; 0 for unknown names unless `assign`."""
+    bit = _type_bits.get(name, 0)
+    if not bit and assign:
+        with _type_bits_lock:
+            if name not in _type_bits and len(_type_bits) >= MAX_TYPE_BITS:
+                raise ValueError("Too many distinct place types in filters")
+            bit = _type_bits.setdefault(name, 1 << len(_type_bits))
+    return bit
+
+
+def types_mask(types, assign=False):
+    """Bitset of a place's `types`, given as a list or a comma-separated string."""
+    if isinstance(types, str):
+        types = types.split(',')
+    elif not isinstance(types, (list, tuple)):
+        return 0
+    mask = 0
+    for name in types:
+        name = normalize_type(name)
+        if name:
+            mask |= type_bit(name, assign)
+    return mask
+
+
+@lru_cache(maxsize=MASK_CACHE_SIZE)
+def _type_names(types):
+    if isinstance(types, str):
+        types = types.split(',')
+    names = (normalize_type(name) for name in types)
+    return tuple(dict.fromkeys(name for name in names if name))
+
+
+def type_names(types):
+    """Distinct normalized names of a place's `types`, given as a list or a comma-separated string."""
+    if isinstance(types, list):
+        types = tuple(types)
+    elif not isinstance(types, (str, tuple)):
+        return ()
+    try:
+        return _type_names(types)
+    except TypeError:  # Unhashable entries
+        return _type_names.__wrapped__(types)
+
+
+def expand_categories(names):
+    """Normalized types of a profile entry list, with category names expanded."""
+    types = set()
+    for name in names or ():
+        key = normalize_type(name)
+        types.update(normalize_type(t) for t in PLACE_CATEGORIES.get(key, (key,)))
+    return types
+
+
+class PlaceTypeFilter:
+    """Drops places that have an excluded type, or, when `include` is given,
+    places that have none of the included types."""
+
+    def __init__(self, exclude=(), include=()):
+        self.exclude_mask = types_mask(sorted(exclude), assign=True)
+        self.include_mask = types_mask(sorted(include), assign=True)
+        self._masks = {}
+        self._lock = threading.Lock()
+
+    def place_mask(self, place):
+        types = place.get('types')
+        key = tuple(types) if isinstance(types, list) else types
+        try:
+            mask = self._masks.get(key)
+        except TypeError:
+            return types_mask(types)
+        if mask is None:
+            mask = types_mask(types)
+            with self._lock:
+                if len(self._masks) >= MASK_CACHE_SIZE:
+                    self._masks.clear()
+                self._masks[key] = mask
+        return mask
+
+    def excludes(self, place):
+        mask = self.place_mask(place)
+        return bool(mask & self.exclude_mask) or bool(self.include_mask and not mask & self.include_mask)
+
+    def filter(self, places):
+        """The places that pass, in order, in one pass over the list."""
+        exclude_mask, include_mask, place_mask = self.exclude_mask, self.include_mask, self.place_mask
+        if include_mask:
+            return [p for p in places if (mask := place_mask(p)) & include_mask and not mask & exclude_mask]
+        return [p for p in places if not place_mask(p) & exclude_mask]
+
+
+@lru_cache(maxsize=256)
+def _compile(exclude, include):
+    return PlaceTypeFilter(exclude, include)
+
+
+def compile_filter(excluded_types, profile=None):
+    """Filter for the default exclusions adjusted by a user profile.
+
+    `profile` is {'exclude': [...], 'include': [...]} of type or category
+    names. Excluded entries are dropped on top of `excluded_types`; included
+    entries lift their default exclusion and restrict results to places
+    having at least one of them.
+    """
+    profile = profile or {}
+    if not isinstance(profile, dict):
+        raise ValueError("type_filter must be an object with 'include' and/or 'exclude' lists")
+    for key in ('include', 'exclude'):
+        if not isinstance(profile.get(key) or [], list):
+            raise ValueError(f"type_filter.{key} must be a list of place types or categories")
+    include = expand_categories(profile.get('include'))
+    exclude = ({normalize_type(t) for t in excluded_types} - include) | expand_categories(profile.get('exclude'))
+    return _compile(frozenset(exclude), frozenset(include))
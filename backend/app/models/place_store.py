@@ -0,0 +1,324 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from app.metrics import register_stats, span
+from app.models.content_based import build_place_feature_vector
+
+logger = logging.getLogger(__name__)
+
+PLACE_VECTOR_TTL = float(os.getenv("PLACE_VECTOR_TTL", 3600))
+PLACE_VECTOR_MAX_ENTRIES = int(os.getenv("PLACE_VECTOR_MAX_ENTRIES", 10000))
+# Seconds between writes of a SQLite entry's recency on cache hits
+PLACE_VECTOR_TOUCH_INTERVAL = float(os.getenv("PLACE_VECTOR_TOUCH_INTERVAL", 60))
+PLACE_REFRESH_INTERVAL = float(os.getenv("PLACE_REFRESH_INTERVAL", 300))
+PLACE_REFRESH_BATCH = int(os.getenv("PLACE_REFRESH_BATCH", 50))
+
+
+def review_fingerprint(reviews):
+    """Stable hash of a place's set of reviews (order-insensitive)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for key in sorted(
+        (str(r.get('author_name', '')), str(r.get('time', '')), str(r.get('rating', '')), str(r.get('text', '')))
+        for r in reviews
+    ):
+        digest.update('\x1f'.join(key).encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+class PlaceVectorStore:
+    """Feature vectors and metadata of places keyed by place_id.
+
+    A vector is only rebuilt when the fingerprint of the place's reviews
+    changes; entries older than `ttl` are reported as stale so the refresh
+    worker can re-check them in the background.
+    """
+
+    def __init__(self, ttl=PLACE_VECTOR_TTL, max_entries=PLACE_VECTOR_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # place_id -> entry dict
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.hits = 0
+        self.builds = 0
+        self.refreshes = 0
+
+    def add_listener(self, listener):
+        """Call listener(place_id, vector) after every rebuild, and
+        listener(place_id, None) when an entry is evicted."""
+        self._listeners.append(listener)
+
+    def get(self, place_id):
+        with self._lock:
+            return self._entries.get(place_id)
+
+    def get_or_build(self, place_id, reviews):
+        """Return (vector, metadata) for a place, rebuilding only if its reviews changed."""
+        fingerprint = review_fingerprint(reviews)
+        cached = self._cached(place_id, fingerprint)
+        if cached is not None:
+            return cached
+
+        with span('feature_vector'):
+            vector, metadata = build_place_feature_vector(reviews)
+        self._put(place_id, vector, metadata, fingerprint)
+        return vector, metadata
+
+    def refresh(self, place_id, reviews):
+        """Re-check a place against freshly fetched reviews."""
+        fingerprint = review_fingerprint(reviews)
+        if self._mark_refreshed(place_id, fingerprint):
+            return False
+        with span('feature_vector'):
+            vector, metadata = build_place_feature_vector(reviews)
+        self._put(place_id, vector, metadata, fingerprint)
+        with self._lock:
+            self.refreshes += 1
+        return True
+
+    def _cached(self, place_id, fingerprint):
+        """(vector, metadata) if the entry was built from these reviews, else None."""
+        with self._lock:
+            entry = self._entries.get(place_id)
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                self._entries.move_to_end(place_id)
+                self.hits += 1
+                return entry['vector'], entry['metadata']
+        return None
+
+    def _mark_refreshed(self, place_id, fingerprint):
+        """Restart the TTL of an entry still matching `fingerprint`; False if it needs a rebuild."""
+        with self._lock:
+            entry = self._entries.get(place_id)
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                entry['refreshed_at'] = time.time()
+                return True
+        return False
+
+    def stale_ids(self, limit=None):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            stale = [pid for pid, entry in self._entries.items() if entry['refreshed_at'] < cutoff]
+        return stale[:limit] if limit else stale
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'builds': self.builds,
+                'refreshes': self.refreshes
+            }
+
+    def _put(self, place_id, vector, metadata, fingerprint):
+        with self._lock:
+            self._entries[place_id] = {
+                'vector': vector,
+                'metadata': metadata,
+                'fingerprint': fingerprint,
+                'refreshed_at': time.time()
+            }
+            self._entries.move_to_end(place_id)
+            self.builds += 1
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+        self._notify(place_id, vector, evicted)
+
+    def _notify(self, place_id, vector, evicted):
+        for listener in self._listeners:
+            listener(place_id, vector)
+            for evicted_id in evicted:
+                listener(evicted_id, None)
+
+
+def metadata_json(value):
+    """json.dumps default for the numpy values in place metadata."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SQLitePlaceVectorStore(PlaceVectorStore):
+    """Place vectors in a SQLite file shared by every worker that opens it,
+    so a place analyzed by one worker is a cache hit in all of them.
+
+    Same fingerprint, TTL and LRU semantics as PlaceVectorStore; recency is
+    tracked with an `accessed_at` column, written back on a hit only once it
+    is more than `touch_interval` seconds old (like SQLiteReviewCache).
+    Counters are per process, and listeners only hear about builds and
+    evictions made by this process.
+    """
+
+    def __init__(self, path, ttl=PLACE_VECTOR_TTL, max_entries=PLACE_VECTOR_MAX_ENTRIES,
+                 touch_interval=PLACE_VECTOR_TOUCH_INTERVAL):
+        super().__init__(ttl, max_entries)
+        self.path = path
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS place_vectors (
+                place_id TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                metadata TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                refreshed_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS place_vectors_accessed_at ON place_vectors (accessed_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS place_vectors_refreshed_at ON place_vectors (refreshed_at)")
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def get(self, place_id):
+        row = self._connect().execute(
+            "SELECT vector, metadata, fingerprint, refreshed_at FROM place_vectors WHERE place_id = ?", (place_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'vector': np.frombuffer(row[0], dtype='<f8').copy(),
+            'metadata': json.loads(row[1]),
+            'fingerprint': row[2],
+            'refreshed_at': row[3]
+        }
+
+    def _cached(self, place_id, fingerprint):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT vector, metadata, accessed_at FROM place_vectors WHERE place_id = ? AND fingerprint = ?",
+            (place_id, fingerprint)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[2] > self.touch_interval:
+            conn.execute("UPDATE place_vectors SET accessed_at = ? WHERE place_id = ?", (now, place_id))
+            conn.commit()
+        with self._lock:
+            self.hits += 1
+        return np.frombuffer(row[0], dtype='<f8').copy(), json.loads(row[1])
+
+    def _mark_refreshed(self, place_id, fingerprint):
+        conn = self._connect()
+        updated = conn.execute(
+            "UPDATE place_vectors SET refreshed_at = ? WHERE place_id = ? AND fingerprint = ?",
+            (time.time(), place_id, fingerprint)
+        ).rowcount
+        conn.commit()
+        return updated > 0
+
+    def _put(self, place_id, vector, metadata, fingerprint):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO place_vectors "
+            "(place_id, vector, metadata, fingerprint, refreshed_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (place_id, np.asarray(vector, dtype='<f8').tobytes(), json.dumps(metadata, default=metadata_json),
+             fingerprint, now, now)
+        )
+        evicted = [row[0] for row in conn.execute(
+            "SELECT place_id FROM place_vectors ORDER BY accessed_at DESC LIMIT -1 OFFSET ?", (self.max_entries,)
+        ).fetchall()]
+        conn.executemany("DELETE FROM place_vectors WHERE place_id = ?", [(evicted_id,) for evicted_id in evicted])
+        conn.commit()
+        with self._lock:
+            self.builds += 1
+        self._notify(place_id, vector, evicted)
+
+    def stale_ids(self, limit=None):
+        return [row[0] for row in self._connect().execute(
+            "SELECT place_id FROM place_vectors WHERE refreshed_at < ? ORDER BY refreshed_at LIMIT ?",
+            (time.time() - self.ttl, limit or -1)
+        ).fetchall()]
+
+    def stats(self):
+        entries, = self._connect().execute("SELECT COUNT(*) FROM place_vectors").fetchone()
+        with self._lock:
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'entries': entries,
+                'hits': self.hits,
+                'builds': self.builds,
+                'refreshes': self.refreshes
+            }
+
+
+class PlaceRefreshWorker(threading.Thread):
+    """Daemon thread that periodically re-fetches reviews for stale places.
+
+    `fetch_reviews` takes a list of place_ids and returns a dict of
+    place_id -> analyzed reviews (see fetch_reviews_concurrently).
+    """
+
+    def __init__(self, store, fetch_reviews, interval=PLACE_REFRESH_INTERVAL, batch_size=PLACE_REFRESH_BATCH):
+        super().__init__(name='place-refresh', daemon=True)
+        self.store = store
+        self.fetch_reviews = fetch_reviews
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.refresh_once()
+            except Exception as e:
+                logger.exception("Error refreshing place vectors: %s", e)
+
+    def refresh_once(self):
+        stale = self.store.stale_ids(self.batch_size)
+        if not stale:
+            return 0
+        reviews_by_place = self.fetch_reviews(stale)
+        changed = 0
+        for place_id, reviews in reviews_by_place.items():
+            if reviews and self.store.refresh(place_id, reviews):
+                changed += 1
+        return changed
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def create_place_vector_store():
+    """Build the place vector store configured through environment variables."""
+    if os.getenv("PLACE_VECTOR_BACKEND", "memory").lower() == "sqlite":
+        return SQLitePlaceVectorStore(os.getenv("PLACE_VECTOR_PATH", "place_vectors.sqlite3"))
+    return PlaceVectorStore()
+
+
+PLACE_VECTOR_STORE = create_place_vector_store()
+register_stats('place_vectors', PLACE_VECTOR_STORE.stats,
+               counters=('hits', 'builds', 'refreshes'), gauges=('entries',))
+_refresh_worker = None
+
+
+def start_refresh_worker(fetch_reviews):
+    """Start the background refresher once per process (disabled when the interval is 0)."""
+    global _refresh_worker
+    if _refresh_worker is None and PLACE_REFRESH_INTERVAL > 0:
+        _refresh_worker = PlaceRefreshWorker(PLACE_VECTOR_STORE, fetch_reviews)
+        _refresh_worker.start()
+    return _refresh_worker
@@ -0,0 +1,189 @@
+import logging
+import os
+import queue
+import threading
+import time
+from flask import Blueprint, jsonify
+from app.api.nearby_index import NEARBY_INDEX
+from app.api.places import search_google_nearby
+from app.api.reviews import fetch_reviews_concurrently
+from app.models.place_store import PLACE_VECTOR_STORE
+from app.models.recommendation import select_candidates
+from app.models.vibe_index import VIBE_INDEX
+
+precompute_bp = Blueprint('precompute', __name__, url_prefix='/api/precompute')
+logger = logging.getLogger(__name__)
+
+# Hot areas to keep warm, as "lat,lng,radius" tiles separated by semicolons
+PRECOMPUTE_TILES = os.getenv("PRECOMPUTE_TILES", "")
+PRECOMPUTE_INTERVAL = float(os.getenv("PRECOMPUTE_INTERVAL", 900))
+PRECOMPUTE_WORKERS = int(os.getenv("PRECOMPUTE_WORKERS", 2))
+# Nobody is waiting on a background refresh, so slow places get more time
+PRECOMPUTE_FETCH_DEADLINE = float(os.getenv("PRECOMPUTE_FETCH_DEADLINE", 30))
+
+
+def parse_tiles(spec):
+    """Parse "lat,lng,radius;lat,lng,radius" into a list of (lat, lng, radius) tuples."""
+    tiles = []
+    for part in spec.split(';'):
+        if not part.strip():
+            continue
+        lat, lng, radius = (float(value) for value in part.split(','))
+        if not (-90 <= lat <= 90) or not (-180 <= lng <= 180) or not (0 < radius <= 50000):
+            raise ValueError(f"Invalid precompute tile: {part.strip()}")
+        tiles.append((lat, lng, radius))
+    return list(dict.fromkeys(tiles))
+
+
+def warm_tile(lat, lng, radius):
+    """Fetch a tile's places, their reviews and feature vectors into the shared caches.
+
+    Afterwards /nearby for the tile is answered from the local index (when the
+    search returned less than a full page, see NearbyIndex.add_search) and
+    /content-based for its places only has to score them. A failed search
+    (including an HTTP 200 with an error status such as OVER_QUERY_LIMIT)
+    raises before anything is indexed, so the tile is never cached as empty.
+    """
+    places, error = search_google_nearby(lat, lng, radius)
+    if error is not None:
+        google_status = (error.get('google_response') or {}).get('status')
+        raise RuntimeError(f"Nearby search failed with status {error['status_code']}"
+                           + (f" ({google_status})" if google_status else ""))
+    NEARBY_INDEX.add_search(lat, lng, radius, places)
+
+    candidates = select_candidates(places)
+    reviews_by_place = fetch_reviews_concurrently(
+        [place.get('place_id') for place in candidates],
+        deadline=PRECOMPUTE_FETCH_DEADLINE
+    )
+
+    vectors = 0
+    for place in candidates:
+        reviews = reviews_by_place.get(place.get('place_id'))
+        if reviews:
+            vector, _ = PLACE_VECTOR_STORE.get_or_build(place.get('place_id'), reviews)
+            VIBE_INDEX.add(place, vector)
+            vectors += 1
+
+    return {
+        'places': len(places),
+        'candidates': len(candidates),
+        'reviews_fetched': len(reviews_by_place),
+        'vectors': vectors
+    }
+
+
+class PrecomputeWorker:
+    """Re-warms a fixed set of tiles every `interval` seconds on a few daemon threads.
+
+    Tiles wait in a local queue; a tile that is already queued or being
+    refreshed is not queued again, so there is at most one refresh per tile
+    in flight however long a refresh takes.
+    """
+
+    def __init__(self, tiles, refresh_tile=warm_tile, interval=PRECOMPUTE_INTERVAL, workers=PRECOMPUTE_WORKERS):
+        self.tiles = tiles
+        self.refresh_tile = refresh_tile
+        self.interval = interval
+        self.workers = max(1, workers)
+        self._queue = queue.Queue()
+        self._scheduled = set()   # tiles queued or being refreshed
+        self._status = {
+            tile: {'refreshed_at': None, 'duration': None, 'result': None, 'error': None, 'failures': 0}
+            for tile in tiles
+        }
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def enqueue(self, tile):
+        """Queue a refresh of `tile`; returns False if one is already pending."""
+        with self._lock:
+            if tile in self._scheduled:
+                return False
+            self._scheduled.add(tile)
+        self._queue.put(tile)
+        return True
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._schedule, name='precompute-scheduler', daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._work, name=f'precompute-{i}', daemon=True) for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _schedule(self):
+        while True:
+            for tile in self.tiles:
+                self.enqueue(tile)
+            if self._stop_event.wait(self.interval):
+                return
+
+    def _work(self):
+        while not self._stop_event.is_set():
+            try:
+                tile = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self.refresh(tile)
+            finally:
+                with self._lock:
+                    self._scheduled.discard(tile)
+
+    def refresh(self, tile):
+        """Warm one tile now and record the outcome in its status."""
+        start = time.time()
+        try:
+            result, error = self.refresh_tile(*tile), None
+        except Exception as e:
+            result, error = None, str(e)
+            logger.warning("Error precomputing tile %s: %s", tile, error)
+        with self._lock:
+            previous = self._status[tile]
+            self._status[tile] = {
+                'refreshed_at': start if error is None else previous['refreshed_at'],
+                'duration': time.time() - start,
+                'result': result,
+                'error': error,
+                'failures': previous['failures'] + (error is not None)
+            }
+        return error is None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': True,
+                'interval': self.interval,
+                'pending': len(self._scheduled),
+                'failed_tiles': sum(status['error'] is not None for status in self._status.values()),
+                'tiles': [
+                    {'lat': lat, 'lng': lng, 'radius': radius, **status}
+                    for (lat, lng, radius), status in self._status.items()
+                ]
+            }
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_precompute_worker = None
+
+
+def start_precompute_worker(tiles=None):
+    """Start warming the configured tiles once per process (off unless PRECOMPUTE_TILES is set)."""
+    global _precompute_worker
+    tiles = parse_tiles(PRECOMPUTE_TILES) if tiles is None else tiles
+    if _precompute_worker is None and tiles and PRECOMPUTE_INTERVAL > 0:
+        _precompute_worker = PrecomputeWorker(tiles)
+        _precompute_worker.start()
+    return _precompute_worker
+
+
+@precompute_bp.route('/stats', methods=['GET'])
+def get_precompute_stats():
+    """Endpoint exposing the state of every precomputed tile"""
+    if _precompute_worker is None:
+        return jsonify({'enabled': False})
+    return jsonify(_precompute_worker.stats())
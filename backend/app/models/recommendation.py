@@ -1,11 +1,37 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+import json
+import logging
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from app.models.content_based import build_place_feature_vector
-from app.api.reviews import get_google_reviews
+from app.api.nearby_index import NEARBY_INDEX
+from app.api.profile_store import profile_preferences
+from app.models.diversity import mmr_select, unit_rows
+from app.models.place_filter import compile_filter
+from app.models.place_store import PLACE_VECTOR_STORE
+from app.models.vibe_index import VIBE_INDEX
+from app.api.reviews import fetch_reviews_concurrently, iter_reviews_concurrently, parse_fan_out_options
+from app.metrics import span
 import os
 
 recommendations_bp = Blueprint('recommendations', __name__, url_prefix='/api/recommendations')
+logger = logging.getLogger(__name__)
+
+# Scoring knobs
+DISTANCE_PENALTY = 0.3      # Places at the edge of the radius lose up to 30% similarity
+NOISE_SCALE = 0.4           # Std-dev of the random factor added for variety
+SIMILARITY_THRESHOLD = 0.2  # Minimum final score for inclusion
+MAX_RECOMMENDATIONS = 10
+# Weight of diversity against relevance when re-ranking (0 keeps the score order)
+DIVERSITY_WEIGHT = float(os.getenv("DIVERSITY_WEIGHT", 0.3))
+# Best-scoring places the diversification picks from
+DIVERSITY_POOL = int(os.getenv("DIVERSITY_POOL", 5000))
+MAX_VIBE_MATCHES = 100      # Largest k /vibe-matches accepts
+MAX_VIBE_RADIUS = 50000     # Meters
+MAX_BATCH_USERS = int(os.getenv("MAX_BATCH_USERS", 10000))
+# User x place scores a batch holds at once; bounds its memory (~16 bytes each)
+BATCH_SCORE_CELLS = int(os.getenv("BATCH_SCORE_CELLS", 1 << 21))
+
+# Optional fixed seed for the noise so results are reproducible
+RECOMMENDATION_SEED = os.getenv("RECOMMENDATION_SEED")
 
 EXCLUDED_PLACE_TYPES = {
     # Original exclusions
@@ -32,7 +58,7 @@ EXCLUDED_PLACE_TYPES = {
     "home_goods_store", "jewelry_store", "shoe_store", "hardware_store",
 
     # Entertainment and Recreation (Conditionally Excluded)
-    "casino", "night_club", "stadium"
+    "casino", "night_club", "stadium",
 
     # Outdoor Activities
     "parking", "subway_station", "transit_station",
@@ -44,131 +70,604 @@ EXCLUDED_PLACE_TYPES = {
     "locksmith", "moving_company"
 }
 
+# Compiled once; requests without a type_filter profile share it
+DEFAULT_PLACE_FILTER = compile_filter(EXCLUDED_PLACE_TYPES)
+
 
 @recommendations_bp.route('/content-based', methods=['POST'])
 def content_based_recommendation():
     try:
         data = request.get_json()
-        print("Request data:", data)
+        logger.debug("Request data: %s", data)
 
-        if not data or 'user_preferences' not in data or 'places' not in data:
-            return jsonify({"status": "error", "error": "Invalid input data"}), 400
+        data, error = resolve_preferences(data)
+        if error is not None:
+            return jsonify(error[0]), error[1]
 
-        user_preferences = data.get('user_preferences', {})
         places = data.get('places', [])
         radius = data.get('radius', 5000)  # Get radius from request
 
-        print(f"Processing recommendations with radius: {radius}m")
-        print(f"Number of places before filtering: {len(places)}")
-
-        # Enhanced user vector matching feature dimensions
-        user_vector = np.array([
-            user_preferences.get('valence', 0.5),
-            0.5,  # Sentiment variance weight
-            user_preferences.get('energy', 0.5),
-            0.5,  # Rating variance weight
-            user_preferences.get('loudness', 0.5),
-            user_preferences.get('ambiance', 0.5),
-            user_preferences.get('liveness', 0.5),
-            0.5  # Review count weight
-        ]).reshape(1, -1)
+        logger.debug("Processing recommendations with radius: %sm", radius)
+        logger.debug("Number of places before filtering: %d", len(places))
+
+        try:
+            type_filter = request_place_filter(data)
+        except ValueError as e:
+            return jsonify({"status": "error", "error": str(e)}), 400
+        candidates = select_candidates(places, type_filter)
+
+        # Fetch reviews for all candidates at once; slow places past the deadline are dropped
+        reviews_by_place = fetch_reviews_concurrently(
+            [place.get('place_id') for place in candidates],
+            max_workers=data.get('max_concurrency'),
+            deadline=data.get('deadline')
+        )
+
+        return jsonify(rank_candidates(data, candidates, reviews_by_place))
+
+    except Exception as e:
+        logger.exception("Unhandled error in recommendation: %s", e)
+        return jsonify({"status": "error", "error": str(e)}), 500
+
+
+@recommendations_bp.route('/content-based/stream', methods=['POST'])
+def content_based_recommendation_stream():
+    """Streaming /content-based: places are sent as soon as they are scored, then the final ranking.
+
+    Sends Server-Sent Events, or NDJSON when the client asks for
+    application/x-ndjson (or passes ?format=ndjson). Each `place` event holds
+    the recommendation object of a place scoring above the threshold; the
+    closing `final` event is exactly the body /content-based would return.
+    """
+    try:
+        data = request.get_json()
+    except Exception as e:
+        return jsonify({"status": "error", "error": str(e)}), 500
+
+    data, error = resolve_preferences(data)
+    if error is not None:
+        return jsonify(error[0]), error[1]
+
+    try:
+        type_filter = request_place_filter(data)
+    except ValueError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+
+    candidates = select_candidates(data.get('places', []), type_filter)
+    ndjson = request.args.get('format') == 'ndjson' or request.accept_mimetypes.best_match(
+        ['text/event-stream', 'application/x-ndjson']) == 'application/x-ndjson'
+
+    def generate():
+        try:
+            for event, payload in iter_recommendation_events(data, candidates):
+                yield encode_event(event, payload, ndjson)
+        except Exception as e:
+            logger.exception("Unhandled error in recommendation stream: %s", e)
+            yield encode_event('error', {"status": "error", "error": str(e)}, ndjson)
+
+    return Response(
+        generate(),
+        mimetype='application/x-ndjson' if ndjson else 'text/event-stream',
+        # Keep proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def encode_event(event, payload, ndjson=False):
+    if ndjson:
+        return json.dumps({"event": event, "data": payload}) + "\n"
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def iter_recommendation_events(data, candidates):
+    """Yield ('place', recommendation) as each candidate is scored, then ('final', response body).
+
+    Each candidate's noise is drawn before any review arrives, so the score
+    sent for a place is the one it gets in the final ranking.
+    """
+    user_vector = build_user_vector(data.get('user_preferences', {}))
+    radius = data.get('radius', 5000)
+    noise = candidate_noise(data, len(candidates))
+    positions = {place.get('place_id'): index for index, place in enumerate(candidates)}
+
+    reviews_by_place = {}
+    for place_id, reviews in iter_reviews_concurrently(
+        [place.get('place_id') for place in candidates],
+        max_workers=data.get('max_concurrency'),
+        deadline=data.get('deadline')
+    ):
+        reviews_by_place[place_id] = reviews
+        if not reviews:
+            continue
+
+        index = positions[place_id]
+        place = candidates[index]
+        try:
+            place_vector, scores = PLACE_VECTOR_STORE.get_or_build(place_id, reviews)
+            score = score_places(user_vector, np.reshape(place_vector, (1, -1)),
+                                 np.array([float(place.get('distance', 0))]), radius,
+                                 noise=noise[index:index + 1])[0]
+        except Exception as e:
+            logger.warning("Error processing place %s: %s", place.get('name'), e)
+            continue
+
+        if score > SIMILARITY_THRESHOLD:
+            yield 'place', build_recommendation_object(place, score, scores)
+
+    yield 'final', rank_candidates(data, candidates, reviews_by_place, noise)
+
+def resolve_preferences(data, require_places=True):
+    """Validate a recommendation request, taking user_preferences from the stored
+    music profile when the request only sends its profile_id.
+
+    The review fan-out options (max_concurrency, deadline) come back
+    validated and clamped to the configured caps, and the noise seed as an int.
+    Returns (data, None), or (None, (error_body, status)).
+    """
+    if (not isinstance(data, dict) or (require_places and 'places' not in data)
+            or ('user_preferences' not in data and 'profile_id' not in data)):
+        return None, ({"status": "error", "error": "Invalid input data"}, 400)
+    options, error = parse_fan_out_options(data)
+    if error is None:
+        options['seed'], error = parse_seed(data)
+    if error is not None:
+        return None, error
+    data = {**data, **options}
+    if 'user_preferences' not in data:
+        preferences = profile_preferences(data['profile_id'])
+        if preferences is None:
+            return None, ({"status": "error", "error": "Unknown or expired profile_id"}, 404)
+        data = {**data, 'user_preferences': preferences}
+    return data, None
+
+
+def parse_seed(data):
+    """The request's optional noise `seed` as a non-negative int (None when
+    absent), or (None, (error_body, status))."""
+    seed = data.get('seed')
+    if seed is None:
+        return None, None
+    try:
+        if isinstance(seed, bool) or float(seed) != int(seed) or int(seed) < 0:
+            raise ValueError("seed must be a non-negative integer")
+    except (TypeError, ValueError, OverflowError) as e:
+        return None, ({"status": "error", "error": f"Invalid parameter format: {e}"}, 400)
+    return int(seed), None
+
+
+def request_place_filter(data):
+    """Type filter of a request: the default exclusions adjusted by its optional
+    `type_filter` profile ({"include": [...], "exclude": [...]}, see place_filter)."""
+    profile = data.get('type_filter')
+    return compile_filter(EXCLUDED_PLACE_TYPES, profile) if profile else DEFAULT_PLACE_FILTER
+
+
+def select_candidates(places, type_filter=None):
+    """Places worth scoring: excluded types dropped, deduplicated by place_id."""
+    processed_place_ids = set()
+    candidates = []
+
+    for place in (type_filter or DEFAULT_PLACE_FILTER).filter(places):
+        place_id = place.get('place_id')
+
+        # Skip if we've already processed this place
+        if place_id in processed_place_ids:
+            continue
+
+        processed_place_ids.add(place_id)
+        candidates.append(place)
+
+    return candidates
+
 
+def candidate_noise(data, count):
+    """Random factor for each candidate, drawn up front so a place's score
+    does not depend on which other places had reviews."""
+    seed = data.get('seed')
+    seed = RECOMMENDATION_SEED if seed is None else seed
+    rng = np.random.default_rng(int(seed) if seed is not None else None)
+    return rng.normal(0, NOISE_SCALE, size=count)
+
+
+def candidate_vectors(candidates, reviews_by_place):
+    """Feature vectors of the candidates that have reviews, each built once.
+
+    Returns (candidate indices, place vector matrix, distances, place
+    metadata), in candidate order.
+    """
+    indices, place_vectors, distances, place_scores = [], [], [], []
+    for index, place in enumerate(candidates):
+        try:
+            place_id = place.get('place_id')
+            reviews = reviews_by_place.get(place_id)
+            
+            if not reviews:
+                continue
+
+            # Cached unless this place's reviews changed since it was last built
+            place_vector, scores = PLACE_VECTOR_STORE.get_or_build(place_id, reviews)
+            # The shared vibe index serves every user, so it only takes places
+            # as Google returned them to /nearby, never the posted copy
+            indexed = NEARBY_INDEX.get(place_id)
+            if indexed is not None:
+                VIBE_INDEX.add(indexed, place_vector)
+            distance = float(place.get('distance', 0))
+
+            indices.append(index)
+            place_vectors.append(place_vector)
+            distances.append(distance)
+            place_scores.append(scores)
+
+        except Exception as e:
+            logger.warning("Error processing place %s: %s", place.get('name'), e)
+            continue
+
+    return indices, np.array(place_vectors, dtype=float).reshape(-1, 8), np.array(distances), place_scores
+
+
+def rank_candidates(data, candidates, reviews_by_place, noise=None):
+    """Score candidates that have reviews and build the /content-based response body."""
+    user_vector = build_user_vector(data.get('user_preferences', {}))
+    radius = data.get('radius', 5000)
+    noise = candidate_noise(data, len(candidates)) if noise is None else noise
+
+    indices, place_vectors, distances, place_scores = candidate_vectors(candidates, reviews_by_place)
+    scored_places = [candidates[i] for i in indices]
+
+    with span('similarity'):
+        final_scores = score_places(user_vector, place_vectors, distances, radius,
+                                    noise=np.asarray(noise)[indices])
+        pool = top_k_indices(final_scores, DIVERSITY_POOL, SIMILARITY_THRESHOLD)
+
+    # Ensure diversity in the final recommendations
+    with span('diversification'):
+        pool_types = [scored_places[i].get('types', []) for i in pool]
+        top = pool[mmr_select(final_scores[pool], place_vectors[pool], pool_types, MAX_RECOMMENDATIONS, DIVERSITY_WEIGHT)]
+
+    diverse_recommendations = [
+        build_recommendation_object(scored_places[i], final_scores[i], place_scores[i])
+        for i in top
+    ]
+    
+    logger.debug("Final number of recommendations: %d", len(diverse_recommendations))
+    
+    return {
+        "status": "success", 
+        "recommendations": diverse_recommendations,
+        "metadata": {
+            "processed_places": len(candidates),
+            "reviews_fetched": len(reviews_by_place),
+            "recommended_places": len(diverse_recommendations),
+            "radius_used": radius
+        }
+    }
+
+
+def recommend_batch(user_preferences, places, reviews_by_place=None, radius=5000, k=MAX_RECOMMENDATIONS,
+                    noise=False, seed=None, type_filter=None, max_concurrency=None, deadline=None):
+    """Top-k recommendations of many users against one shared place list.
+
+    `user_preferences` is a list of preference dicts (as sent to
+    /content-based). Reviews are fetched (unless given in `reviews_by_place`)
+    and feature vectors built once for all users; scores are one matrix
+    product per chunk of users. Without `noise` the results are
+    deterministic. Returns one list of recommendation objects per user, best
+    first, without the diversification pass.
+    """
+    candidates = select_candidates(places, type_filter)
+    if reviews_by_place is None:
+        reviews_by_place = fetch_reviews_concurrently(
+            [place.get('place_id') for place in candidates], max_workers=max_concurrency, deadline=deadline)
+
+    indices, place_vectors, distances, place_scores = candidate_vectors(candidates, reviews_by_place)
+    user_matrix = np.array([build_user_vector(preferences) for preferences in user_preferences]).reshape(-1, 8)
+    rng = np.random.default_rng(int(seed) if seed is not None else None) if noise else None
+
+    with span('similarity'):
+        top = score_users_top_k(user_matrix, place_vectors, distances, radius, k, rng=rng)
+
+    # Each place's recommendation object is built once and copied per user
+    templates = {}
+    results = []
+    for rows, scores in top:
         recommendations = []
-        processed_place_ids = set()
-
-        for place in places:
-            try:
-                place_id = place.get('place_id')
-                
-                # Skip if we've already processed this place or if it should be excluded
-                if place_id in processed_place_ids or should_exclude_place(place):
-                    continue
-
-                processed_place_ids.add(place_id)
-                
-                # Get fresh reviews for each place
-                reviews = get_google_reviews(place_id)
-                
-                if not reviews:
-                    continue
-
-                place_vector, place_scores = build_place_feature_vector(reviews)
-                
-                # Calculate base similarity
-                base_similarity = cosine_similarity(user_vector, place_vector.reshape(1, -1))[0][0]
-                
-                # Add distance-based adjustment
-                # Places further away need higher similarity to be included
-                distance_factor = float(place.get('distance', 0)) / float(radius)
-                adjusted_similarity = base_similarity * (1 - (distance_factor * 0.3))
-                
-                # Add some controlled randomness for variety
-                random_factor = np.random.normal(0, 0.4)  # Small randomness
-                final_similarity = min(1.0, max(0.0, adjusted_similarity + random_factor))
-
-
-                if final_similarity > 0.2:  # Minimum threshold for inclusion
-                    recommendation = build_recommendation_object(place, final_similarity, place_scores)
-                    recommendations.append(recommendation)
-
-            except Exception as e:
-                print(f"Error processing place {place.get('name')}: {str(e)}")
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            if row not in templates:
+                templates[row] = build_recommendation_object(candidates[indices[row]], 0, place_scores[row])
+            recommendations.append({**templates[row], "similarity_score": score,
+                                    "star_rating": min(5, max(1, round(score * 5)))})
+        results.append(recommendations)
+    return results
+
+
+@recommendations_bp.route('/vibe-matches', methods=['POST'])
+def vibe_matches():
+    """Best vibe matches among every place with a cached feature vector.
+
+    Takes user_preferences (or profile_id), an optional lat/lng/radius in
+    meters to only consider places in range, and k (default
+    MAX_RECOMMENDATIONS). No reviews are fetched and no noise is added,
+    so results are deterministic.
+    """
+    data, error = resolve_preferences(request.get_json(silent=True), require_places=False)
+    if error is not None:
+        return jsonify(error[0]), error[1]
+
+    query, error = parse_vibe_query(data)
+    if error is not None:
+        return jsonify(error[0]), error[1]
+
+    with span('similarity'):
+        matches = VIBE_INDEX.query(build_user_vector(data['user_preferences']),
+                                   distance_penalty=DISTANCE_PENALTY, **query)
+
+    recommendations = []
+    for match in matches:
+        entry = PLACE_VECTOR_STORE.get(match['place']['place_id'])
+        if entry is None:
+            continue
+        recommendation = build_recommendation_object(match['place'], match['score'], entry['metadata'])
+        recommendation['distance'] = match['distance']
+        recommendations.append(recommendation)
+
+    return jsonify({
+        "status": "success",
+        "recommendations": recommendations,
+        "metadata": {
+            "indexed_places": len(VIBE_INDEX),
+            "recommended_places": len(recommendations),
+            "radius_used": query['radius']
+        }
+    })
+
+
+def parse_vibe_query(data):
+    """VIBE_INDEX.query arguments of a /vibe-matches request, or (None, (error_body, status))."""
+    try:
+        k = int(data.get('k', MAX_RECOMMENDATIONS))
+        lat, lng, radius = (None if data.get(key) is None else float(data[key]) for key in ('lat', 'lng', 'radius'))
+    except (TypeError, ValueError) as e:
+        return None, ({"status": "error", "error": f"Invalid parameter format: {e}"}, 400)
+    mode = data.get('mode', 'auto')
+
+    if not 1 <= k <= MAX_VIBE_MATCHES:
+        return None, ({"status": "error", "error": f"k must be between 1 and {MAX_VIBE_MATCHES}"}, 400)
+    if (lat is None) != (lng is None) or (radius is not None and lat is None):
+        return None, ({"status": "error", "error": "lat and lng must be given together, and radius needs both"}, 400)
+    if lat is not None and not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None, ({"status": "error", "error": "lat/lng out of range"}, 400)
+    if lat is not None and radius is None:
+        radius = 5000
+    if radius is not None and not 0 < radius <= MAX_VIBE_RADIUS:
+        return None, ({"status": "error", "error": f"radius must be between 0 and {MAX_VIBE_RADIUS} meters"}, 400)
+    if mode not in ('auto', 'exact', 'ivf'):
+        return None, ({"status": "error", "error": "mode must be 'auto', 'exact' or 'ivf'"}, 400)
+    return {'k': k, 'lat': lat, 'lng': lng, 'radius': radius, 'mode': mode}, None
+
+
+@recommendations_bp.route('/batch', methods=['POST'])
+def batch_recommendation():
+    """Top-k recommendations for many users in one call.
+
+    Takes `users` (each with an `id` and user_preferences or profile_id) and
+    either `places` shared by every user, or `candidate_sets` mapping a name
+    to a place list, with each user naming its `candidate_set`. Reviews of
+    all places are fetched once. Optional: radius, k, type_filter, and
+    noise/seed to add the /content-based random factor.
+    """
+    data = request.get_json(silent=True)
+    query, error = parse_batch_query(data)
+    if error is not None:
+        return jsonify(error[0]), error[1]
+
+    try:
+        candidate_sets, users = query['candidate_sets'], query['users']
+
+        try:
+            type_filter = request_place_filter(data)
+        except ValueError as e:
+            return jsonify({"status": "error", "error": str(e)}), 400
+
+        # One review fan-out for the places of every set
+        all_candidates = select_candidates([place for places in candidate_sets.values() for place in places], type_filter)
+        reviews_by_place = fetch_reviews_concurrently(
+            [place.get('place_id') for place in all_candidates],
+            max_workers=query['max_concurrency'],
+            deadline=query['deadline']
+        )
+
+        results = [None] * len(users)
+        for name, places in candidate_sets.items():
+            members = [i for i, user in enumerate(users) if user.get('candidate_set') == name and 'error' not in user]
+            if not members:
                 continue
+            ranked = recommend_batch([users[i]['user_preferences'] for i in members], places, reviews_by_place,
+                                     radius=query['radius'], k=query['k'], noise=query['noise'],
+                                     seed=query['seed'], type_filter=type_filter)
+            for i, recommendations in zip(members, ranked):
+                results[i] = {"id": users[i].get('id'), "status": "success", "recommendations": recommendations}
+        for i, user in enumerate(users):
+            if results[i] is None:
+                results[i] = {"id": user.get('id'), "status": "error", "error": user['error']}
 
-        # Sort by final similarity score
-        recommendations.sort(key=lambda x: x['similarity_score'], reverse=True)
-        
-        # Ensure diversity in the final recommendations
-        diverse_recommendations = diversify_recommendations(recommendations)[:10]
-        
-        print(f"Final number of recommendations: {len(diverse_recommendations)}")
-        
         return jsonify({
-            "status": "success", 
-            "recommendations": diverse_recommendations,
+            "status": "success",
+            "results": results,
             "metadata": {
-                "processed_places": len(processed_place_ids),
-                "recommended_places": len(diverse_recommendations),
-                "radius_used": radius
+                "users": len(users),
+                "processed_places": len(all_candidates),
+                "reviews_fetched": len(reviews_by_place),
+                "radius_used": query['radius']
             }
         })
-
     except Exception as e:
-        print(f"Unhandled error in recommendation: {str(e)}")
+        logger.exception("Unhandled error in batch recommendation: %s", e)
         return jsonify({"status": "error", "error": str(e)}), 500
 
+
+def parse_batch_query(data):
+    """Validated /batch request, or (None, (error_body, status)).
+
+    Users whose preferences cannot be resolved get an `error` instead of
+    failing the whole batch.
+    """
+    if (not isinstance(data, dict) or not isinstance(data.get('users'), list)
+            or ('places' in data) == ('candidate_sets' in data)):
+        return None, ({"status": "error", "error": "Invalid input data"}, 400)
+    if len(data['users']) > MAX_BATCH_USERS:
+        return None, ({"status": "error", "error": f"At most {MAX_BATCH_USERS} users per batch"}, 400)
+    candidate_sets = data['candidate_sets'] if 'candidate_sets' in data else {None: data['places']}
+    if not isinstance(candidate_sets, dict) or not all(isinstance(places, list) for places in candidate_sets.values()):
+        return None, ({"status": "error", "error": "Invalid input data"}, 400)
+    try:
+        k = int(data.get('k', MAX_RECOMMENDATIONS))
+        radius = float(data.get('radius', 5000))
+    except (TypeError, ValueError) as e:
+        return None, ({"status": "error", "error": f"Invalid parameter format: {e}"}, 400)
+    if not 1 <= k <= MAX_VIBE_MATCHES:
+        return None, ({"status": "error", "error": f"k must be between 1 and {MAX_VIBE_MATCHES}"}, 400)
+    options, error = parse_fan_out_options(data)
+    if error is None:
+        options['seed'], error = parse_seed(data)
+    if error is not None:
+        return None, error
+
+    users = []
+    for user in data['users']:
+        user = user if isinstance(user, dict) else {}
+        resolved, error = resolve_preferences(user, require_places=False)
+        if error is not None:
+            resolved = {**user, 'error': error[0]['error']}
+        elif resolved.get('candidate_set') not in candidate_sets:
+            resolved = {**resolved, 'error': "Unknown candidate_set"}
+        users.append(resolved)
+    return {'candidate_sets': candidate_sets, 'users': users, 'k': k, 'radius': radius,
+            'noise': bool(data.get('noise', False)), **options}, None
+
+
+@recommendations_bp.route('/vibe-index-stats', methods=['GET'])
+def get_vibe_index_stats():
+    """Endpoint exposing vibe index counters"""
+    return jsonify(VIBE_INDEX.stats())
+
+
+@recommendations_bp.route('/place-store-stats', methods=['GET'])
+def get_place_store_stats():
+    """Endpoint exposing place feature-vector store counters"""
+    return jsonify(PLACE_VECTOR_STORE.stats())
+
+
+def build_user_vector(user_preferences):
+    """User vector matching the place feature dimensions."""
+    return np.array([
+        user_preferences.get('valence', 0.5),
+        0.5,  # Sentiment variance weight
+        user_preferences.get('energy', 0.5),
+        0.5,  # Rating variance weight
+        user_preferences.get('loudness', 0.5),
+        user_preferences.get('ambiance', 0.5),
+        user_preferences.get('liveness', 0.5),
+        0.5  # Review count weight
+    ], dtype=float)
+
+
+def score_places(user_vector, place_matrix, distances, radius, rng=None, noise=None):
+    """Final similarity of every place (one row of place_matrix each) in one pass.
+
+    Cosine similarity against the user vector, scaled down for places further
+    away (they need a higher similarity to be included), plus Gaussian noise
+    for variety, clipped to [0, 1]. The noise is drawn from `rng` unless
+    given per place in `noise`.
+    """
+    if not len(place_matrix):
+        return np.zeros(0)
+
+    norms = np.linalg.norm(place_matrix, axis=1) * np.linalg.norm(user_vector)
+    # Row-wise reduction (not BLAS) so a place scores the same alone as in a batch
+    dots = (place_matrix * user_vector).sum(axis=1)
+    # Zero vectors get a similarity of 0, like sklearn's cosine_similarity
+    base_similarity = np.divide(dots, norms, out=np.zeros_like(dots, dtype=float), where=norms > 0)
+
+    radius = float(radius)
+    distance_factor = distances / radius if radius > 0 else np.zeros_like(base_similarity)
+    adjusted_similarity = base_similarity * (1 - (distance_factor * DISTANCE_PENALTY))
+
+    if noise is None:
+        rng = rng if rng is not None else np.random.default_rng()
+        noise = rng.normal(0, NOISE_SCALE, size=len(adjusted_similarity))
+    return np.clip(adjusted_similarity + noise, 0.0, 1.0)
+
+
+def top_k_indices(scores, k, threshold=SIMILARITY_THRESHOLD):
+    """Indices of the k best scores above the threshold, best first."""
+    eligible = np.flatnonzero(scores > threshold)
+    if len(eligible) > k:
+        eligible = eligible[np.argpartition(-scores[eligible], k - 1)[:k]]
+    return eligible[np.argsort(-scores[eligible], kind='stable')]
+
+
+def score_users_top_k(user_matrix, place_matrix, distances, radius, k, threshold=SIMILARITY_THRESHOLD,
+                      rng=None, chunk_size=None):
+    """Top-k places of every user (one row of user_matrix each), scored like score_places.
+
+    Users are scored a chunk at a time with one matrix product, so at most
+    BATCH_SCORE_CELLS scores are held at once. Noise is only added when an
+    `rng` is given. Returns one (place indices, scores) pair per user, best
+    first and above the threshold.
+    """
+    n_users, n_places = len(user_matrix), len(place_matrix)
+    if not n_places:
+        return [(np.zeros(0, dtype=int), np.zeros(0)) for _ in range(n_users)]
+
+    unit_places = unit_rows(place_matrix)
+    unit_users = unit_rows(user_matrix)
+    radius = float(radius)
+    factor = 1 - (distances / radius * DISTANCE_PENALTY) if radius > 0 else np.ones(n_places)
+    # Scale each place once instead of every user x place score
+    unit_places *= factor[:, None]
+
+    k = min(k, n_places)
+    chunk_size = chunk_size or max(1, BATCH_SCORE_CELLS // n_places)
+    results = []
+    for start in range(0, n_users, chunk_size):
+        scores = unit_users[start:start + chunk_size] @ unit_places.T
+        if rng is not None:
+            scores += rng.normal(0, NOISE_SCALE, size=scores.shape)
+        np.clip(scores, 0.0, 1.0, out=scores)
+
+        if k < n_places:
+            top = np.argpartition(scores, n_places - k, axis=1)[:, n_places - k:]
+        else:
+            top = np.broadcast_to(np.arange(n_places), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        counts = (top_scores > threshold).sum(axis=1)
+        results.extend((rows[:count], row_scores[:count]) for rows, row_scores, count in zip(top, top_scores, counts))
+    return results
+
     
 def should_exclude_place(place):
     """Exclusion logic for certain place types."""
-    place_types = place.get("types", [])
-    
-    # Split types if they are a single comma-separated string
-    if isinstance(place_types, str):
-        place_types = [t.strip().lower() for t in place_types.split(',')]
-    elif isinstance(place_types, list):
-        place_types = [t.lower() for t in place_types]
-    else:
-        place_types = []
-
-    # Debugging: Log the processed place types
-    print(f"Checking types for place {place.get('name')}: {place_types}")
+    return DEFAULT_PLACE_FILTER.excludes(place)
 
-    # Check for exclusion
-    return any(place_type in EXCLUDED_PLACE_TYPES for place_type in place_types)
 
 
+def diversify_recommendations(recommendations, diversity_threshold=DIVERSITY_WEIGHT, place_vectors=None,
+                              k=MAX_RECOMMENDATIONS):
+    """Re-rank recommendation objects by maximal marginal relevance (see diversity.py).
 
-def diversify_recommendations(recommendations, diversity_threshold=0.15):
-    """Ensure recommendations are diverse."""
+    Relevance is each object's similarity_score and similarity comes from
+    its types, plus the place feature vectors when given (one row per
+    recommendation). diversity_threshold is the weight of diversity against
+    relevance. Returns at most k of the objects, unchanged.
+    """
     if not recommendations:
         return []
-        
-    diversified = []
-    for rec in recommendations:
-        if len(diversified) < 10:  # Limit to max 10
-            diversified.append(rec)
-    
-    return diversified
+    order = mmr_select([rec['similarity_score'] for rec in recommendations], place_vectors,
+                       [rec.get('types', []) for rec in recommendations], k, diversity_threshold)
+    return [recommendations[i] for i in order]
 
 def build_recommendation_object(place, similarity_score, place_scores):
     """Build a standardized recommendation object."""
@@ -0,0 +1,130 @@
+import logging
+import re
+from types import SimpleNamespace
+import numpy as np
+from app.startup import LazyResource
+
+# Same tokenization CountVectorizer(stop_words='english') uses
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+MAX_KEYWORDS = 5
+
+logger = logging.getLogger(__name__)
+
+_selection_cache = {}
+
+
+def load_text_tools():
+    """scipy, sklearn and TextBlob take most of the app's import time, so they load on first use."""
+    from scipy.sparse import csr_matrix
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+    from textblob.en import sentiment
+    return SimpleNamespace(csr_matrix=csr_matrix, stop_words=ENGLISH_STOP_WORDS, sentiment=sentiment)
+
+
+TEXT_TOOLS = LazyResource('review_analysis', load_text_tools)
+
+
+def tokenize(text):
+    """Lowercase, tokenize and drop English stop words."""
+    stop_words = TEXT_TOOLS.get().stop_words
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in stop_words]
+
+
+def keyword_selection(n_terms, limit=MAX_KEYWORDS):
+    """Column positions CountVectorizer(max_features=limit, binary=True) keeps
+    for a single document with `n_terms` distinct terms.
+
+    Every binary count ties at 1, so the choice comes down to how numpy's
+    argsort orders equal keys. We reproduce the exact same call and memoize
+    it per vocabulary size so keywords match the per-review vectorizer.
+    """
+    selection = _selection_cache.get(n_terms)
+    if selection is None:
+        tfs = np.ones(n_terms, dtype=np.int64)
+        selection = np.sort((-tfs).argsort()[:limit])
+        _selection_cache[n_terms] = selection
+    return selection
+
+
+def build_keyword_matrix(texts):
+    """Binary document-term matrix over a shared, alphabetically ordered vocabulary."""
+    vocabulary = {}
+    indices = []
+    indptr = [0]
+    for text in texts:
+        indices.extend({vocabulary.setdefault(token, len(vocabulary)) for token in tokenize(text)})
+        indptr.append(len(indices))
+
+    feature_names = np.array(sorted(vocabulary), dtype=object)
+    # Remap first-seen ids to alphabetical ids so sorted columns read in term order
+    rank = np.empty(len(vocabulary), dtype=np.int64)
+    rank[[vocabulary[name] for name in feature_names]] = np.arange(len(vocabulary))
+    indices = rank[np.asarray(indices, dtype=np.int64)] if indices else np.zeros(0, dtype=np.int64)
+
+    matrix = TEXT_TOOLS.get().csr_matrix(
+        (np.ones(len(indices), dtype=np.int64), indices, np.asarray(indptr, dtype=np.int64)),
+        shape=(len(texts), len(feature_names))
+    )
+    matrix.sort_indices()
+    return matrix, feature_names
+
+
+def extract_review_keywords(matrix, feature_names, limit=MAX_KEYWORDS):
+    """Top keywords for every row of the document-term matrix."""
+    keywords = []
+    for row in range(matrix.shape[0]):
+        columns = matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]]
+        if len(columns) > limit:
+            columns = columns[keyword_selection(len(columns), limit)]
+        keywords.append(list(feature_names[columns]))
+    return keywords
+
+
+def score_sentiments(texts):
+    """Polarity for each text, scoring duplicate texts only once."""
+    sentiment = TEXT_TOOLS.get().sentiment
+    scores = {}
+    for text in texts:
+        if text not in scores:
+            scores[text] = sentiment(text)[0]
+    return [scores[text] for text in texts]
+
+
+def analyze_review_batches(review_lists):
+    """Analyze reviews for many places at once.
+
+    Takes a list of raw review lists (one per place) and returns a list of
+    analyzed review lists in the same order, matching what analyze_reviews
+    produces for each place on its own.
+    """
+    entries = []  # (batch index, review, text)
+    for batch, reviews in enumerate(review_lists):
+        for review in reviews:
+            text = str(review.get('text', ''))
+            if text:
+                entries.append((batch, review, text))
+
+    results = [[] for _ in review_lists]
+    if not entries:
+        return results
+
+    texts = [text for _, _, text in entries]
+    matrix, feature_names = build_keyword_matrix(texts)
+    keywords = extract_review_keywords(matrix, feature_names)
+    sentiments = score_sentiments(texts)
+
+    for (batch, review, text), review_keywords, sentiment in zip(entries, keywords, sentiments):
+        try:
+            results[batch].append({
+                'text': text,
+                'rating': float(review.get('rating', 0)) if review.get('rating') is not None else 0,
+                'sentiment': float(sentiment),
+                'keywords': ", ".join(review_keywords),
+                'time': review.get('time'),
+                'author_name': review.get('author_name', 'Anonymous')
+            })
+        except Exception as e:
+            logger.warning("Error analyzing review: %s", e)
+            continue
+
+    return results
@@ -0,0 +1,282 @@
+# vibe_index.py
+"""Top-k vibe matching over every place with a cached feature vector.
+
+Each place is a row of one matrix of unit feature vectors (the space of
+build_place_feature_vector and build_user_vector), with its coordinates
+alongside, so cosine similarity is a matrix product. A query optionally
+keeps only places within a radius (a bounding-box pass, then exact
+distances), then either scores every remaining row a block at a time or,
+when that would be more than `exact_max` rows, only the rows of the few
+IVF lists (spherical k-means clusters) whose centroids are closest to the
+user vector.
+"""
+import logging
+import math
+import os
+import threading
+import numpy as np
+from app.api.nearby_index import EARTH_RADIUS_M, place_location
+from app.metrics import register_stats
+from app.models.place_store import PLACE_VECTOR_STORE
+
+logger = logging.getLogger(__name__)
+
+FEATURE_DIM = 8
+# Queries over at most this many places are exact; larger ones use the IVF lists
+VIBE_INDEX_EXACT_MAX = int(os.getenv("VIBE_INDEX_EXACT_MAX", 20000))
+# IVF lists scanned per query
+VIBE_INDEX_NPROBE = int(os.getenv("VIBE_INDEX_NPROBE", 8))
+# Rows scored per matrix product, which bounds the scratch memory of a query
+VIBE_INDEX_BLOCK = int(os.getenv("VIBE_INDEX_BLOCK", 8192))
+# k-means is trained on a sample of this many places
+IVF_TRAIN_SAMPLE = 16384
+IVF_ITERATIONS = 10
+
+# Place fields kept for building recommendation objects
+PLACE_FIELDS = ('place_id', 'name', 'types', 'geometry', 'vicinity')
+
+
+def unit_rows(matrix):
+    """Rows scaled to unit length; zero rows stay zero (similarity 0, like score_places)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def haversine_many(lat, lng, lats, lngs):
+    """Great-circle distances in meters from one point to arrays of points."""
+    phi1, phi2 = math.radians(lat), np.radians(lats)
+    dphi = phi2 - phi1
+    dlmb = np.radians(lngs - lng)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+class VibeIndex:
+    """Place feature vectors and locations for nearest-neighbour queries.
+
+    Rows are added with add() as places get a feature vector and follow the
+    PlaceVectorStore through update(): rebuilt vectors replace the row's,
+    evicted places are removed. IVF centroids are trained lazily by the
+    first query that needs them, and retrained once the index has doubled
+    or a quarter of its rows were added or changed since.
+    """
+
+    def __init__(self, exact_max=VIBE_INDEX_EXACT_MAX, nprobe=VIBE_INDEX_NPROBE, block_size=VIBE_INDEX_BLOCK):
+        self.exact_max = exact_max
+        self.nprobe = nprobe
+        self.block_size = block_size
+        self._vectors = np.zeros((0, FEATURE_DIM), dtype=np.float32)
+        self._coords = np.zeros((0, 2))           # lat, lng in degrees
+        self._alive = np.zeros(0, dtype=bool)
+        self._places = []                         # row -> place fields
+        self._rows = {}                           # place_id -> row
+        self._free = []                           # rows of removed places, reused first
+        self._size = 0                            # rows handed out so far
+        # IVF state: centroids, and every list's rows as one array sorted by list
+        self._centroids = None
+        self._list_rows = np.zeros(0, dtype=np.int64)
+        self._list_offsets = np.zeros(1, dtype=np.int64)
+        self._unlisted = set()                    # rows added or changed since training
+        self._trained_size = 0
+        self._lock = threading.Lock()
+        self.exact_queries = 0
+        self.ivf_queries = 0
+        self.trainings = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self._alive))
+        self._vectors = np.resize(self._vectors, (capacity, FEATURE_DIM))
+        self._coords = np.resize(self._coords, (capacity, 2))
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._alive = alive
+
+    def add(self, place, vector):
+        """Index (or re-index) a place; places without a place_id or location are skipped."""
+        place_id = place.get('place_id')
+        lat, lng = place_location(place)
+        if not place_id or lat is None or lng is None:
+            return False
+        unit = unit_rows(vector)
+        with self._lock:
+            row = self._rows.get(place_id)
+            if row is None:
+                if self._free:
+                    row = self._free.pop()
+                else:
+                    if self._size == len(self._alive):
+                        self._grow()
+                    row = self._size
+                    self._size += 1
+                    self._places.append(None)
+                self._rows[place_id] = row
+            self._vectors[row] = unit
+            self._coords[row] = (float(lat), float(lng))
+            self._alive[row] = True
+            self._places[row] = {field: place.get(field) for field in PLACE_FIELDS}
+            self._unlisted.add(row)
+        return True
+
+    def update(self, place_id, vector):
+        """PlaceVectorStore listener: new vector of an indexed place, or None when it is evicted."""
+        with self._lock:
+            row = self._rows.get(place_id)
+            if row is None:
+                return
+            if vector is None:
+                del self._rows[place_id]
+                self._alive[row] = False
+                self._places[row] = None
+                self._free.append(row)
+                self._unlisted.discard(row)
+            else:
+                self._vectors[row] = unit_rows(vector)
+                self._unlisted.add(row)
+
+    def _train(self):
+        """Spherical k-means over a sample of the live rows, then sort every row into its list."""
+        live = np.flatnonzero(self._alive[:self._size])
+        nlist = max(1, int(math.sqrt(len(live))))
+        rng = np.random.default_rng(0)
+        sample = self._vectors[rng.choice(live, min(len(live), IVF_TRAIN_SAMPLE), replace=False)]
+        centroids = sample[rng.choice(len(sample), min(nlist, len(sample)), replace=False)]
+        for _ in range(IVF_ITERATIONS):
+            assignment = self._nearest_centroids(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            # Empty lists keep their centroid
+            centroids = np.where(np.linalg.norm(sums, axis=1, keepdims=True) > 0, unit_rows(sums), centroids)
+
+        assignment = self._nearest_centroids(self._vectors[live], centroids)
+        order = np.argsort(assignment, kind='stable')
+        self._centroids = centroids
+        self._list_rows = live[order]
+        self._list_offsets = np.searchsorted(assignment[order], np.arange(len(centroids) + 1))
+        self._unlisted = set()
+        self._trained_size = len(live)
+        self.trainings += 1
+        logger.debug("Trained %d IVF lists over %d places", len(centroids), len(live))
+
+    def _nearest_centroids(self, vectors, centroids):
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), self.block_size):
+            assignment[start:start + self.block_size] = np.argmax(
+                vectors[start:start + self.block_size] @ centroids.T, axis=1)
+        return assignment
+
+    def _ivf_rows(self, users):
+        """Rows in the `nprobe` lists closest to any of the user vectors, plus unlisted rows."""
+        live = len(self._rows)
+        if (self._centroids is None or live > 2 * self._trained_size
+                or len(self._unlisted) > live // 4):
+            self._train()
+        nprobe = min(self.nprobe, len(self._centroids))
+        probes = np.unique(np.argpartition(-(users @ self._centroids.T), nprobe - 1, axis=1)[:, :nprobe])
+        parts = [self._list_rows[self._list_offsets[i]:self._list_offsets[i + 1]] for i in probes]
+        parts.append(np.fromiter(self._unlisted, dtype=np.int64, count=len(self._unlisted)))
+        rows = np.unique(np.concatenate(parts))
+        # Lists keep the rows of places removed since training
+        return rows[self._alive[rows]]
+
+    def _within(self, rows, lat, lng, radius):
+        """(rows, distances) of the given rows (all live rows if None) within `radius` meters."""
+        coords = self._coords[:self._size] if rows is None else self._coords[rows]
+        dlat = math.degrees(radius / EARTH_RADIUS_M)
+        cos_lat = math.cos(math.radians(lat))
+        inside = np.abs(coords[:, 0] - lat) <= dlat
+        if rows is None:
+            inside &= self._alive[:self._size]
+        if cos_lat > 1e-6:
+            dlng = np.abs((coords[:, 1] - lng + 180) % 360 - 180)
+            inside &= dlng <= dlat / cos_lat
+        hits = np.flatnonzero(inside)
+        distances = haversine_many(lat, lng, coords[hits, 0], coords[hits, 1])
+        keep = distances <= radius
+        hits, distances = hits[keep], distances[keep]
+        return (hits if rows is None else rows[hits]), distances
+
+    def _top_k(self, users, rows, k, distances=None, radius=None, distance_penalty=0.0):
+        """Best k of `rows` for every user vector: (rows, scores), each (users x k) and best first.
+
+        Scores `block_size` rows per matrix product and keeps only the running
+        top k, so memory does not grow with the number of rows.
+        """
+        count = len(users)
+        best_rows = np.zeros((count, 0), dtype=np.int64)
+        best_scores = np.zeros((count, 0), dtype=np.float32)
+        for start in range(0, len(rows), self.block_size):
+            block = rows[start:start + self.block_size]
+            scores = users @ self._vectors[block].T
+            if distances is not None and radius:
+                scores *= (1 - distances[start:start + self.block_size] / radius * distance_penalty).astype(np.float32)
+            scores = np.concatenate([best_scores, scores], axis=1)
+            candidates = np.concatenate([best_rows, np.broadcast_to(block, (count, len(block)))], axis=1)
+            keep = min(k, scores.shape[1])
+            picked = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+            best_scores = np.take_along_axis(scores, picked, axis=1)
+            best_rows = np.take_along_axis(candidates, picked, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def search(self, user_vectors, k=10, lat=None, lng=None, radius=None, distance_penalty=0.0, mode='auto'):
+        """Best k places for every row of `user_vectors`.
+
+        With lat/lng/radius only places within `radius` meters count, and a
+        place's similarity is scaled by (1 - distance / radius * distance_penalty)
+        as in score_places. `mode` is 'auto', 'exact' or 'ivf'. Returns one
+        list per user of {'place', 'score', 'distance'} dicts, best first.
+        """
+        users = unit_rows(np.atleast_2d(user_vectors))
+        geo = lat is not None and lng is not None and radius
+        with self._lock:
+            if not self._rows or k <= 0:
+                return [[] for _ in users]
+            rows, distances = self._within(None, lat, lng, radius) if geo else (None, None)
+            candidates = len(self._rows) if rows is None else len(rows)
+            if mode == 'ivf' or (mode == 'auto' and candidates > self.exact_max):
+                self.ivf_queries += 1
+                probed = self._ivf_rows(users)
+                if geo:
+                    probed, probe_distances = self._within(probed, lat, lng, radius)
+                    # Too few in the probed lists: fall back to every place in range
+                    if len(probed) >= k:
+                        rows, distances = probed, probe_distances
+                else:
+                    rows = probed
+            else:
+                self.exact_queries += 1
+                if rows is None:
+                    rows = np.flatnonzero(self._alive[:self._size])
+
+            top_rows, top_scores = self._top_k(users, rows, k, distances, radius if geo else None, distance_penalty)
+            distance_of = dict(zip(rows.tolist(), distances.tolist())) if geo else {}
+            return [
+                [{'place': self._places[row], 'score': float(score), 'distance': distance_of.get(row)}
+                 for row, score in zip(user_rows.tolist(), user_scores.tolist())]
+                for user_rows, user_scores in zip(top_rows, top_scores)
+            ]
+
+    def query(self, user_vector, k=10, **kwargs):
+        """search() for a single user vector."""
+        return self.search(np.reshape(user_vector, (1, -1)), k, **kwargs)[0]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._rows),
+                'ivf_lists': 0 if self._centroids is None else len(self._centroids),
+                'unlisted': len(self._unlisted),
+                'exact_queries': self.exact_queries,
+                'ivf_queries': self.ivf_queries,
+                'trainings': self.trainings
+            }
+
+
+VIBE_INDEX = VibeIndex()
+PLACE_VECTOR_STORE.add_listener(VIBE_INDEX.update)
+register_stats('vibe_index', VIBE_INDEX.stats,
+               counters=('exact_queries', 'ivf_queries', 'trainings'), gauges=('entries', 'ivf_lists', 'unlisted'))
@@ -0,0 +1,130 @@
+# startup.py
+"""Lazy loading of heavy dependencies and datasets, with a readiness endpoint.
+
+Modules wrap what is expensive to set up (the scientific stack, the track
+catalog) in a LazyResource, so importing the app stays cheap. Each resource
+loads on first use, or earlier in the warm-up that create_app starts.
+STARTUP_WARMUP picks the warm-up mode:
+  background  load every resource in a daemon thread (default)
+  eager       load everything before create_app returns
+  off         only load on first use
+/ready answers 503 until every resource has loaded, so a load balancer
+only routes to warm workers.
+"""
+import logging
+import os
+import threading
+import time
+from flask import Blueprint, jsonify
+from app.metrics import register_stats
+
+bp = Blueprint('startup', __name__)
+logger = logging.getLogger(__name__)
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background").lower()
+
+# name -> LazyResource, in registration (and warm-up) order
+RESOURCES = {}
+
+_warmup_thread = None
+_warmup = {'started_at': None, 'seconds': None}
+
+
+class LazyResource:
+    """A value built by `loader()` on the first get(), once per process.
+
+    Concurrent callers wait for the one load in progress. A failed load is
+    retried by the next get().
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.load_seconds = None
+        self.error = None
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        RESOURCES[name] = self
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                try:
+                    self._value = self.loader()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.error = None
+                self._loaded = True
+                logger.info("Loaded %s in %.2fs", self.name, self.load_seconds)
+        return self._value
+
+    def status(self):
+        return {'loaded': self._loaded, 'load_seconds': self.load_seconds, 'error': self.error}
+
+
+def warm_up():
+    """Load every registered resource; failures are logged and left for first use to retry."""
+    start = time.perf_counter()
+    _warmup['started_at'] = time.time()
+    for resource in list(RESOURCES.values()):
+        try:
+            resource.get()
+        except Exception as e:
+            logger.exception("Error loading %s: %s", resource.name, e)
+    _warmup['seconds'] = time.perf_counter() - start
+    logger.info("Warm-up finished in %.2fs", _warmup['seconds'])
+
+
+def start_warmup(mode=None):
+    """Run the configured warm-up once per process."""
+    global _warmup_thread
+    mode = mode or STARTUP_WARMUP
+    if _warmup_thread is not None or mode == 'off':
+        return _warmup_thread
+    if mode == 'eager':
+        warm_up()
+        _warmup_thread = threading.current_thread()
+    else:
+        _warmup_thread = threading.Thread(target=warm_up, name='warmup', daemon=True)
+        _warmup_thread.start()
+    return _warmup_thread
+
+
+def readiness():
+    """(ready, status body); without a warm-up the app is ready as soon as it is created."""
+    resources = {name: resource.status() for name, resource in RESOURCES.items()}
+    ready = STARTUP_WARMUP == 'off' or all(status['loaded'] for status in resources.values())
+    return ready, {
+        'status': 'ready' if ready else 'starting',
+        'warmup': {'mode': STARTUP_WARMUP, **_warmup},
+        'resources': resources
+    }
+
+
+def startup_stats():
+    ready, body = readiness()
+    return {
+        'ready': int(ready),
+        'resources_loaded': sum(status['loaded'] for status in body['resources'].values()),
+        'warmup_seconds': _warmup['seconds'] or 0
+    }
+
+
+register_stats('startup', startup_stats, gauges=('ready', 'resources_loaded', 'warmup_seconds'))
+
+
+@bp.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once every lazy resource has loaded, 503 before"""
+    ready, body = readiness()
+    return jsonify(body), 200 if ready else 503
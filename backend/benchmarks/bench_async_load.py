@@ -0,0 +1,171 @@
+# benchmarks/bench_async_load.py
+"""Load test of sync (threaded WSGI) vs. async (ASGI) serving against the stub Places server.
+
+Both modes serve the same app, each in its own process: the sync server
+handles requests on a fixed pool of worker threads, like a WSGI deployment
+with N threads, while the async mode runs app.asgi under uvicorn. Every
+request uses fresh keys so caches don't hide upstream latency. Run from the backend directory:
+    python -m benchmarks.bench_async_load --requests 400 --concurrency 64 --latency 0.2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_places_server import make_places
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_sync(port, threads):
+    """Werkzeug server whose requests run on a fixed-size thread pool, like a WSGI deployment."""
+    from werkzeug.serving import BaseWSGIServer
+    from app import create_app
+
+    class PooledWSGIServer(BaseWSGIServer):
+        multithread = True
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self.handle_pooled, request, client_address)
+
+        def handle_pooled(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    PooledWSGIServer("127.0.0.1", port, create_app()).serve_forever()
+
+
+def spawn(args, port, env):
+    """Start a server in its own process so it doesn't share a GIL with the load generator."""
+    process = subprocess.Popen([sys.executable] + args, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def grid_point(i, lng=20):
+    """A distinct location per request index, kept inside valid coordinates."""
+    return -60 + (i % 1200) * 0.1, lng + (i // 1200) * 0.1
+
+
+def build_requests(count, places_per_recommendation):
+    """A mix of the four upstream-bound routes with keys no other request shares."""
+    requests = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            lat, lng = grid_point(i)
+            requests.append(("GET", "/api/places/nearby", {"lat": lat, "lng": lng, "radius": 500}, None))
+        elif kind == 1:
+            requests.append(("GET", "/api/reviews/get-reviews", {"place_id": f"load-{i}"}, None))
+        elif kind == 2:
+            requests.append(("GET", "/api/google_places/autocomplete", {"input": f"zq{i}"}, None))
+        else:
+            places = make_places(*grid_point(i, lng=-120), count=places_per_recommendation)
+            for place in places:
+                place["distance"] = 500
+            requests.append(("POST", "/api/recommendations/content-based", None, {
+                "user_preferences": {"valence": 0.6, "energy": 0.7},
+                "places": places,
+                "radius": 3000,
+                "seed": i
+            }))
+    return requests
+
+
+async def run_load(base_url, requests, concurrency):
+    import httpx
+
+    latencies, errors = [], 0
+    queue = list(reversed(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while queue:
+                method, path, params, body = queue.pop()
+                start = time.perf_counter()
+                response = await client.request(method, path, params=params, json=body)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return elapsed, sorted(latencies), errors
+
+
+def report(label, elapsed, latencies, errors):
+    p = lambda q: latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))] * 1000
+    print(f"{label:6s} requests={len(latencies):5d} errors={errors:3d} "
+          f"throughput={len(latencies) / elapsed:7.1f} req/s  p50={p(50):7.1f} ms  p95={p(95):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=8, help="worker threads of the sync server")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--places", type=int, default=5, help="places per recommendation request")
+    parser.add_argument("--serve-sync", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_sync:
+        serve_sync(args.serve_sync, args.threads)
+        return
+
+    stub_port, sync_port, async_port = free_port(), free_port(), free_port()
+    env = dict(
+        os.environ,
+        GOOGLE_PLACES_BASE_URL=f"http://127.0.0.1:{stub_port}",
+        UPSTREAM_RATE_LIMIT="0",
+        PLACE_REFRESH_INTERVAL="0",
+        PYTHONPATH=os.getcwd(),
+    )
+    processes = [
+        spawn(["-m", "benchmarks.stub_places_server", "--port", str(stub_port), "--latency", str(args.latency)],
+              stub_port, env),
+        spawn(["-m", "benchmarks.bench_async_load", "--serve-sync", str(sync_port), "--threads", str(args.threads)],
+              sync_port, env),
+        spawn(["-m", "uvicorn", "app.asgi:app", "--port", str(async_port), "--log-level", "warning"],
+              async_port, env),
+    ]
+
+    print(f"upstream latency={args.latency}s concurrency={args.concurrency} sync threads={args.threads}")
+    try:
+        for label, port, offset in (("sync", sync_port, 0), ("async", async_port, args.requests)):
+            requests = build_requests(args.requests + offset, args.places)[offset:]
+            report(label, *asyncio.run(run_load(f"http://127.0.0.1:{port}", requests, args.concurrency)))
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
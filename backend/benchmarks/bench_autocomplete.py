@@ -0,0 +1,88 @@
+# benchmarks/bench_autocomplete.py
+"""Upstream calls and keystroke latency of autocomplete with and without the cache.
+
+Simulated users type place names one character at a time, several of them
+concurrently. Run from the backend directory:
+    python -m benchmarks.bench_autocomplete --users 20 --latency 0.1
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_places_server import SAMPLE_LOCATIONS, start_stub_server
+
+QUERIES = [name.lower() for name in SAMPLE_LOCATIONS]
+
+
+def keystrokes(query):
+    return [query[:i] for i in range(1, len(query) + 1)]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def run_users(type_one, sessions, users):
+    """Type every session's keystrokes in parallel; returns per-keystroke latencies."""
+    def session(query):
+        latencies = []
+        for text in keystrokes(query):
+            start = time.perf_counter()
+            type_one(text)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        return [latency for latencies in pool.map(session, sessions) for latency in latencies]
+
+
+def report(label, latencies, upstream_calls):
+    print(f"{label:10s} keystrokes={len(latencies):5d} upstream={upstream_calls:5d} "
+          f"p50={percentile(latencies, 50) * 1000:7.1f} ms  p95={percentile(latencies, 95) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=200, help="queries typed in total")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency, jitter=args.jitter)
+    os.environ["GOOGLE_PLACES_BASE_URL"] = base_url
+    os.environ["UPSTREAM_RATE_LIMIT"] = "0"
+    os.environ["PLACE_REFRESH_INTERVAL"] = "0"
+
+    # Import after the environment points at the stub
+    from app import create_app
+    from app.api.upstream import google_get
+    from app.api.autocomplete_cache import AUTOCOMPLETE_CACHE
+
+    rng = random.Random(args.seed)
+    # Popular places are typed more often, like real traffic
+    sessions = rng.choices(QUERIES, weights=[1 / (i + 1) for i in range(len(QUERIES))], k=args.sessions)
+
+    server.request_count = 0
+    latencies = run_users(lambda text: google_get('autocomplete', {'input': text}).json(), sessions, args.users)
+    report("uncached", latencies, server.request_count)
+
+    client = create_app().test_client()
+    AUTOCOMPLETE_CACHE.clear()
+    server.request_count = 0
+    latencies = run_users(
+        lambda text: client.get('/api/google_places/autocomplete', query_string={'input': text}).get_json(),
+        sessions, args.users
+    )
+    report("cached", latencies, server.request_count)
+    print(client.get('/api/google_places/cache-stats').get_json())
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
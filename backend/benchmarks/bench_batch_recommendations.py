@@ -0,0 +1,64 @@
+# benchmarks/bench_batch_recommendations.py
+"""Batch scoring: N users x M places, chunked matrix products vs. one /content-based scoring per user.
+
+Synthetic feature vectors and distances; peak memory is what tracemalloc
+sees numpy allocate during the batch. Run from the backend directory:
+    python -m benchmarks.bench_batch_recommendations --users 1000 10000 --places 500 5000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.models.recommendation import (
+    MAX_RECOMMENDATIONS, build_user_vector, score_places, score_users_top_k, top_k_indices
+)
+
+
+def per_user(users, places, distances, radius, k):
+    """The /content-based path once per user, without noise."""
+    zeros = np.zeros(len(places))
+    return [top_k_indices(score_places(user, places, distances, radius, noise=zeros), k) for user in users]
+
+
+def timed(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds * 1000, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--places", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--k", type=int, default=MAX_RECOMMENDATIONS)
+    parser.add_argument("--radius", type=float, default=5000)
+    parser.add_argument("--loop-users", type=int, default=1000, help="users timed for the per-user loop")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'users':>6s} {'places':>6s} {'per-user loop':>14s} {'batch':>9s} {'speedup':>8s} {'batch peak':>11s}")
+    for n_places in args.places:
+        places = rng.random((n_places, 8))
+        distances = rng.uniform(0, args.radius, n_places)
+        for n_users in args.users:
+            users = np.array([build_user_vector(dict(zip(('valence', 'energy', 'loudness'), row)))
+                              for row in rng.random((n_users, 3))])
+
+            sample = users[:args.loop_users]
+            expected, loop_ms, _ = timed(lambda: per_user(sample, places, distances, args.radius, args.k))
+            loop_ms *= n_users / len(sample)
+            batch, batch_ms, peak = timed(lambda: score_users_top_k(users, places, distances, args.radius, args.k))
+            assert all(np.array_equal(rows, want) for (rows, _), want in zip(batch, expected))
+
+            print(f"{n_users:6d} {n_places:6d} {loop_ms:11.1f} ms {batch_ms:6.1f} ms {loop_ms / batch_ms:7.1f}x "
+                  f"{peak:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_diversity.py
+"""MMR re-ranking: time to pick the top 10 of n scored places, and how diverse the picks are.
+
+Synthetic places get random feature vectors and 1-3 types out of a small
+set, plus the generic Google types. Diversity of a top-10 list is reported
+as the number of distinct types and the mean pairwise similarity (as used
+by the re-ranker), against the plain score order.
+Run from the backend directory:
+    python -m benchmarks.bench_diversity --sizes 100 1000 5000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.models.diversity import TYPE_WEIGHT, TypeOverlap, feature_rows, mmr_select
+from app.models.recommendation import DIVERSITY_WEIGHT, MAX_RECOMMENDATIONS
+
+TYPES = ("cafe restaurant bar bakery park museum art_gallery book_store clothing_store movie_theater "
+         "bowling_alley gym spa zoo aquarium amusement_park meal_takeaway shopping_mall").split()
+
+
+def synthetic_places(size, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.random((size, 8))
+    # A few popular types so the best-scoring places cluster, as in real searches
+    weights = 1 / np.arange(1, len(TYPES) + 1)
+    types = [list(map(str, rng.choice(TYPES, size=rng.integers(1, 4), replace=False, p=weights / weights.sum())))
+             + ["point_of_interest", "establishment"] for _ in range(size)]
+    relevance = np.clip(rng.normal(0.6, 0.2, size), 0, 1)
+    return relevance, vectors, types
+
+
+def diversity(indices, vectors, types):
+    features = feature_rows(vectors)
+    overlap = TypeOverlap(types)
+    similarity = np.array([(1 - TYPE_WEIGHT) * (features[indices] @ features[i]) + TYPE_WEIGHT * overlap.to(i)[indices]
+                           for i in indices])
+    pairs = similarity[np.triu_indices(len(indices), 1)]
+    distinct = len({t for i in indices for t in types[i]} - {"point_of_interest", "establishment"})
+    return distinct, pairs.mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--k", type=int, default=MAX_RECOMMENDATIONS)
+    parser.add_argument("--diversity", type=float, default=DIVERSITY_WEIGHT)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'places':>6s} {'mmr p50':>9s} {'types top-k':>12s} {'types mmr':>10s} "
+          f"{'sim top-k':>10s} {'sim mmr':>8s}")
+    for size in args.sizes:
+        relevance, vectors, types = synthetic_places(size)
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            picked = mmr_select(relevance, vectors, types, args.k, args.diversity)
+            times.append(time.perf_counter() - start)
+        plain = np.argsort(-relevance, kind='stable')[:args.k]
+        plain_types, plain_similarity = diversity(plain, vectors, types)
+        mmr_types, mmr_similarity = diversity(picked, vectors, types)
+        print(f"{size:6d} {np.median(times) * 1000:6.2f} ms {plain_types:12d} {mmr_types:10d} "
+              f"{plain_similarity:10.3f} {mmr_similarity:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
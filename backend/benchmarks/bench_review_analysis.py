@@ -0,0 +1,95 @@
+# benchmarks/bench_review_analysis.py
+"""Microbenchmark: per-review CountVectorizer/TextBlob vs. batched analysis.
+
+Run from the backend directory:
+    python -m benchmarks.bench_review_analysis --sizes 10 1000 100000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from textblob import TextBlob
+
+from app.models.review_analysis import analyze_review_batches
+
+WORDS = (
+    "great good bad terrible amazing cozy loud quiet friendly rude slow fast "
+    "coffee food drinks music staff service price table patio crowd vibe "
+    "clean dirty busy peaceful exciting fun chill relaxed expensive cheap "
+    "the and was were it is we our they very really but so too with for of"
+).split()
+
+
+def make_corpus(size, seed=0):
+    """Synthetic Place Details reviews with a mix of lengths."""
+    rng = random.Random(seed)
+    return [
+        {
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 80))).capitalize() + ".",
+            "rating": rng.randint(1, 5),
+            "time": 1700000000 + i,
+            "author_name": f"Reviewer {i}",
+        }
+        for i in range(size)
+    ]
+
+
+def legacy_analyze_reviews(reviews):
+    """The original per-review implementation, kept as the reference."""
+    analyzed_reviews = []
+    for review in reviews:
+        text = str(review.get('text', ''))
+        if not text:
+            continue
+        sentiment = TextBlob(text).sentiment.polarity
+        vectorizer = CountVectorizer(stop_words='english', max_features=5, min_df=1, binary=True)
+        try:
+            keyword_matrix = vectorizer.fit_transform([text.lower()])
+            feature_names = vectorizer.get_feature_names_out()
+            keyword_scores = np.asarray(keyword_matrix.sum(axis=0)).ravel()
+            keywords = [feature_names[i] for i in range(len(feature_names)) if keyword_scores[i] > 0]
+        except Exception:
+            keywords = []
+        analyzed_reviews.append({
+            'text': text,
+            'rating': float(review.get('rating', 0)) if review.get('rating') is not None else 0,
+            'sentiment': float(sentiment),
+            'keywords': ", ".join(keywords),
+            'time': review.get('time'),
+            'author_name': review.get('author_name', 'Anonymous')
+        })
+    return analyzed_reviews
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=2000,
+                        help="cap on reviews run through the slow reference; larger sizes are extrapolated")
+    parser.add_argument("--places", type=int, default=5, help="reviews per place in the batched run")
+    args = parser.parse_args()
+
+    print(f"{'reviews':>8} {'legacy ms':>12} {'batch ms':>10} {'speedup':>8}  match")
+    for size in args.sizes:
+        corpus = make_corpus(size)
+        per_place = [corpus[i:i + args.places] for i in range(0, size, args.places)]
+
+        sample = corpus[:min(size, args.legacy_max)]
+        start = time.perf_counter()
+        expected = legacy_analyze_reviews(sample)
+        legacy = (time.perf_counter() - start) * size / len(sample)
+
+        start = time.perf_counter()
+        batched = analyze_review_batches(per_place)
+        batch = time.perf_counter() - start
+
+        flat = [review for place in batched for review in place]
+        match = flat[:len(expected)] == expected
+        note = "" if len(sample) == size else " (legacy extrapolated)"
+        print(f"{size:>8} {legacy * 1000:>12.1f} {batch * 1000:>10.1f} {legacy / batch:>7.1f}x  {match}{note}")
+
+
+if __name__ == "__main__":
+    main()
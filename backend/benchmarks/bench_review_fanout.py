@@ -0,0 +1,68 @@
+# benchmarks/bench_review_fanout.py
+"""Sequential vs. concurrent review fetching against the stub Places server.
+
+Run from the backend directory:
+    python -m benchmarks.bench_review_fanout --places 20 --latency 0.2
+"""
+import argparse
+import os
+import time
+
+from benchmarks.stub_places_server import start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--places", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--slow", type=int, default=2, help="number of places that stall past the deadline")
+    parser.add_argument("--deadline", type=float, default=2.0)
+    args = parser.parse_args()
+
+    place_ids = [f"bench-place-{i}" for i in range(args.places)]
+    server, base_url = start_stub_server(
+        latency=args.latency,
+        jitter=args.jitter,
+        slow_place_ids=place_ids[:args.slow],
+        slow_latency=args.deadline * 2,
+    )
+    os.environ["GOOGLE_PLACES_BASE_URL"] = base_url
+    os.environ["REVIEW_FETCH_CONCURRENCY"] = str(args.concurrency)
+
+    # Import after the environment points at the stub
+    from app.api import reviews
+
+    fast_ids = place_ids[args.slow:]
+    reviews.REVIEW_CACHE.clear()
+    start = time.perf_counter()
+    for place_id in fast_ids:
+        reviews.get_google_reviews(place_id)
+    sequential = time.perf_counter() - start
+
+    reviews.REVIEW_CACHE.clear()
+    start = time.perf_counter()
+    results = reviews.fetch_reviews_concurrently(fast_ids)
+    concurrent = time.perf_counter() - start
+
+    reviews.REVIEW_CACHE.clear()
+    start = time.perf_counter()
+    partial = reviews.fetch_reviews_concurrently(place_ids, deadline=args.deadline)
+    with_stragglers = time.perf_counter() - start
+
+    print(f"places={len(fast_ids)} latency={args.latency}s concurrency={args.concurrency}")
+    print(f"sequential:  {sequential * 1000:8.1f} ms")
+    print(f"concurrent:  {concurrent * 1000:8.1f} ms  ({sequential / concurrent:.1f}x, {len(results)} places)")
+    print(f"deadline {args.deadline}s with {args.slow} stalled places: "
+          f"{with_stragglers * 1000:8.1f} ms, {len(partial)}/{len(place_ids)} places returned")
+
+    start = time.perf_counter()
+    reviews.fetch_reviews_concurrently(fast_ids)
+    print(f"warm cache:  {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_startup.py
+"""Worker cold start: time to create the app and time until /ready, per warm-up mode.
+
+Every sample is a fresh interpreter, like a newly forked worker. With
+--profile, also prints the slowest imports of `import app` (cumulative,
+from python -X importtime). Run from the backend directory:
+    python -m benchmarks.bench_startup --modes background eager off --profile
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in the child interpreter; prints its timings as one JSON line
+CHILD = """
+import json, time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+created = time.perf_counter() - start
+client = app.test_client()
+while client.get('/ready').status_code != 200:
+    time.sleep(0.005)
+ready = time.perf_counter() - start
+# First request that needs the text analysis stack and the track catalog
+client.get('/api/spotify/available-tracks?query=love&limit=5')
+from app.models.review_analysis import analyze_review_batches
+analyze_review_batches([[{'text': 'Great coffee and friendly staff', 'rating': 5}]])
+print(json.dumps({'create_app': created, 'ready': ready, 'first_use': time.perf_counter() - start}))
+"""
+
+
+def run_child(mode):
+    env = {**os.environ, "STARTUP_WARMUP": mode, "PRECOMPUTE_TILES": "", "PLACE_REFRESH_INTERVAL": "0",
+           "LOG_LEVEL": "WARNING"}
+    output = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def import_profile(top):
+    """(cumulative ms, module) of the slowest imports of `import app`, warm-up off."""
+    env = {**os.environ, "STARTUP_WARMUP": "off"}
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], env=env,
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["background", "eager", "off"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--profile", action="store_true", help="print the slowest imports")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        samples = [run_child(mode) for _ in range(args.repeat)]
+        median = {key: statistics.median(sample[key] for sample in samples) * 1000 for key in samples[0]}
+        print(f"{mode:10s} create_app {median['create_app']:8.1f} ms  ready {median['ready']:8.1f} ms  "
+              f"first use done {median['first_use']:8.1f} ms")
+
+    if args.profile:
+        print("\nSlowest imports of `import app` (cumulative):")
+        for ms, name in import_profile(args.top):
+            print(f"{ms:9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# benchmarks/bench_suite.py
+"""Offline benchmark suite for the recommendation pipeline, with JSON output.
+
+Runs the app in-process against the stub Places server replaying
+benchmarks/fixtures, so no network or API key is needed, and measures:
+  * latency and throughput of /api/recommendations/content-based and
+    /api/places/nearby (cold and warm caches) and of the Spotify endpoints
+  * microbenchmarks of analyze_reviews, build_place_feature_vector,
+    extract_keywords, create_track_data and select_candidates
+Compare a run against a baseline with benchmarks.compare. Run from the backend directory:
+    python -m benchmarks.bench_suite --output results.json
+    python -m benchmarks.compare baseline.json results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from benchmarks.stub_places_server import fixture_places, load_fixtures, start_stub_server
+
+
+def summarize(seconds, elapsed=None):
+    """Latency percentiles in milliseconds, plus throughput when the wall time is known."""
+    seconds = sorted(seconds)
+    pick = lambda q: seconds[min(len(seconds) - 1, int(q / 100 * len(seconds)))] * 1000
+    result = {
+        "samples": len(seconds),
+        "mean_ms": sum(seconds) / len(seconds) * 1000,
+        "min_ms": seconds[0] * 1000,
+        "p50_ms": pick(50),
+        "p95_ms": pick(95),
+    }
+    if elapsed:
+        result["throughput_rps"] = len(seconds) / elapsed
+    return result
+
+
+def run_endpoint(app, make_request, count, concurrency, warmup=0):
+    """Send `count` requests built by make_request(i) -> (method, url, json body) on `concurrency` threads."""
+    def send(i):
+        method, url, body = make_request(i)
+        start = time.perf_counter()
+        response = app.test_client().open(url, method=method, json=body)
+        return time.perf_counter() - start, response.status_code
+
+    for i in range(warmup):
+        send(i)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, range(warmup, warmup + count)))
+    elapsed = time.perf_counter() - start
+    return {
+        **summarize([seconds for seconds, _ in results], elapsed),
+        "errors": sum(status != 200 for _, status in results),
+        "concurrency": concurrency,
+    }
+
+
+def run_micro(fn, repeat, number):
+    """Per-call time of fn() over `repeat` rounds of `number` calls, after one warm-up call."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return summarize(timings)
+
+
+def grid_point(i, center):
+    """A distinct location per request index, about 1 km apart, near the fixture center."""
+    return center["lat"] + (i % 50) * 0.01, center["lng"] + (i // 50) * 0.01
+
+
+def as_frontend_places(places, distance=500):
+    """Places the way the frontend posts them: /nearby's comma-separated types plus a distance."""
+    return [
+        {**place, "types": ", ".join(t.replace("_", " ") for t in place["types"]), "distance": distance}
+        for place in places
+    ]
+
+
+def endpoint_cases(fixtures):
+    center = fixtures["center"]
+    warm_places = as_frontend_places(fixture_places(fixtures, center["lat"], center["lng"]))
+
+    def recommendation_body(places):
+        return {"user_preferences": {"valence": 0.6, "energy": 0.7, "loudness": 0.5}, "places": places,
+                "radius": 3000, "seed": 7}
+
+    def cold_recommendation(i):
+        places = as_frontend_places(fixture_places(fixtures, *grid_point(i, center)))
+        return "POST", "/api/recommendations/content-based", recommendation_body(places)
+
+    def nearby(lat, lng):
+        return "GET", f"/api/places/nearby?lat={lat}&lng={lng}&radius=800", None
+
+    return {
+        # Every request has places (and reviews) no earlier request fetched
+        "content_based_cold": cold_recommendation,
+        "content_based_warm": lambda i: ("POST", "/api/recommendations/content-based", recommendation_body(warm_places)),
+        "nearby_cold": lambda i: nearby(*grid_point(i + 5000, center)),
+        "nearby_warm": lambda i: nearby(center["lat"], center["lng"]),
+        "spotify_data_page": lambda i: ("GET", "/api/spotify/data?offset=0&limit=100", None),
+        "spotify_available_tracks": lambda i: ("GET", "/api/spotify/available-tracks?query=love&limit=50", None),
+        "spotify_random_profile": lambda i: ("GET", "/api/spotify/random-profile", None),
+        "spotify_custom_profile": lambda i: ("POST", "/api/spotify/custom-profile",
+                                             {"tracks": ["Flowers", "Kill Bill", "As It Was", "Anti-Hero"]}),
+    }
+
+
+def micro_cases(fixtures):
+    from app.api.reviews import analyze_reviews
+    from app.api.spotify import TRACKS, create_track_data
+    from app.models.content_based import build_place_feature_vector, extract_keywords
+    from app.models.recommendation import select_candidates
+
+    raw_reviews = fixtures["details"][sorted(fixtures["details"])[0]]
+    analyzed = analyze_reviews(raw_reviews)
+    texts = [review["text"] for reviews in fixtures["details"].values() for review in reviews]
+    rows = TRACKS.get().store.ids[:20]
+    center = fixtures["center"]
+    nearby_places = as_frontend_places(fixture_places(fixtures, center["lat"], center["lng"])) * 10
+    return {
+        "analyze_reviews": lambda: analyze_reviews(raw_reviews),
+        "build_place_feature_vector": lambda: build_place_feature_vector(analyzed),
+        "extract_keywords": lambda: extract_keywords(texts),
+        "create_track_data": lambda: create_track_data(rows),
+        "select_candidates": lambda: select_candidates(nearby_places),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--requests", type=int, default=40, help="requests per endpoint case")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub upstream latency in seconds")
+    parser.add_argument("--repeat", type=int, default=20, help="rounds per microbenchmark")
+    parser.add_argument("--number", type=int, default=10, help="calls per microbenchmark round")
+    parser.add_argument("--only", nargs="*", help="run only these cases")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    server, base_url = start_stub_server(latency=args.latency, fixtures=fixtures)
+    os.environ.update({
+        "GOOGLE_PLACES_BASE_URL": base_url,
+        "UPSTREAM_RATE_LIMIT": "0",
+        "PLACE_REFRESH_INTERVAL": "0",
+        "PRECOMPUTE_TILES": "",
+        "REVIEW_CACHE_BACKEND": "memory",
+        "RECOMMENDATION_SEED": "7",
+        # Load the lazy dependencies up front so cold cases measure caches, not imports
+        "STARTUP_WARMUP": "eager",
+    })
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    # Import after the environment points at the stub
+    from app import create_app
+    app = create_app()
+
+    selected = lambda name: not args.only or name in args.only
+    results = {}
+    for name, make_request in endpoint_cases(fixtures).items():
+        if selected(name):
+            # Warm cases get one request first so every measured request hits the caches
+            warmup = 1 if name.endswith("_warm") else 0
+            results[name] = {"kind": "endpoint", **run_endpoint(app, make_request, args.requests, args.concurrency,
+                                                                 warmup)}
+            print(f"{name:28s} p50={results[name]['p50_ms']:8.2f} ms  p95={results[name]['p95_ms']:8.2f} ms  "
+                  f"{results[name]['throughput_rps']:7.1f} req/s  errors={results[name]['errors']}")
+    for name, fn in micro_cases(fixtures).items():
+        if selected(name):
+            results[name] = {"kind": "micro", **run_micro(fn, args.repeat, args.number)}
+            print(f"{name:28s} p50={results[name]['p50_ms']:8.3f} ms  min={results[name]['min_ms']:8.3f} ms")
+    server.shutdown()
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_track_search.py
+"""Track search: prebuilt prefix index vs. the old pandas str.contains scan.
+
+Synthetic catalogs are made by recombining words from the real dataset.
+Run from the backend directory:
+    python -m benchmarks.bench_track_search --sizes 1000 100000 1000000
+The 10M-track target is a size of its own, since building its index takes
+roughly 2.3 GB of memory per million tracks (about 23 GB at 10M):
+    python -m benchmarks.bench_track_search --sizes 10000000
+The pandas scan is skipped above --scan-max-size (it takes seconds per query there).
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.api.track_search import TrackSearchIndex, normalize
+from app.api.track_store import load_track_store
+
+
+def make_catalog(size, words, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array(words, dtype=object)
+
+    def names(min_words, max_words):
+        lengths = rng.integers(min_words, max_words + 1, size=size)
+        picks = words[rng.integers(0, len(words), size=lengths.sum())]
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        return np.array([" ".join(picks[bounds[i]:bounds[i + 1]]).title() for i in range(size)], dtype=str)
+
+    return {
+        'track_name': names(1, 5),
+        'artist(s)_name': names(1, 3),
+        'streams': rng.integers(0, 10 ** 9, size=size),
+        'in_spotify_playlists': rng.integers(0, 50000, size=size),
+    }
+
+
+def make_queries(words, count, seed=1):
+    """Typing-style queries: prefixes of one or two words."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        first = rng.choice(words)
+        query = first[:rng.randint(1, len(first))]
+        if rng.random() < 0.3:
+            second = rng.choice(words)
+            query = f"{first} {second[:rng.randint(1, len(second))]}"
+        queries.append(query)
+    return queries
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    return f"p50 {np.percentile(samples, 50):8.3f} ms  p99 {np.percentile(samples, 99):8.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--scan-queries", type=int, default=20, help="queries run through the slow pandas scan")
+    parser.add_argument("--scan-max-size", type=int, default=2000000, help="largest catalog the pandas scan runs on")
+    parser.add_argument("--k", type=int, default=50)
+    args = parser.parse_args()
+
+    store = load_track_store()
+    words = sorted({w for text in np.concatenate([store.track_names, store.artists]) for w in normalize(text).split()
+                    if len(w) > 1})
+    queries = make_queries(words, args.queries)
+
+    for size in args.sizes:
+        catalog = make_catalog(size, words)
+        start = time.perf_counter()
+        index = TrackSearchIndex(catalog['track_name'], catalog['artist(s)_name'],
+                                 catalog['streams'], catalog['in_spotify_playlists'])
+        build = time.perf_counter() - start
+
+        index_times = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, k=args.k)
+            index_times.append(time.perf_counter() - start)
+
+        scan_queries = queries[:args.scan_queries] if size <= args.scan_max_size else []
+        if scan_queries:
+            frame = pd.DataFrame({'track_name': catalog['track_name'], 'artist(s)_name': catalog['artist(s)_name']})
+        scan_times = []
+        for query in scan_queries:
+            start = time.perf_counter()
+            q = query.lower()
+            frame[frame['track_name'].str.lower().str.contains(q, regex=False) |
+                  frame['artist(s)_name'].str.lower().str.contains(q, regex=False)].to_dict('records')
+            scan_times.append(time.perf_counter() - start)
+
+        print(f"tracks={size:>9}  index build {build:7.2f} s")
+        print(f"  index  {percentiles(index_times)}  ({len(index_times)} queries)")
+        if scan_times:
+            print(f"  pandas {percentiles(scan_times)}  ({len(scan_times)} queries)")
+
+
+if __name__ == "__main__":
+    main()
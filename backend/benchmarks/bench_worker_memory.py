@@ -0,0 +1,161 @@
+# benchmarks/bench_worker_memory.py
+"""Memory per gunicorn worker for 1, 4 and 16 workers, track store memory-mapped vs. copied.
+
+Starts gunicorn with gunicorn.conf.py, waits until every worker has loaded
+the app (STARTUP_WARMUP=eager) and gone idle, sends some catalog traffic,
+then reads /proc/<pid>/smaps_rollup of each worker (Linux only):
+  RSS  resident pages, shared ones counted in every worker
+  PSS  shared pages split between the processes mapping them
+  USS  pages private to the worker
+"track files" is the PSS of the memory-mapped cache files. Use
+--synthetic-tracks to measure a catalog much larger than the bundled one.
+Run from the backend directory:
+    python -m benchmarks.bench_worker_memory --workers 1 4 16 --synthetic-tracks 200000
+"""
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+
+from app.api.track_store import FEATURE_COLUMNS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORDS = ("love night summer dance heart fire rain blue gold dream wild city moon baby girl boy star river "
+         "road home time light dark sweet honey money party queen king ghost angel devil sky ocean").split()
+
+
+def write_synthetic_csv(path, size, seed=0):
+    """A Spotify-2023-shaped CSV with `size` made-up tracks."""
+    import pandas as pd
+    rng = random.Random(seed)
+    name = lambda low, high: " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).title()
+    generator = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'track_name': [name(1, 5) for _ in range(size)],
+        'artist(s)_name': [name(1, 3) for _ in range(size)],
+        'streams': generator.integers(0, 10 ** 9, size=size),
+        'in_spotify_playlists': generator.integers(0, 50000, size=size),
+        **{column: generator.integers(0, 101, size=size) for column in FEATURE_COLUMNS},
+    })
+    frame.to_csv(path, index=False, encoding='latin1')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def worker_pids(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def cpu_ticks(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return int(fields[11]) + int(fields[12])
+
+
+def wait_until_idle(master_pid, workers, timeout):
+    """Wait for `workers` children that used no CPU for a second."""
+    deadline = time.time() + timeout
+    previous = None
+    while time.time() < deadline:
+        time.sleep(1)
+        try:
+            pids = worker_pids(master_pid)
+            ticks = {pid: cpu_ticks(pid) for pid in pids}
+        except OSError:
+            continue
+        if len(pids) == workers and ticks == previous:
+            return pids
+        previous = ticks
+    raise TimeoutError(f"{workers} workers did not settle within {timeout}s")
+
+
+def memory_kb(pid):
+    """(RSS, PSS, USS, PSS of the track cache files) of a process in kB."""
+    rollup = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                rollup[parts[0].rstrip(":")] = int(parts[1])
+    track_pss = 0
+    in_track_file = False
+    with open(f"/proc/{pid}/smaps") as f:
+        for line in f:
+            first = line.split(None, 1)[0]
+            if not first.endswith(":"):
+                in_track_file = ".trackstore" in line
+            elif in_track_file and first == "Pss:":
+                track_pss += int(line.split()[1])
+    uss = rollup["Private_Clean"] + rollup["Private_Dirty"]
+    return rollup["Rss"], rollup["Pss"], uss, track_pss
+
+
+def measure(workers, mmap, csv_path, requests_per_worker, timeout):
+    port = free_port()
+    env = {
+        **os.environ,
+        "TRACK_STORE_MMAP": "1" if mmap else "0",
+        "STARTUP_WARMUP": "eager",
+        "PLACE_REFRESH_INTERVAL": "0",
+        "PRECOMPUTE_TILES": "",
+        "LOG_LEVEL": "WARNING",
+    }
+    if csv_path:
+        env["SPOTIFY_CSV_PATH"] = csv_path
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", str(workers),
+         "--bind", f"127.0.0.1:{port}", "--timeout", str(timeout), "--log-level", "warning", "app.main:app"],
+        cwd=BACKEND_DIR, env=env
+    )
+    try:
+        wait_until_idle(server.pid, workers, timeout)
+        for i in range(workers * requests_per_worker):
+            path = ("/api/spotify/data?offset=0&limit=500" if i % 2 else
+                    f"/api/spotify/available-tracks?query={WORDS[i % len(WORDS)][:2]}&limit=50")
+            urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=60).read()
+        pids = wait_until_idle(server.pid, workers, timeout)
+        return np.array([memory_kb(pid) for pid in pids]) / 1024
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--modes", nargs="+", default=["mmap", "copy"], choices=["mmap", "copy"])
+    parser.add_argument("--synthetic-tracks", type=int, default=0, help="0 uses the bundled dataset")
+    parser.add_argument("--requests", type=int, default=10, help="catalog requests per worker")
+    parser.add_argument("--timeout", type=int, default=600, help="seconds for workers to start")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = None
+        if args.synthetic_tracks:
+            csv_path = os.path.join(tmp, "tracks.csv")
+            write_synthetic_csv(csv_path, args.synthetic_tracks)
+
+        print(f"{'mode':5s} {'workers':>7s} {'RSS/worker':>11s} {'PSS/worker':>11s} {'USS/worker':>11s} "
+              f"{'track files':>12s} {'total PSS':>10s}  (MiB)")
+        for mode in args.modes:
+            for workers in args.workers:
+                usage = measure(workers, mode == "mmap", csv_path, args.requests, args.timeout)
+                rss, pss, uss, track = usage.mean(axis=0)
+                print(f"{mode:5s} {workers:7d} {rss:11.1f} {pss:11.1f} {uss:11.1f} {track:12.1f} "
+                      f"{usage[:, 1].sum():10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/compare.py
+"""Compare a bench_suite result file with a baseline and flag regressions.
+
+A case regresses when its p50 latency grows, or its throughput drops, by
+more than --threshold (relative). Exits with status 1 if any case regressed
+so CI can fail the build. Run from the backend directory:
+    python -m benchmarks.compare baseline.json results.json --threshold 0.15
+"""
+import argparse
+import json
+import sys
+
+# metric -> True when a larger value is better
+METRICS = {"p50_ms": False, "throughput_rps": True}
+
+
+def compare(baseline, current, threshold):
+    """Rows of (case, metric, baseline value, current value, relative change, regressed)."""
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in result or metric not in before or not before[metric]:
+                continue
+            change = (result[metric] - before[metric]) / before[metric]
+            regressed = -change > threshold if higher_is_better else change > threshold
+            rows.append((name, metric, before[metric], result[metric], change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    for name, metric, before, after, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:28s} {metric:15s} {before:10.3f} -> {after:10.3f}  {change:+7.1%}  {flag}")
+
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"Not in current run: {', '.join(missing)}")
+
+    regressions = [row for row in rows if row[-1]]
+    print(f"{len(regressions)} regression(s) over {args.threshold:.0%} "
+          f"(baseline {baseline['meta'].get('commit')}, current {current['meta'].get('commit')})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# benchmarks/stub_places_server.py
+"""Local stand-in for the Google Places API with artificial latency.
+
+Point the backend at it by setting GOOGLE_PLACES_BASE_URL to the URL
+returned by start_stub_server() before importing the app. Responses are
+synthetic, or replayed from the fixtures in benchmarks/fixtures when
+started with fixtures=load_fixtures().
+"""
+import json
+import os
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "google_places.json")
+
+SAMPLE_REVIEW_TEXTS = [
+    "Great coffee and a cozy atmosphere, the staff were friendly and quick.",
+    "Way too loud on weekends but the music was fun and the drinks were good.",
+    "Quiet and peaceful spot to read, prices are a little high though.",
+    "Busy place with an exciting crowd, service was slow but food was tasty.",
+    "Terrible experience, the tables were dirty and nobody came to help us.",
+    "Lovely patio, relaxed vibe, would come back with friends.",
+    "Live band every Friday, energetic and packed, get there early.",
+    "Average food, nothing special, but the location is convenient.",
+]
+
+SAMPLE_LOCATIONS = [
+    "Main Street", "Maple Avenue", "Market Square", "Marina Boulevard", "Madison Park",
+    "Mill Road", "Mission District", "Museum Quarter", "Oak Street", "Ocean Drive",
+    "Old Town", "Olive Lane", "Park Avenue", "Parkside Road", "Pine Street",
+    "Pier 39", "Plaza Mayor", "Riverside Drive", "River Walk", "Rose Garden",
+    "Royal Mile", "Harbor View", "Hill Street", "Highland Park", "Union Square",
+    "University Avenue", "Sunset Boulevard", "Summit Road", "Station Square", "Lake Shore Drive",
+]
+
+
+def make_predictions(text, cities=("Springfield", "Riverton"), limit=5):
+    """Autocomplete predictions whose words start with every term of `text`, at most `limit`."""
+    terms = text.lower().split()
+    predictions = []
+    for city in cities:
+        for name in SAMPLE_LOCATIONS:
+            description = f"{name}, {city}"
+            words = description.lower().replace(",", " ").split()
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                predictions.append({
+                    "description": description,
+                    "place_id": f"auto-{description.lower().replace(' ', '-').replace(',', '')}",
+                })
+    return predictions[:limit]
+
+
+def make_reviews(place_id, count=5):
+    """Deterministic synthetic reviews for a place."""
+    rng = random.Random(place_id)
+    return [
+        {
+            "author_name": f"Reviewer {i}",
+            "rating": rng.randint(1, 5),
+            "text": " ".join(rng.sample(SAMPLE_REVIEW_TEXTS, 2)),
+            "time": 1700000000 + rng.randint(0, 10 ** 6),
+        }
+        for i in range(count)
+    ]
+
+
+def make_places(lat, lng, count=20):
+    """Deterministic synthetic Nearby Search results around a point."""
+    rng = random.Random(f"{lat:.4f},{lng:.4f}")
+    types = [["cafe", "food"], ["bar", "night_club"], ["restaurant", "food"],
+             ["park"], ["museum", "tourist_attraction"], ["bank", "finance"]]
+    places = []
+    for i in range(count):
+        place_id = f"stub-{lat:.3f}-{lng:.3f}-{i}"
+        places.append({
+            "place_id": place_id,
+            "name": f"Stub Place {i}",
+            "types": rng.choice(types) + ["establishment"],
+            "vicinity": f"{i} Stub Street",
+            "rating": round(rng.uniform(3, 5), 1),
+            "geometry": {"location": {
+                "lat": lat + rng.uniform(-0.01, 0.01),
+                "lng": lng + rng.uniform(-0.01, 0.01),
+            }},
+        })
+    return places
+
+
+def load_fixtures(path=FIXTURES_PATH):
+    """Nearby Search results and Place Details reviews captured around one center point."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def fixture_places(fixtures, lat, lng):
+    """The fixture's Nearby Search results moved to (lat, lng), with place_ids unique to that point."""
+    center = fixtures["center"]
+    places = []
+    for place in fixtures["nearbysearch"]:
+        location = place["geometry"]["location"]
+        places.append({
+            **place,
+            "place_id": f"{place['place_id']}@{lat:.3f},{lng:.3f}",
+            "geometry": {"location": {
+                "lat": lat + location["lat"] - center["lat"],
+                "lng": lng + location["lng"] - center["lng"],
+            }},
+        })
+    return places
+
+
+def fixture_reviews(fixtures, place_id):
+    """Fixture reviews of a place returned by fixture_places, or None for other places."""
+    return fixtures["details"].get(place_id.split("@")[0])
+
+
+class StubPlacesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+        with server.lock:
+            server.request_count += 1
+
+        delay = server.latency
+        if server.jitter:
+            delay += random.uniform(0, server.jitter)
+        if params.get("place_id") in server.slow_place_ids:
+            delay += server.slow_latency
+        if delay:
+            time.sleep(delay)
+
+        with server.lock:
+            fail = server.failures_left > 0 or (server.error_rate and random.random() < server.error_rate)
+            if server.failures_left > 0:
+                server.failures_left -= 1
+        if fail:
+            payload = json.dumps({"status": "UNKNOWN_ERROR"}).encode("utf-8")
+            self.send_response(server.error_status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        if parsed.path.endswith("/details/json"):
+            place_id = params.get("place_id", "")
+            reviews = fixture_reviews(server.fixtures, place_id) if server.fixtures else None
+            body = {"status": "OK", "result": {"reviews": make_reviews(place_id) if reviews is None else reviews}}
+        elif parsed.path.endswith("/nearbysearch/json"):
+            lat, lng = (float(v) for v in params.get("location", "0,0").split(","))
+            places = fixture_places(server.fixtures, lat, lng) if server.fixtures else make_places(lat, lng)
+            body = {"status": "OK", "results": places}
+        elif parsed.path.endswith("/autocomplete/json"):
+            predictions = make_predictions(params.get("input", ""))
+            body = {"status": "OK" if predictions else "ZERO_RESULTS", "predictions": predictions}
+        else:
+            self.send_error(404)
+            return
+
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubPlacesServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections under concurrent load
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def start_stub_server(latency=0.1, jitter=0.0, slow_place_ids=(), slow_latency=2.0, port=0,
+                      fail_first=0, error_rate=0.0, error_status=503, fixtures=None):
+    """Start the stub in a daemon thread and return (server, base_url).
+
+    The first `fail_first` requests, and a random `error_rate` fraction of
+    the rest, are answered with `error_status` to exercise retries and the
+    circuit breaker. With `fixtures` (see load_fixtures) Nearby Search and
+    Place Details answers are replayed from them instead of generated.
+    """
+    server = StubPlacesServer(("127.0.0.1", port), StubPlacesHandler)
+    server.latency = latency
+    server.jitter = jitter
+    server.slow_place_ids = set(slow_place_ids)
+    server.slow_latency = slow_latency
+    server.request_count = 0
+    server.failures_left = fail_first
+    server.error_rate = error_rate
+    server.error_status = error_status
+    server.fixtures = fixtures
+    server.lock = threading.Lock()
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the stub Places server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--fixtures", action="store_true", help="replay benchmarks/fixtures instead of synthetic data")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.latency, args.jitter, port=args.port, error_rate=args.error_rate,
+                                    fixtures=load_fixtures() if args.fixtures else None)
+    print(f"Stub Places API listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,43 @@
+# gunicorn.conf.py
+"""Gunicorn settings for running the backend with several worker processes.
+
+Run from the backend directory:
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The master builds the track store and search index caches once before
+forking, and every worker memory-maps the same files, so the catalog is in
+memory once however many workers run. Set PLACE_VECTOR_BACKEND=sqlite and
+REVIEW_CACHE_BACKEND=sqlite to also share the place vector and review
+caches between workers instead of keeping one copy per worker.
+
+Profiles are state, not a cache: a session's requests land on any worker,
+so with more than one worker PROFILE_STORE_BACKEND defaults to sqlite.
+"""
+import os
+import subprocess
+import sys
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", 4))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+if workers > 1:
+    # Read by the workers when they import the app
+    os.environ.setdefault("PROFILE_STORE_BACKEND", "sqlite")
+# Workers import the app themselves: startup is cheap (see STARTUP_WARMUP), and
+# forking a master that already runs warm-up and refresh threads is unsafe
+preload_app = False
+
+
+def on_starting(server):
+    """Build the binary track caches once, before any worker starts.
+
+    Runs in a child interpreter so the master never imports the app (and its
+    SQLite connections) that the workers would inherit.
+    """
+    subprocess.run(
+        [sys.executable, "-c", "from app.api.spotify import load_tracks; load_tracks()"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, "STARTUP_WARMUP": "off", "PLACE_REFRESH_INTERVAL": "0", "PRECOMPUTE_TILES": ""},
+        check=True
+    )
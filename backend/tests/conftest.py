@@ -0,0 +1,58 @@
+# tests/conftest.py
+import os
+
+# Keep the app from starting background threads or writing files in the working directory
+os.environ.update({
+    "STARTUP_WARMUP": "off",
+    "PLACE_REFRESH_INTERVAL": "0",
+    "PRECOMPUTE_TILES": "",
+    "KEYWORD_MODEL_INTERVAL": "0",
+    "KEYWORD_MODEL_PATH": "",
+    "LOG_LEVEL": "WARNING",
+})
+
+import types
+
+import pytest
+
+
+class FakeClock:
+    """Stands in for a module's `time`; sleep() advances the clock instead of waiting."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    monotonic = perf_counter = time
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A FakeClock; call clock.install(module) to make `module.time` use it."""
+    fake = FakeClock()
+
+    def install(module):
+        monkeypatch.setattr(module, "time", types.SimpleNamespace(
+            time=fake.time, monotonic=fake.monotonic, perf_counter=fake.perf_counter, sleep=fake.sleep))
+
+    fake.install = install
+    return fake
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import create_app
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
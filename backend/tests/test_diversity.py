@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from app.models import diversity
+from app.models.diversity import TypeOverlap, mmr_select, type_codes
+from app.models.place_filter import type_names
+
+
+def test_type_names_accepts_lists_and_strings():
+    assert type_names("point of interest,Night Club, cafe") == ("point_of_interest", "night_club", "cafe")
+    assert type_names(["night_club", "Night Club"]) == ("night_club",)
+    assert type_names(None) == ()
+
+
+def test_string_types_are_not_split_into_characters():
+    size = len(diversity._type_codes)
+    rows, codes = type_codes(["cafe,point of interest,establishment", ["cafe", "point_of_interest"]])
+    assert rows.tolist() == [0, 1]
+    assert codes[0] == codes[1] == diversity._type_codes["cafe"]
+    assert len(diversity._type_codes) <= size + 1
+    assert not any(len(name) == 1 for name in diversity._type_codes)
+
+
+def test_string_and_list_types_give_the_same_overlap():
+    as_lists = [["cafe", "point_of_interest"], ["cafe", "bakery"], ["park", "establishment"]]
+    as_strings = ["cafe,point of interest", "cafe, bakery", "park,establishment"]
+    assert np.allclose(TypeOverlap(as_lists).to(0), TypeOverlap(as_strings).to(0))
+    assert TypeOverlap(as_strings).to(2)[:2].tolist() == [0, 0]
+
+
+def test_mmr_spreads_picks_over_string_types():
+    relevance = np.array([1.0, 0.99, 0.98, 0.5])
+    types = ["cafe,point of interest", "cafe,point of interest", "cafe,point of interest",
+             "park,point of interest"]
+    assert mmr_select(relevance, place_types=types, k=2, diversity=0.8).tolist() == [0, 3]
+    assert mmr_select(relevance, place_types=types, k=2, diversity=0).tolist() == [0, 1]
+
+
+def test_mmr_without_similarity_inputs_keeps_relevance_order():
+    relevance = np.array([0.2, 0.9, 0.5])
+    assert mmr_select(relevance, k=5).tolist() == [1, 2, 0]
+    assert mmr_select(relevance, k=0).tolist() == []
+
+
+def test_types_past_the_vocabulary_limit_keep_distinct_codes(monkeypatch):
+    monkeypatch.setattr(diversity, "_type_codes", dict.fromkeys(diversity.GENERIC_PLACE_TYPES, -1))
+    monkeypatch.setattr(diversity, "MAX_TYPE_VOCABULARY", len(diversity.GENERIC_PLACE_TYPES) + 1)
+    overlap = TypeOverlap([["aquarium", "bowling_alley"]])   # Too many for the shared vocabulary
+    overlap.extend([["casino"]])                               # Fits, takes the last shared code
+    overlap.extend([["dentist"], ["aquarium"]])               # Full again
+    codes = {**diversity._type_codes, **overlap.overflow}
+    assert len({codes[name] for name in ("aquarium", "bowling_alley", "casino", "dentist")}) == 4
+    assert overlap.to(1).tolist() == [0, 1, 0, 0]
+    assert overlap.to(2).tolist() == [0, 0, 1, 0]
+    assert overlap.to(3)[0] == pytest.approx(1 / np.sqrt(2))
@@ -0,0 +1,80 @@
+import numpy as np
+
+from app import startup
+from app.models import keyword_model
+from app.models.keyword_model import KeywordModel, review_digest
+
+
+def reviews(*texts):
+    return [{"author_name": f"a{i}", "time": i, "rating": 5, "text": text} for i, text in enumerate(texts)]
+
+
+def test_reviews_are_counted_once():
+    model = KeywordModel(digest_bits=8)
+    model.observe(reviews("great coffee", "quiet room"))
+    assert model.update() == 2
+    model.observe(reviews("great coffee", "quiet room", "loud music"))
+    assert model.update() == 1
+    assert model.documents == 3
+    assert len(model.digests) == 256
+
+
+def test_keywords_prefer_rare_terms():
+    model = KeywordModel()
+    model.observe(reviews(*["great place"] * 1 + [f"great spot {i}" for i in range(20)]))
+    model.update()
+    assert model.keywords(["great espresso", "great espresso"], k=1) == ["espresso"]
+
+
+def test_pending_queue_is_capped():
+    model = KeywordModel(max_pending=3)
+    assert model.observe(reviews("a b", "c d")) == 2
+    assert model.observe(reviews("e f", "g h")) == 3
+    assert model.stats()["dropped"] == 1
+
+
+def test_nothing_is_queued_without_a_worker(monkeypatch):
+    model = KeywordModel()
+    monkeypatch.setattr(keyword_model.KEYWORD_MODEL, "get", lambda: model)
+    monkeypatch.setattr(keyword_model, "_keyword_worker", None)
+    keyword_model.observe_reviews(reviews("great coffee"))
+    assert model.pending() == 0
+
+
+def test_saved_model_is_shared_and_deduplicated(tmp_path):
+    path = str(tmp_path / "keywords.npz")
+    first = KeywordModel(path, digest_bits=8)
+    first.observe(reviews("great coffee"))
+    first.update()
+    second = KeywordModel(path, digest_bits=8).load()
+    assert second.documents == 1
+    second.observe(reviews("great coffee", "loud music"))
+    assert second.update() == 1
+    first.update()
+    assert first.documents == 2
+
+
+def test_sorted_digests_of_older_files_are_migrated(tmp_path):
+    path = str(tmp_path / "keywords.npz")
+    counted = reviews("great coffee")
+    legacy = np.array([review_digest(counted[0])], dtype=np.uint64)
+    np.savez(path, df=np.zeros(1 << keyword_model.KEYWORD_HASH_BITS, dtype=np.int64), documents=1, digests=legacy)
+    model = KeywordModel(path, digest_bits=8).load()
+    model.observe(counted)
+    assert model.update() == 0 and model.documents == 1
+
+
+def test_starting_the_worker_does_not_load_the_model(monkeypatch):
+    monkeypatch.setattr(startup, "RESOURCES", {})
+    resource = startup.LazyResource("keyword_model_test", lambda: KeywordModel(max_pending=10))
+    monkeypatch.setattr(keyword_model, "KEYWORD_MODEL", resource)
+    monkeypatch.setattr(keyword_model, "KEYWORD_MODEL_INTERVAL", 3600)
+    monkeypatch.setattr(keyword_model, "_keyword_worker", None)
+    worker = keyword_model.start_keyword_model_worker()
+    try:
+        assert not resource.loaded
+        # The first review observed loads it and is queued
+        keyword_model.observe_reviews(reviews("great coffee"))
+        assert resource.loaded and resource.get().pending() == 1
+    finally:
+        worker.stop()
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from app.api import nearby_index, places
+from app.api.nearby_index import NEARBY_PAGE_SIZE, NearbyIndex
+
+LAT, LNG = 40.0, -75.0
+
+
+def place(place_id, lat=LAT, lng=LNG):
+    return {"place_id": place_id, "geometry": {"location": {"lat": lat, "lng": lng}}}
+
+
+def spread(count, prefix="p"):
+    """Places on a line north of the centre, ~100 m apart."""
+    return [place(f"{prefix}{i}", LAT + i * 0.0009) for i in range(count)]
+
+
+@pytest.fixture
+def index(clock):
+    clock.install(nearby_index)
+    return NearbyIndex(ttl=3600, max_places=100)
+
+
+def test_small_result_set_covers_the_area(index):
+    index.add_search(LAT, LNG, 5000, spread(5))
+    assert index.plan(LAT, LNG, 1600)[1] is None
+    assert {p["place_id"] for p in index.query(LAT, LNG, 1600)} == {f"p{i}" for i in range(5)}
+
+
+def test_full_page_does_not_cover_the_area(index):
+    # 20 results for 5 miles say nothing about what else lies within 1 mile
+    index.add_search(LAT, LNG, 8000, spread(NEARBY_PAGE_SIZE))
+    covered, fetch_circle = index.plan(LAT, LNG, 1600)
+    assert covered == [] and fetch_circle == (LAT, LNG, 1600)
+    # The places are still indexed for later exhaustive searches
+    assert index.stats()["places"] == NEARBY_PAGE_SIZE
+
+
+def test_exhaustive_flag_overrides_the_page_heuristic(index):
+    index.add_search(LAT, LNG, 5000, spread(NEARBY_PAGE_SIZE), exhaustive=True)
+    assert index.plan(LAT, LNG, 1600)[1] is None
+    index.add_search(LAT + 1, LNG, 5000, spread(1), exhaustive=False)
+    assert index.plan(LAT + 1, LNG, 1000)[1] is not None
+
+
+def test_places_and_coverage_expire(index, clock):
+    index.add_search(LAT, LNG, 1000, spread(3))
+    clock.advance(3601)
+    assert index.plan(LAT, LNG, 1000)[1] == (LAT, LNG, 1000)
+    index.add_search(LAT + 1, LNG, 1000, [place("other", LAT + 1)])
+    stats = index.stats()
+    assert stats["places"] == 1 and stats["cells"] == 1
+    assert index.query(LAT, LNG, 1000) == []
+
+
+def test_size_bound_drops_oldest_places_and_their_coverage(clock):
+    clock.install(nearby_index)
+    index = NearbyIndex(ttl=3600, max_places=5)
+    index.add_search(LAT, LNG, 500, [place("a")])
+    clock.advance(1)
+    index.add_search(LAT + 1, LNG, 500, [place(f"b{i}", LAT + 1) for i in range(5)])
+    assert index.stats()["places"] == 5
+    assert index.query(LAT, LNG, 500) == []
+    # "a" is gone, so its area must go back upstream instead of looking empty
+    covered, fetch_circle = index.plan(LAT, LNG, 500)
+    assert fetch_circle is not None and index._cell(LAT, LNG) not in covered
+    assert index.plan(LAT + 1, LNG, 500)[1] is None
+
+
+def test_reindexed_place_moves_cell(index):
+    index.add_search(LAT, LNG, 500, [place("a")])
+    index.add_search(LAT + 1, LNG, 500, [place("a", LAT + 1)])
+    assert index.query(LAT, LNG, 500) == []
+    assert [p["place_id"] for p in index.query(LAT + 1, LNG, 500)] == ["a"]
+    assert index.stats()["places"] == 1
+
+
+@pytest.mark.parametrize("status", ["OVER_QUERY_LIMIT", "REQUEST_DENIED", "INVALID_REQUEST"])
+def test_error_status_is_not_indexed_as_an_empty_area(client, monkeypatch, status):
+    index = NearbyIndex()
+    response = SimpleNamespace(status_code=200, text="", json=lambda: {"status": status, "results": []})
+    get = Mock(return_value=response)
+    monkeypatch.setattr(places, "NEARBY_INDEX", index)
+    monkeypatch.setattr(places, "google_get", get)
+    for _ in range(2):
+        reply = client.get(f"/api/places/nearby?lat={LAT}&lng={LNG}&radius=500")
+        assert reply.status_code in (502, 503)
+    assert get.call_count == 2
+    assert index.plan(LAT, LNG, 500)[1] == (LAT, LNG, 500)
+    assert index.stats()["covered_cells"] == 0
+
+
+def test_zero_results_is_an_answer():
+    response = SimpleNamespace(status_code=200, json=lambda: {"status": "ZERO_RESULTS", "results": []})
+    assert places.parse_nearby_response(response) == ([], None)
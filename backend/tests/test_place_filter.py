@@ -0,0 +1,41 @@
+from app.models.place_filter import compile_filter, normalize_type, types_mask
+
+EXCLUDED = {"lodging", "night_club"}
+
+
+def place(types):
+    return {"place_id": str(types), "types": types}
+
+
+def test_normalize_type():
+    assert normalize_type("Night Club") == normalize_type("night_club") == normalize_type(" night  club ") == "night_club"
+
+
+def test_types_mask_accepts_lists_and_comma_separated_strings():
+    type_filter = compile_filter(EXCLUDED)
+    assert types_mask(["lodging", "bar"]) == types_mask("lodging, bar") != 0
+    assert type_filter.excludes(place("point of interest, lodging"))
+    assert not type_filter.excludes(place("point of interest, cafe"))
+
+
+def test_default_exclusions():
+    type_filter = compile_filter(EXCLUDED)
+    places = [place(["cafe"]), place(["lodging", "restaurant"]), place("Night Club"), place([])]
+    assert type_filter.filter(places) == [places[0], places[3]]
+
+
+def test_include_lifts_the_default_exclusion_and_restricts():
+    type_filter = compile_filter(EXCLUDED, {"include": ["nightlife"]})
+    places = [place(["night_club"]), place(["bar"]), place(["cafe"])]
+    assert type_filter.filter(places) == places[:2]
+
+
+def test_exclude_adds_categories():
+    type_filter = compile_filter(EXCLUDED, {"exclude": ["food"]})
+    assert type_filter.filter([place(["bakery"]), place(["park"])]) == [place(["park"])]
+
+
+def test_invalid_profile():
+    import pytest
+    with pytest.raises(ValueError):
+        compile_filter(EXCLUDED, {"include": "bar"})
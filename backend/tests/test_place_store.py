@@ -0,0 +1,40 @@
+import numpy as np
+
+from app.models import place_store
+from app.models.place_store import SQLitePlaceVectorStore
+
+VECTOR = np.arange(8, dtype=float)
+
+
+def accessed_at(store):
+    return store._connect().execute("SELECT accessed_at FROM place_vectors").fetchone()[0]
+
+
+def test_sqlite_hits_touch_recency_at_most_once_per_interval(tmp_path, clock):
+    clock.install(place_store)
+    store = SQLitePlaceVectorStore(str(tmp_path / "places.sqlite3"), touch_interval=60)
+    store._put("a", VECTOR, {"name": "A"}, "fp")
+    start = accessed_at(store)
+
+    clock.advance(30)
+    vector, metadata = store._cached("a", "fp")
+    assert np.array_equal(vector, VECTOR) and metadata == {"name": "A"}
+    assert accessed_at(store) == start
+    clock.advance(31)
+    store._cached("a", "fp")
+    assert accessed_at(store) == clock.time()
+    assert store._cached("a", "other") is None
+    assert store.stats()["hits"] == 2
+
+
+def test_sqlite_store_keeps_the_most_recently_used(tmp_path, clock):
+    clock.install(place_store)
+    store = SQLitePlaceVectorStore(str(tmp_path / "places.sqlite3"), max_entries=2, touch_interval=60)
+    for place_id in "ab":
+        store._put(place_id, VECTOR, {}, "fp")
+        clock.advance(100)
+    store._cached("a", "fp")
+    clock.advance(100)
+    store._put("c", VECTOR, {}, "fp")
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from app.api import places
+from app.api.nearby_index import NearbyIndex
+from app.models import precompute
+from app.models.precompute import PrecomputeWorker
+
+TILE = (40.0, -75.0, 500.0)
+
+
+def test_failed_tile_is_not_indexed_and_is_reported(monkeypatch):
+    index = NearbyIndex()
+    response = SimpleNamespace(status_code=200, text="", json=lambda: {"status": "OVER_QUERY_LIMIT", "results": []})
+    monkeypatch.setattr(places, "google_get", Mock(return_value=response))
+    monkeypatch.setattr(precompute, "NEARBY_INDEX", index)
+
+    worker = PrecomputeWorker([TILE])
+    assert not worker.refresh(TILE)
+    assert index.stats()["covered_cells"] == 0 and index.plan(*TILE)[1] == TILE
+
+    stats = worker.stats()
+    assert stats["failed_tiles"] == 1
+    tile = stats["tiles"][0]
+    assert "OVER_QUERY_LIMIT" in tile["error"] and tile["failures"] == 1 and tile["refreshed_at"] is None
+
+
+def test_recovered_tile_clears_its_error(monkeypatch):
+    outcomes = iter([RuntimeError("quota"), {"places": 3}])
+
+    def refresh_tile(*tile):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    worker = PrecomputeWorker([TILE], refresh_tile=refresh_tile)
+    worker.refresh(TILE)
+    assert worker.refresh(TILE)
+    stats = worker.stats()
+    assert stats["failed_tiles"] == 0
+    assert stats["tiles"][0]["failures"] == 1 and stats["tiles"][0]["result"] == {"places": 3}
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from app.api import profile_store, spotify
+from app.api.profile_store import ProfileStore, SQLiteProfileStore, preference_vector
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path, clock):
+    clock.install(profile_store)
+
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return SQLiteProfileStore(str(tmp_path / "profiles.sqlite3"), **kwargs)
+        return ProfileStore(**kwargs)
+    return make
+
+
+def test_put_get_delete(make_store):
+    store = make_store()
+    store.put("p", [3, 1, 2], [1.0, 2.0, 3.0, 4.0, 5.0])
+    rows, sums = store.get("p")
+    assert rows.tolist() == [3, 1, 2] and sums.tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    store.delete("p")
+    assert store.get("p") is None
+
+
+def test_profiles_expire_unless_used(make_store, clock):
+    store = make_store(ttl=100)
+    store.put("used", [1], np.zeros(5))
+    store.put("idle", [2], np.zeros(5))
+    clock.advance(60)
+    assert store.get("used") is not None
+    clock.advance(60)
+    assert store.get("idle") is None
+    assert store.get("used") is not None
+
+
+def test_least_recently_used_profile_is_evicted(make_store, clock):
+    store = make_store(max_entries=2)
+    for profile_id in ("a", "b"):
+        store.put(profile_id, [1], np.zeros(5))
+        clock.advance(1)
+    store.get("a")
+    clock.advance(1)
+    store.put("c", [1], np.zeros(5))
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+
+
+def test_preference_vector_is_the_mean():
+    assert preference_vector([1, 2], [1.0, 0.5, 1.2, 0.6, 0.8]) == pytest.approx(
+        {"valence": 0.5, "energy": 0.25, "loudness": 0.6, "ambiance": 0.3, "liveness": 0.4})
+    assert preference_vector([], []) == {}
+
+
+def test_unknown_session_profile_is_not_overwritten(client, monkeypatch):
+    store = ProfileStore()
+    monkeypatch.setattr(spotify, "PROFILE_STORE", store)
+    with client.session_transaction() as session:
+        session["profile_id"] = "held-by-another-worker"
+    response = client.get("/api/spotify/profile")
+    assert response.status_code == 404
+    assert store.get("held-by-another-worker") is None
+    with client.session_transaction() as session:
+        assert "profile_id" not in session
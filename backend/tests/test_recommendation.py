@@ -0,0 +1,33 @@
+from unittest.mock import Mock
+
+import numpy as np
+
+from app.api.nearby_index import NearbyIndex
+from app.models import recommendation
+from app.models.recommendation import candidate_vectors
+from app.models.vibe_index import VibeIndex
+
+REVIEWS = [{"text": "Great coffee", "rating": 5}]
+
+
+def place(place_id, name, lat=40.0, lng=-75.0):
+    return {"place_id": place_id, "name": name, "geometry": {"location": {"lat": lat, "lng": lng}}}
+
+
+def test_vibe_index_only_takes_server_side_places(monkeypatch):
+    nearby, vibe = NearbyIndex(), VibeIndex()
+    nearby.add_search(40.0, -75.0, 500, [place("real", "Corner Cafe")])
+    store = Mock(get_or_build=Mock(return_value=(np.ones(8), {})))
+    monkeypatch.setattr(recommendation, "NEARBY_INDEX", nearby)
+    monkeypatch.setattr(recommendation, "VIBE_INDEX", vibe)
+    monkeypatch.setattr(recommendation, "PLACE_VECTOR_STORE", store)
+
+    posted = [place("real", "Totally Real Ad", lat=0.0, lng=0.0), place("made-up", "Injected Place")]
+    indices, vectors, _, _ = candidate_vectors(posted, {"real": REVIEWS, "made-up": REVIEWS})
+    # Both are still scored for the caller
+    assert indices == [0, 1] and vectors.shape == (2, 8)
+
+    assert len(vibe) == 1
+    [match] = vibe.query(np.ones(8), k=5)
+    assert match["place"]["name"] == "Corner Cafe"
+    assert match["place"]["geometry"]["location"] == {"lat": 40.0, "lng": -75.0}
@@ -0,0 +1,72 @@
+import pytest
+
+from app.api.reviews import REVIEW_FETCH_CONCURRENCY, REVIEW_FETCH_DEADLINE, fan_out_limits, parse_fan_out_options
+from app.models.recommendation import parse_seed
+
+PREFERENCES = {"valence": 0.6, "energy": 0.7}
+
+
+@pytest.mark.parametrize("options", [
+    {"deadline": "soon"}, {"deadline": -1}, {"deadline": 0}, {"deadline": float("nan")}, {"deadline": True},
+    {"max_concurrency": "many"}, {"max_concurrency": 0}, {"max_concurrency": 2.5}, {"max_concurrency": float("inf")},
+])
+def test_invalid_fan_out_options(options):
+    parsed, error = parse_fan_out_options(options)
+    assert parsed is None and error[1] == 400
+
+
+def test_fan_out_options_are_clamped():
+    parsed, error = parse_fan_out_options({"deadline": float("inf"), "max_concurrency": 10 ** 6})
+    assert error is None
+    assert parsed == {"deadline": REVIEW_FETCH_DEADLINE, "max_concurrency": REVIEW_FETCH_CONCURRENCY}
+    assert parse_fan_out_options({"deadline": "0.5"})[0]["deadline"] == 0.5
+    assert fan_out_limits(None, 10 ** 9, 5)[1] == REVIEW_FETCH_DEADLINE
+
+
+@pytest.mark.parametrize("path", ["/api/recommendations/content-based", "/api/recommendations/content-based/stream"])
+def test_invalid_deadline_is_a_json_400(client, path):
+    response = client.post(path, json={"user_preferences": PREFERENCES, "places": [], "deadline": "soon"})
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+def test_huge_deadline_is_accepted(client):
+    response = client.post("/api/recommendations/content-based",
+                           json={"user_preferences": PREFERENCES, "places": [], "deadline": 1e300})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("seed", ["lucky", -1, 1.5, True, [1]])
+def test_invalid_seed_is_a_json_400(client, seed):
+    response = client.post("/api/recommendations/content-based",
+                           json={"user_preferences": PREFERENCES, "places": [], "seed": seed})
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+def test_seed_is_parsed():
+    assert parse_seed({"seed": "42"}) == (42, None)
+    assert parse_seed({}) == (None, None)
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2],
+    {"users": [], "places": [], "deadline": "soon"},
+    {"users": [], "places": [], "deadline": -5},
+    {"users": [], "places": [], "seed": "lucky"},
+    {"users": [], "places": [], "max_concurrency": 0},
+])
+def test_invalid_batch_is_a_json_400(client, body):
+    response = client.post("/api/recommendations/batch", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+def test_batch_user_with_bad_seed_fails_alone(client):
+    response = client.post("/api/recommendations/batch", json={
+        "places": [], "deadline": 1e300, "seed": 7,
+        "users": [{"id": "a", "user_preferences": PREFERENCES},
+                  {"id": "b", "user_preferences": PREFERENCES, "seed": -1}]})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == ["success", "error"]
@@ -0,0 +1,91 @@
+import pytest
+
+from app.api import review_cache
+from app.api.review_cache import ReviewCache, SQLiteReviewCache
+
+REVIEWS = [{"text": "Great coffee", "rating": 5}]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path, clock):
+    clock.install(review_cache)
+
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return SQLiteReviewCache(str(tmp_path / "reviews.sqlite3"), **kwargs)
+        return ReviewCache(**kwargs)
+    return make
+
+
+def test_hit_and_miss(make_cache):
+    cache = make_cache()
+    assert cache.get("a") is None
+    cache.set("a", REVIEWS)
+    assert cache.get("a") == REVIEWS
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_entries_expire_after_ttl(make_cache, clock):
+    cache = make_cache(ttl=60)
+    cache.set("a", REVIEWS)
+    clock.advance(59)
+    assert cache.get("a") == REVIEWS
+    clock.advance(2)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_is_evicted(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    cache.set("a", REVIEWS)
+    clock.advance(100)
+    cache.set("b", REVIEWS)
+    clock.advance(100)
+    cache.get("a")
+    clock.advance(100)
+    cache.set("c", REVIEWS)
+    assert cache.get("b") is None
+    assert cache.get("a") == REVIEWS and cache.get("c") == REVIEWS
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_bound(make_cache, clock):
+    size = len('[{"text": "Great coffee", "rating": 5}]')
+    cache = make_cache(max_bytes=2 * size)
+    for place_id in "abc":
+        cache.set(place_id, REVIEWS)
+        clock.advance(1)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] <= 2 * size
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    SQLiteReviewCache(path).set("a", REVIEWS)
+    assert SQLiteReviewCache(path).get("a") == REVIEWS
+
+
+def test_sqlite_hits_touch_recency_at_most_once_per_interval(tmp_path, clock):
+    clock.install(review_cache)
+    cache = SQLiteReviewCache(str(tmp_path / "reviews.sqlite3"), touch_interval=60)
+    cache.set("a", REVIEWS)
+
+    def accessed_at():
+        return cache._connect().execute("SELECT accessed_at FROM reviews").fetchone()[0]
+
+    start = accessed_at()
+    clock.advance(30)
+    assert cache.get("a") == REVIEWS and accessed_at() == start
+    clock.advance(31)
+    assert cache.get("a") == REVIEWS and accessed_at() == clock.time()
+
+
+def test_sqlite_eviction_keeps_the_most_recent(tmp_path, clock):
+    clock.install(review_cache)
+    cache = SQLiteReviewCache(str(tmp_path / "reviews.sqlite3"), max_entries=3)
+    for place_id in "abcdef":
+        cache.set(place_id, REVIEWS)
+        clock.advance(1)
+    assert [cache.get(place_id) is not None for place_id in "abcdef"] == [False] * 3 + [True] * 3
+    assert cache.stats()["evictions"] == 3
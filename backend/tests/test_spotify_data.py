@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from app.api.spotify import (
+    SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, TRACKS, encode_data_chunks, encode_data_page, parse_search_limit
+)
+from app.api.track_store import TRACK_FIELDS
+
+
+@pytest.mark.parametrize("offset, limit, fields", [
+    (0, 100, tuple(TRACK_FIELDS)), (5, 3, ("track_name",)), (0, None, ("track_name", "streams")), (10 ** 6, 10, ("streams",)),
+])
+def test_chunked_body_matches_a_single_encode(offset, limit, fields):
+    store = TRACKS.get().store
+    end = len(store) if limit is None else min(len(store), offset + limit)
+    expected = json.dumps({
+        "status": "success",
+        "tracks": store.records(store.ids[offset:end], fields),
+        "total": len(store),
+        "offset": offset,
+        "limit": limit
+    }, separators=(",", ":")).encode("utf-8")
+    assert b"".join(encode_data_chunks(offset, limit, fields)) == expected
+
+
+def test_only_standard_pages_are_cached(client):
+    encode_data_page.cache_clear()
+    for query in ("limit=7", "limit=100&fields=track_name", "offset=3", "limit=1000000"):
+        response = client.get(f"/api/spotify/data?{query}")
+        assert response.status_code == 200 and response.get_json()["status"] == "success"
+    assert encode_data_page.cache_info().currsize == 0
+
+    response = client.get("/api/spotify/data?offset=0&limit=100")
+    assert len(response.get_json()["tracks"]) == 100
+    assert encode_data_page.cache_info().currsize == 1
+    assert client.get("/api/spotify/data?offset=0&limit=100",
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+@pytest.mark.parametrize("limit", ["ten", "2.5", "0", "-3"])
+def test_invalid_search_limit_is_a_400(client, limit):
+    response = client.get(f"/api/spotify/available-tracks?limit={limit}")
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+@pytest.mark.parametrize("limit, expected", [("1", 1), ("", SEARCH_DEFAULT_LIMIT), (str(10 ** 9), SEARCH_MAX_LIMIT)])
+def test_search_limit_is_clamped(limit, expected):
+    assert parse_search_limit({"limit": limit}) == expected
+    assert parse_search_limit({}) == SEARCH_DEFAULT_LIMIT
@@ -0,0 +1,129 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from app.api import async_upstream, upstream
+from app.api.upstream import CircuitBreaker, RateLimiter
+
+
+@pytest.fixture
+def breaker(clock):
+    clock.install(upstream)
+    return CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+
+def test_breaker_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_success()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_lets_one_trial_through_when_half_open(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.advance(29)
+    assert not breaker.allow()
+
+
+def test_rate_limiter_burst_then_refill(clock):
+    clock.install(upstream)
+    limiter = RateLimiter(rate=10, burst=2)
+    assert limiter.reserve() == 0 and limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.1)
+    # Borrowed tokens queue callers in arrival order
+    assert limiter.reserve() == pytest.approx(0.2)
+    assert limiter.reserve(timeout=0.1) is None
+    clock.advance(1)
+    assert limiter.reserve() == 0
+
+
+def test_rate_limiter_acquire_waits(clock):
+    clock.install(upstream)
+    limiter = RateLimiter(rate=2, burst=1)
+    assert limiter.acquire()
+    start = clock.now
+    assert limiter.acquire()
+    assert clock.now - start == pytest.approx(0.5)
+    assert not limiter.acquire(timeout=0.1)
+
+
+def test_disabled_rate_limiter():
+    assert RateLimiter(rate=0).reserve() == 0.0
+
+
+@pytest.fixture
+def half_open(monkeypatch, breaker, clock):
+    """The module breaker, tripped and past its reset timeout."""
+    monkeypatch.setattr(upstream, "CIRCUIT_BREAKER", breaker)
+    monkeypatch.setattr(async_upstream, "CIRCUIT_BREAKER", breaker)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(30)
+    return breaker
+
+
+def test_rate_limit_refusal_does_not_claim_the_trial(monkeypatch, half_open):
+    monkeypatch.setattr(upstream, "RATE_LIMITER", RateLimiter(rate=0.01, burst=0))
+    with pytest.raises(upstream.UpstreamError):
+        upstream.google_get("details", {})
+    assert half_open.allow()
+
+
+def test_unexpected_error_releases_the_trial(monkeypatch, half_open):
+    monkeypatch.setattr(upstream, "RATE_LIMITER", RateLimiter(rate=0))
+    monkeypatch.setattr(upstream, "SESSION", SimpleNamespace(get=Mock(side_effect=ValueError("bad params"))))
+    with pytest.raises(ValueError):
+        upstream.google_get("details", {})
+    assert half_open.state == "half-open" and half_open.allow()
+
+
+def test_successful_trial_closes_the_breaker(monkeypatch, half_open):
+    monkeypatch.setattr(upstream, "RATE_LIMITER", RateLimiter(rate=0))
+    monkeypatch.setattr(upstream, "SESSION", SimpleNamespace(get=Mock(return_value=SimpleNamespace(status_code=200))))
+    assert upstream.google_get("details", {}).status_code == 200
+    assert half_open.state == "closed"
+
+
+def test_open_breaker_refuses_without_taking_a_token(monkeypatch, breaker):
+    limiter = RateLimiter(rate=1, burst=1)
+    monkeypatch.setattr(upstream, "CIRCUIT_BREAKER", breaker)
+    monkeypatch.setattr(upstream, "RATE_LIMITER", limiter)
+    for _ in range(3):
+        breaker.record_failure()
+    with pytest.raises(upstream.CircuitOpenError):
+        upstream.google_get("details", {})
+    assert limiter.reserve(timeout=0) == 0
+
+
+def test_cancelled_async_trial_is_released(monkeypatch, half_open):
+    monkeypatch.setattr(async_upstream, "RATE_LIMITER", RateLimiter(rate=0))
+
+    async def cancelled(*args, **kwargs):
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(async_upstream, "get_async_client", lambda: SimpleNamespace(get=cancelled))
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(async_upstream.async_google_get("details", {}))
+    assert half_open.allow()